@@ -0,0 +1,296 @@
+"""
+Фабрика приложения чат-бота и точка входа командной строки.
+
+На уровне модуля импортируется только стандартная библиотека:
+настройки, Telegram, клиент GraphQL-шлюза и обработчики загружаются
+внутри фабрики по этапам, длительность которых можно измерить
+параметром `--measure-startup`.
+"""
+import argparse
+import importlib
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence
+
+if TYPE_CHECKING:
+    from chatbot import ChatBotTelegram
+
+# модули обработчиков, загружаемые при первом обновлении
+HANDLER_MODULES = (
+    "handlers.command.places",
+    "handlers.callback.places",
+    "handlers.message.places",
+    "handlers.command.transfer",
+    "handlers.message.transfer",
+    "handlers.inline.places",
+)
+
+
+class StartupTimer:
+    """
+    Измерение длительности этапов запуска приложения.
+    """
+
+    def __init__(self) -> None:
+        """
+        Конструктор.
+        """
+
+        self.started = time.perf_counter()
+        #: длительность этапов (в секундах) в порядке их выполнения
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Измерение длительности этапа.
+
+        :param name: Название этапа.
+        :return:
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    @property
+    def total(self) -> float:
+        """
+        Время, прошедшее с начала запуска (в секундах).
+
+        :return:
+        """
+
+        return time.perf_counter() - self.started
+
+    def report(self) -> str:
+        """
+        Формирование отчета о длительности этапов.
+
+        :return:
+        """
+
+        width = max((len(name) for name, _ in self.phases), default=0) + 2
+        lines = [
+            f"{name:<{width}}{duration * 1000:>9.1f} ms"
+            for name, duration in self.phases
+        ]
+        lines.append(f"{'total':<{width}}{self.total * 1000:>9.1f} ms")
+
+        return "\n".join(lines)
+
+
+def create_app(
+    worker: int = 0, timer: Optional[StartupTimer] = None
+) -> "ChatBotTelegram":
+    """
+    Создание чат-бота с зарегистрированными обработчиками.
+
+    :param worker: Номер процесса-обработчика (при распределении обновлений по процессам).
+    :param timer: Объект для измерения длительности этапов запуска.
+    :return:
+    """
+
+    from settings import settings
+
+    timer = timer or StartupTimer()
+    with timer.phase("import: telegram"):
+        from telegram import Bot
+        from telegram.ext import Updater
+
+    with timer.phase("import: chatbot"):
+        from chatbot import ChatBotTelegram, setup_handlers
+
+    with timer.phase("import: gateway"):
+        from clients.operations import OperationValidationError
+        from runtime.aio import AsyncioRunner
+
+        if settings.async_mode.enabled:
+            from clients.gateway_async import async_gateway_client
+        else:
+            from clients.gateway import gateway_client
+
+    with timer.phase("init: gateway"):
+        # однократная загрузка схемы и открытие пула соединений с GraphQL-шлюзом;
+        # при недоступности шлюза подключение будет выполнено при первом запросе
+        runner = None
+        if settings.async_mode.enabled:
+            # обработка обновлений корутинами в отдельном цикле событий
+            runner = AsyncioRunner(max_in_flight=settings.async_mode.max_in_flight)
+            runner.start()
+        try:
+            if runner:
+                runner.run(async_gateway_client.connect())
+            else:
+                gateway_client.connect()
+        except OperationValidationError:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("GraphQL gateway is unavailable at startup")
+
+    with timer.phase("init: persistence"):
+        persistence = None
+        if settings.persistence.enabled:
+            from persistence.sqlite import SQLiteStateStore
+            from persistence.writebehind import WriteBehindPersistence
+
+            # состояние диалогов и данные пользователей загружаются лениво
+            persistence = WriteBehindPersistence(
+                SQLiteStateStore(settings.persistence.path),
+                flush_interval=settings.persistence.flush_interval,
+                batch_size=settings.persistence.batch_size,
+            )
+
+    with timer.phase("init: bot"):
+        updater = Updater(
+            bot=Bot(settings.chatbot_telegram.api_token),
+            persistence=persistence,  # type: ignore
+        )
+
+    with timer.phase("init: jobs"):
+        jobs = None
+        if settings.jobs.enabled:
+            from handlers.message.places import PlaceCreateJob
+            from persistence.jobs import SQLiteJobQueue
+            from runtime.jobs import JobWorkerPool
+
+            # места создаются в фоне; задания, сохраненные до перезапуска, выполняются сразу
+            jobs = JobWorkerPool(
+                SQLiteJobQueue(
+                    settings.jobs.path, lease_timeout=settings.jobs.lease_timeout
+                ),
+                workers=settings.jobs.workers,
+                max_attempts=settings.jobs.max_attempts,
+                backoff_base=settings.jobs.backoff_base,
+                backoff_max=settings.jobs.backoff_max,
+                poll_interval=settings.jobs.poll_interval,
+            )
+            jobs.register(
+                PlaceCreateJob.KIND,
+                PlaceCreateJob(updater.bot, runner),  # type: ignore
+            )
+            jobs.start()
+
+    recorder = None
+    if settings.recording.enabled:
+        with timer.phase("init: recording"):
+            from runtime.recording import UpdateRecorder
+
+            # у каждого процесса-обработчика свой файл записи
+            path = Path(settings.recording.path)
+            if settings.sharding.workers > 1:
+                path = path.with_name(f"{path.stem}.{worker}{path.suffix}")
+            recorder = UpdateRecorder(
+                str(path),
+                max_bytes=settings.recording.max_bytes,
+                backup_count=settings.recording.backup_count,
+                salt=settings.recording.salt,
+                keep_texts=ChatBotTelegram.KEYBOARD_COMMANDS.values(),
+            )
+
+    with timer.phase("init: handlers"):
+        from runtime.state import StateBudget
+
+        # данные неактивных пользователей и чатов вытесняются из памяти
+        state = StateBudget(
+            updater.dispatcher,  # type: ignore
+            max_bytes=settings.state.max_bytes,
+            idle_ttl=settings.state.idle_ttl,
+        )
+        bot = ChatBotTelegram(
+            updater, runner=runner, jobs=jobs, recorder=recorder, state=state
+        )
+        setup_handlers(bot)
+
+    if settings.metrics.enabled:
+        with timer.phase("init: metrics"):
+            from metrics.collectors import register_collectors
+            from metrics.registry import registry
+            from metrics.server import MetricsServer
+
+            # публикация метрик для Prometheus (у каждого процесса – свой порт)
+            register_collectors(updater.dispatcher, runner, jobs, state)  # type: ignore
+            MetricsServer(
+                registry,
+                listen=settings.metrics.listen,
+                port=settings.metrics.port + worker,
+            ).start()
+
+    logging.debug("Application is created in %.1f ms", timer.total * 1000)
+
+    return bot
+
+
+def measure_startup(timer: StartupTimer) -> None:
+    """
+    Создание приложения без получения обновлений и вывод длительности этапов запуска.
+
+    :param timer: Объект для измерения длительности этапов запуска.
+    :return:
+    """
+
+    bot = create_app(timer=timer)
+    # модули обработчиков загружаются при первом обновлении, их импорт измеряется отдельно
+    with timer.phase("import: handlers"):
+        for module in HANDLER_MODULES:
+            importlib.import_module(module)
+    bot.shutdown()
+
+    print(timer.report())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Запуск чат-бота.
+
+    :param argv: Аргументы командной строки.
+    :return:
+    """
+
+    parser = argparse.ArgumentParser(description="Favorite places Telegram chatbot.")
+    parser.add_argument(
+        "--measure-startup",
+        action="store_true",
+        help="report import and initialization time per phase and exit",
+    )
+    args = parser.parse_args(argv)
+
+    timer = StartupTimer()
+    with timer.phase("import: settings"):
+        from settings import settings
+
+    with timer.phase("init: logging"):
+        from runtime.logs import setup_logging, stop_logging
+
+        setup_logging(settings.logging, debug=settings.debug)
+
+    try:
+        if args.measure_startup:
+            measure_startup(timer)
+            return
+
+        webhook = settings.webhook if settings.webhook.enabled else None
+        if settings.sharding.workers > 1:
+            from telegram import Bot
+
+            from runtime.sharding import ShardRouter
+
+            # распределение обновлений по процессам-обработчикам
+            ShardRouter(
+                create_app,
+                workers=settings.sharding.workers,
+                queue_size=settings.sharding.queue_size,
+            ).run(Bot(settings.chatbot_telegram.api_token), webhook=webhook)
+        else:
+            # запуск взаимодействия с чат-ботом (через вебхук или long polling)
+            create_app(timer=timer).start(webhook=webhook)
+    finally:
+        stop_logging()
+
+
+if __name__ == "__main__":
+    main()
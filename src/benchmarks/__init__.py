@@ -0,0 +1,3 @@
+"""
+Нагрузочное тестирование обработчиков чат-бота без внешних сервисов.
+"""
@@ -0,0 +1,62 @@
+"""
+Нагрузочное тестирование обработчиков чат-бота.
+
+Пример запуска (из директории `src`)::
+
+    python -m benchmarks --iterations 500 --concurrency 16 --gateway-latency 0.01
+"""
+import argparse
+import logging
+
+from benchmarks.runner import BenchmarkResult, BenchmarkRunner
+
+# сценарии нагрузочного тестирования
+SCENARIOS = {
+    "/places": "scenario_places",
+    "place:<id>": "scenario_place",
+    "place.delete:<id>": "scenario_delete",
+    "/add": "scenario_add",
+    "nearby": "scenario_nearby",
+    "inline": "scenario_inline",
+}
+
+
+def main() -> None:
+    """
+    Запуск нагрузочного тестирования и вывод отчета.
+
+    :return:
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark chatbot handlers.")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--gateway-latency", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--places-per-user", type=int, default=20)
+    parser.add_argument("--async-mode", action="store_true")
+    parser.add_argument(
+        "--scenario", action="append", choices=list(SCENARIOS), dest="scenarios"
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    runner = BenchmarkRunner(
+        gateway_latency=args.gateway_latency,
+        telegram_latency=args.telegram_latency,
+        places_per_user=args.places_per_user,
+        concurrency=args.concurrency,
+        async_mode=args.async_mode,
+    )
+    try:
+        print(BenchmarkResult.header())
+        for name in args.scenarios or SCENARIOS:
+            scenario = getattr(runner, SCENARIOS[name])
+            print(runner.run(name, scenario, args.iterations).row(), flush=True)
+        print(f"gateway requests: {runner.gateway.requests}")
+    finally:
+        runner.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Сравнение способов формирования списка мест из ответа GraphQL-шлюза.
+
+Пример запуска (из директории `src`)::
+
+    python -m benchmarks.decode --places 50000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable
+
+# способ формирования списка мест: функция, принимающая данные мест из ответа шлюза
+Decoder = Callable[[list[dict]], Any]
+
+
+def generate_items(count: int) -> list[dict]:
+    """
+    Формирование данных мест в виде, в котором их возвращает шлюз.
+
+    :param count: Количество мест.
+    :return:
+    """
+
+    return [
+        {
+            "id": index,
+            "latitude": 55.75 + index % 1000 / 10000,
+            "longitude": 37.61 + index // 1000 / 10000,
+            "description": f"Place {index}",
+            "city": "Moscow",
+            "locality": f"Street {index % 100}",
+        }
+        for index in range(count)
+    ]
+
+
+def measure(decoder: Decoder, items: list[dict], repeat: int) -> tuple[float, int]:
+    """
+    Измерение времени формирования списка и занимаемой им памяти.
+
+    :param decoder: Способ формирования списка мест.
+    :param items: Данные мест.
+    :param repeat: Количество повторов (для времени берется медиана).
+    :return: Время (в секундах) и размер памяти (в байтах).
+    """
+
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decoder(items)
+        durations.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        result = decoder(items)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return statistics.median(durations), size
+
+
+def main() -> None:
+    """
+    Запуск сравнения и вывод отчета.
+
+    :return:
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark place list decoding.")
+    parser.add_argument("--places", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # настройки читаются при импорте модулей клиента
+    os.environ.setdefault("CHATBOT_TELEGRAM__API_TOKEN", "123456:benchmark")
+    os.environ.setdefault("PROJECT__RELEASE_VERSION", "bench")
+
+    # pylint: disable=import-outside-toplevel
+    from clients.gateway import build_place, build_places
+
+    decoders: dict[str, Decoder] = {
+        "PlaceDTO (validated)": lambda items: [
+            build_place(item, validate=True) for item in items
+        ],
+        "PlaceDTO (trusted)": lambda items: [build_place(item) for item in items],
+        "PlaceBatch (validated)": lambda items: build_places(items, validate=True),
+        "PlaceBatch (trusted)": build_places,
+    }
+
+    items = generate_items(args.places)
+    print(f"{'mode':<26}{'ms':>10}{'places/s':>14}{'memory KiB':>14}")
+    for name, decoder in decoders.items():
+        duration, size = measure(decoder, items, args.repeat)
+        print(
+            f"{name:<26}{duration * 1000:>10.1f}"
+            f"{args.places / duration:>14.0f}{size / 1024:>14.0f}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Замена GraphQL-шлюза для нагрузочного тестирования.
+
+Сервер выполняет запросы по схеме `clients/schema.graphql` над данными в памяти.
+"""
+import base64
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+from graphql import GraphQLSchema, build_schema, graphql_sync
+
+# схема GraphQL-шлюза, используемая чат-ботом
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "clients" / "schema.graphql"
+
+
+class PlaceStore:
+    """
+    Хранилище мест в памяти.
+    """
+
+    def __init__(self) -> None:
+        """
+        Конструктор.
+        """
+
+        self.places: dict[int, dict[str, Any]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        latitude: float,
+        longitude: float,
+        description: str,
+        user_id: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Добавление места.
+
+        :param latitude: Широта.
+        :param longitude: Долгота.
+        :param description: Описание.
+        :param user_id: Идентификатор владельца.
+        :return:
+        """
+
+        with self._lock:
+            place = {
+                "id": self._next_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "description": description,
+                "city": f"City {self._next_id % 100}",
+                "locality": f"Locality {self._next_id}",
+                "user_id": str(user_id) if user_id is not None else None,
+            }
+            self.places[self._next_id] = place
+            self._next_id += 1
+
+            return place
+
+    def delete(self, place_id: int) -> bool:
+        """
+        Удаление места.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        with self._lock:
+            return self.places.pop(int(place_id), None) is not None
+
+    def get(self, place_id: Any) -> Optional[dict[str, Any]]:
+        """
+        Получение места.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        return self.places.get(int(place_id))
+
+    def connection(
+        self, first: int, after: Optional[str] = None, user_id: Optional[str] = None
+    ) -> dict[str, Any]:
+        """
+        Получение страницы списка мест (connection).
+
+        :param first: Количество мест на странице.
+        :param after: Курсор, после которого начинается страница.
+        :param user_id: Идентификатор владельца мест.
+        :return:
+        """
+
+        with self._lock:
+            places = [
+                place
+                for place in self.places.values()
+                if user_id is None or place["user_id"] == str(user_id)
+            ]
+        start = int(base64.b64decode(after)) + 1 if after else 0
+        end = start + first
+        edges = [
+            {"cursor": base64.b64encode(str(index).encode()).decode(), "node": place}
+            for index, place in enumerate(places[start:end], start)
+        ]
+
+        return {
+            "edges": edges,
+            "pageInfo": {
+                "endCursor": edges[-1]["cursor"] if edges else None,
+                "hasNextPage": start + first < len(places),
+            },
+        }
+
+
+class StandInGateway(ThreadingHTTPServer):
+    """
+    HTTP-сервер, заменяющий GraphQL-шлюз.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        """
+        Конструктор.
+
+        :param latency: Искусственная задержка ответа (в секундах).
+        :param port: Порт сервера (0 – любой свободный).
+        """
+
+        super().__init__(("127.0.0.1", port), GatewayRequestHandler)
+
+        self.latency = latency
+        self.store = PlaceStore()
+        self.schema: GraphQLSchema = build_schema(SCHEMA_PATH.read_text("utf-8"))
+        self.persisted: dict[str, str] = {}
+        #: количество обработанных запросов
+        self.requests = 0
+        self.root = {
+            "place": lambda info, placeId: self.store.get(placeId),
+            "places": lambda info: list(self.store.places.values()),
+            "placesConnection": lambda info, first, after=None, userId=None: (
+                self.store.connection(first, after, userId)
+            ),
+            "createPlace": lambda info, latitude, longitude, description, userId=None: {
+                "result": True,
+                "place": self.store.add(latitude, longitude, description, userId),
+            },
+            "deletePlace": lambda info, placeId: {"result": self.store.delete(placeId)},
+        }
+
+    @property
+    def url(self) -> str:
+        """
+        Адрес GraphQL-эндпоинта.
+
+        :return:
+        """
+
+        return f"http://127.0.0.1:{self.server_port}/graphql"
+
+    def start(self) -> "StandInGateway":
+        """
+        Запуск сервера в отдельном потоке.
+
+        :return:
+        """
+
+        threading.Thread(target=self.serve_forever, name="gateway", daemon=True).start()
+
+        return self
+
+    def execute(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """
+        Выполнение GraphQL-запроса (с поддержкой APQ).
+
+        :param payload: Тело запроса.
+        :return:
+        """
+
+        self.requests += 1
+        query = payload.get("query")
+        persisted = (payload.get("extensions") or {}).get("persistedQuery") or {}
+        if query_hash := persisted.get("sha256Hash"):
+            if query is None:
+                if query_hash not in self.persisted:
+                    return {"errors": [{"message": "PersistedQueryNotFound"}]}
+                query = self.persisted[query_hash]
+            else:
+                self.persisted[query_hash] = query
+
+        result = graphql_sync(
+            self.schema,
+            query or "",
+            root_value=self.root,
+            variable_values=payload.get("variables"),
+            operation_name=payload.get("operationName"),
+        )
+        response: dict[str, Any] = {"data": result.data}
+        if result.errors:
+            response["errors"] = [error.formatted for error in result.errors]
+
+        return response
+
+
+class GatewayRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов к замене GraphQL-шлюза.
+    """
+
+    server: StandInGateway
+    protocol_version = "HTTP/1.1"
+    # заголовки и тело ответа записываются отдельно; без TCP_NODELAY на соединении
+    # keep-alive каждый ответ задерживается алгоритмом Нейгла до подтверждения клиента
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        Выполнение GraphQL-запроса.
+
+        :return:
+        """
+
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = json.dumps(self.server.execute(payload)).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        pass
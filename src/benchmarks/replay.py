@@ -0,0 +1,404 @@
+"""
+Воспроизведение записанных обновлений (см. `runtime.recording`) с ускорением времени.
+
+Обновления передаются полному набору обработчиков `ChatBotTelegram`
+с заменами GraphQL-шлюза и API Telegram в тех же интервалах, что и при записи,
+деленных на `--speed`. Во время воспроизведения периодически выводятся
+пропускная способность, задержки ответов, потребление памяти и количество потоков,
+что позволяет проводить длительные испытания и замечать утечки.
+
+Пример запуска (из директории `src`)::
+
+    python -m benchmarks.replay data/updates.jsonl.1 data/updates.jsonl --speed 10
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Any, Iterator, Optional, Sequence
+
+from benchmarks.runner import BenchmarkRunner, percentile
+
+# размер страницы памяти (для чтения `/proc/self/statm`)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def resident_memory() -> int:
+    """
+    Объем резидентной памяти процесса (в байтах).
+
+    Вне Linux возвращается пиковый объем памяти.
+
+    :return:
+    """
+
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        import resource  # pylint: disable=import-outside-toplevel
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def read_recording(paths: Sequence[str]) -> Iterator[tuple[float, dict[str, Any]]]:
+    """
+    Чтение записанных обновлений (файлы читаются построчно в переданном порядке).
+
+    :param paths: Пути к файлам записи (предыдущие файлы ротации – первыми).
+    :return: Время получения и данные обновления.
+    """
+
+    for path in paths:
+        with open(path, encoding="utf-8") as recording:
+            for line in recording:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield entry["time"], entry["update"]
+
+
+def reply_key(data: dict[str, Any]) -> Optional[str]:
+    """
+    Ключ ответа чат-бота на обновление (см. `FakeTelegramApi`).
+
+    :param data: Данные обновления.
+    :return: Ключ или `None`, если ответ на обновление не ожидается.
+    """
+
+    if message := data.get("message"):
+        return str(message["chat"]["id"])
+    if query := data.get("callback_query") or data.get("inline_query"):
+        return str(query["id"])
+
+    return None
+
+
+def sender_id(data: dict[str, Any]) -> Optional[int]:
+    """
+    Идентификатор пользователя, отправившего обновление.
+
+    :param data: Данные обновления.
+    :return:
+    """
+
+    for kind in ("message", "callback_query", "inline_query"):
+        if (item := data.get(kind)) and (user := item.get("from")):
+            return user["id"]
+
+    return None
+
+
+class ReplayStats:
+    """
+    Счетчики и задержки ответов за весь прогон и за текущий интервал отчета.
+    """
+
+    def __init__(self, timeout: float):
+        """
+        Конструктор.
+
+        :param timeout: Время, после которого обновление без ответа считается потерянным
+            (в секундах).
+        """
+
+        self.timeout = timeout
+        #: количество переданных обновлений, полученных ответов и обновлений без ответа
+        self.fed = 0
+        self.answered = 0
+        self.timed_out = 0
+        #: задержки ответов за весь прогон (компактный массив, чтобы память испытательного
+        #: стенда не искажала потребление памяти чат-бота) и за текущий интервал (в секундах)
+        self.latencies = array("d")
+        self.window: list[float] = []
+        self._pending: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def expect(self, key: Optional[str]) -> None:
+        """
+        Учет переданного обновления.
+
+        :param key: Ключ ожидаемого ответа.
+        :return:
+        """
+
+        with self._lock:
+            self.fed += 1
+            if key is not None:
+                self._pending.setdefault(key, deque()).append(time.perf_counter())
+
+    def reply(self, key: str) -> None:
+        """
+        Учет ответа чат-бота (первый ответ по ключу относится к самому раннему обновлению).
+
+        :param key: Ключ ответа.
+        :return:
+        """
+
+        now = time.perf_counter()
+        with self._lock:
+            if (pending := self._pending.get(key)) is None:
+                return
+            latency = now - pending.popleft()
+            if not pending:
+                del self._pending[key]
+            self.answered += 1
+            self.latencies.append(latency)
+            self.window.append(latency)
+
+    def pending(self) -> int:
+        """
+        Количество обновлений, ожидающих ответа.
+
+        :return:
+        """
+
+        with self._lock:
+            return sum(len(pending) for pending in self._pending.values())
+
+    def expire(self) -> None:
+        """
+        Учет обновлений, ответ на которые не получен за `timeout` секунд.
+
+        :return:
+        """
+
+        deadline = time.perf_counter() - self.timeout
+        with self._lock:
+            for key in list(self._pending):
+                pending = self._pending[key]
+                while pending and pending[0] < deadline:
+                    pending.popleft()
+                    self.timed_out += 1
+                if not pending:
+                    del self._pending[key]
+
+    def take_window(self) -> list[float]:
+        """
+        Получение задержек за текущий интервал и начало нового интервала.
+
+        :return:
+        """
+
+        with self._lock:
+            window, self.window = self.window, []
+
+        return sorted(window)
+
+
+class Sampler(threading.Thread):
+    """
+    Периодический вывод показателей воспроизведения.
+    """
+
+    HEADER = (
+        f"{'time s':>8}{'fed':>9}{'answered':>10}{'pending':>9}{'updates/s':>11}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rss MB':>9}{'threads':>9}"
+    )
+
+    def __init__(self, stats: ReplayStats, interval: float):
+        """
+        Конструктор.
+
+        :param stats: Показатели воспроизведения.
+        :param interval: Интервал вывода (в секундах).
+        """
+
+        super().__init__(name="replay-sampler", daemon=True)
+        self.stats = stats
+        self.interval = interval
+        self.started = self.sampled = time.perf_counter()
+        #: объем памяти (в байтах) и количество потоков в каждом интервале
+        self.memory: list[int] = []
+        self.threads: list[int] = []
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        print(self.HEADER, flush=True)
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        """
+        Остановка вывода (с выводом последнего интервала).
+
+        :return:
+        """
+
+        self._stopped.set()
+        self.join()
+        self.sample()
+
+    def sample(self) -> None:
+        """
+        Вывод показателей за прошедший интервал.
+
+        :return:
+        """
+
+        self.stats.expire()
+        window = self.stats.take_window()
+        now = time.perf_counter()
+        elapsed, self.sampled = now - self.sampled, now
+        memory = resident_memory()
+        threads = threading.active_count()
+        self.memory.append(memory)
+        self.threads.append(threads)
+        print(
+            f"{now - self.started:>8.1f}"
+            f"{self.stats.fed:>9}{self.stats.answered:>10}{self.stats.pending():>9}"
+            f"{len(window) / max(elapsed, 1e-9):>11.1f}"
+            f"{percentile(window, 50) * 1000:>9.1f}"
+            f"{percentile(window, 95) * 1000:>9.1f}"
+            f"{percentile(window, 99) * 1000:>9.1f}"
+            f"{memory / 2 ** 20:>9.1f}{threads:>9}",
+            flush=True,
+        )
+
+
+class UpdateReplayer:
+    """
+    Передача записанных обновлений чат-боту по расписанию записи.
+    """
+
+    def __init__(self, runner: BenchmarkRunner, stats: ReplayStats, speed: float):
+        """
+        Конструктор.
+
+        :param runner: Чат-бот с заменами внешних сервисов.
+        :param stats: Показатели воспроизведения.
+        :param speed: Ускорение времени (1 – в реальном времени).
+        """
+
+        self.runner = runner
+        self.stats = stats
+        self.speed = speed
+        self._update_ids = itertools.count(1)
+        self._users: set[int] = set()
+        runner.telegram.track_replies = False
+        runner.telegram.listeners.append(stats.reply)
+
+    def replay(self, paths: Sequence[str], places_per_user: int, round_: int) -> None:
+        """
+        Воспроизведение записи.
+
+        :param paths: Пути к файлам записи.
+        :param places_per_user: Количество мест, создаваемых для каждого нового пользователя.
+        :param round_: Номер повтора записи (делает идентификаторы запросов уникальными).
+        :return:
+        """
+
+        started = time.perf_counter()
+        first: Optional[float] = None
+        for recorded, data in read_recording(paths):
+            if first is None:
+                first = recorded
+            if (
+                delay := started + (recorded - first) / self.speed - time.perf_counter()
+            ) > 0:
+                time.sleep(delay)
+
+            self.prepare(data, places_per_user, round_)
+            self.stats.expect(reply_key(data))
+            self.runner.feed(data)
+
+    def prepare(self, data: dict[str, Any], places_per_user: int, round_: int) -> None:
+        """
+        Подготовка обновления к передаче: уникальные идентификаторы обновления
+        и запросов, места нового пользователя в замене шлюза.
+
+        :param data: Данные обновления.
+        :param places_per_user: Количество мест, создаваемых для нового пользователя.
+        :param round_: Номер повтора записи.
+        :return:
+        """
+
+        data["update_id"] = next(self._update_ids)
+        for kind in ("callback_query", "inline_query"):
+            if query := data.get(kind):
+                query["id"] = f"{query['id']}.{round_}"
+
+        user_id = sender_id(data)
+        if user_id is not None and user_id not in self._users:
+            self._users.add(user_id)
+            for index in range(places_per_user):
+                self.runner.gateway.store.add(
+                    55.75 + index / 1000, 37.61, f"Place {index}", str(user_id)
+                )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Воспроизведение записи и вывод отчета.
+
+    :param argv: Аргументы командной строки.
+    :return:
+    """
+
+    parser = argparse.ArgumentParser(description="Replay recorded chatbot updates.")
+    parser.add_argument("paths", nargs="+", help="recording files, oldest first")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--gateway-latency", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--places-per-user", type=int, default=20)
+    parser.add_argument("--async-mode", action="store_true")
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    logging.disable(logging.WARNING)
+    runner = BenchmarkRunner(
+        gateway_latency=args.gateway_latency,
+        telegram_latency=args.telegram_latency,
+        places_per_user=0,
+        concurrency=args.concurrency,
+        async_mode=args.async_mode,
+    )
+    stats = ReplayStats(args.timeout)
+    replayer = UpdateReplayer(runner, stats, args.speed)
+    sampler = Sampler(stats, args.interval)
+    memory, threads = resident_memory(), threading.active_count()
+    try:
+        sampler.start()
+        started = time.perf_counter()
+        for round_ in range(args.rounds):
+            replayer.replay(args.paths, args.places_per_user, round_)
+        # ожидание ответов на последние обновления
+        deadline = time.monotonic() + args.timeout
+        while stats.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+    finally:
+        runner.close()
+
+    latencies = sorted(stats.latencies)
+    print(
+        f"\nupdates: {stats.fed}, answered: {stats.answered}, "
+        f"timed out: {stats.timed_out + stats.pending()}, "
+        f"elapsed: {elapsed:.1f} s, sustained: {stats.answered / elapsed:.1f} updates/s"
+    )
+    print(
+        f"latency ms: p50 {percentile(latencies, 50) * 1000:.1f}, "
+        f"p95 {percentile(latencies, 95) * 1000:.1f}, "
+        f"p99 {percentile(latencies, 99) * 1000:.1f}"
+    )
+    print(
+        f"rss MB: start {memory / 2 ** 20:.1f}, end {sampler.memory[-1] / 2 ** 20:.1f}, "
+        f"peak {max(sampler.memory) / 2 ** 20:.1f}; "
+        f"threads: start {threads}, end {sampler.threads[-1]}, "
+        f"peak {max(sampler.threads)}"
+    )
+    print(f"gateway requests: {runner.gateway.requests}")
+
+
+if __name__ == "__main__":
+    main()
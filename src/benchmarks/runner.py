@@ -0,0 +1,474 @@
+"""
+Запуск сценариев нагрузочного тестирования обработчиков чат-бота.
+"""
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from benchmarks.gateway import StandInGateway
+from benchmarks.telegram import FakeTelegramApi
+from menu.callbacks import encode
+
+# токен чат-бота для замены API Telegram
+BENCH_TOKEN = "123456:benchmark"
+# количество пользователей с местами
+USERS_COUNT = 100
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """
+    Вычисление перцентиля (методом ближайшего ранга).
+
+    :param values: Отсортированные значения.
+    :param percent: Перцентиль (0–100).
+    :return:
+    """
+
+    if not values:
+        return 0.0
+
+    index = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+
+    return values[index]
+
+
+class BenchmarkResult:
+    """
+    Результат выполнения сценария.
+    """
+
+    def __init__(self, name: str, updates: int, elapsed: float, latencies: list[float]):
+        """
+        Конструктор.
+
+        :param name: Название сценария.
+        :param updates: Количество обработанных обновлений.
+        :param elapsed: Продолжительность выполнения (в секундах).
+        :param latencies: Задержки выполнения итераций сценария (в секундах).
+        """
+
+        self.name = name
+        self.updates = updates
+        self.elapsed = elapsed
+        self.latencies = sorted(latencies)
+
+    @property
+    def throughput(self) -> float:
+        """
+        Количество обработанных обновлений в секунду.
+
+        :return:
+        """
+
+        return self.updates / self.elapsed if self.elapsed else 0.0
+
+    def row(self) -> str:
+        """
+        Строка отчета.
+
+        :return:
+        """
+
+        p50, p95, p99 = (
+            percentile(self.latencies, percent) * 1000 for percent in (50, 95, 99)
+        )
+
+        return (
+            f"{self.name:<22}{self.updates:>9}{self.throughput:>12.1f}"
+            f"{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}"
+        )
+
+    @staticmethod
+    def header() -> str:
+        """
+        Заголовок отчета.
+
+        :return:
+        """
+
+        return (
+            f"{'scenario':<22}{'updates':>9}{'updates/s':>12}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+
+
+class BenchmarkRunner:
+    """
+    Выполнение сценариев через полный набор обработчиков `ChatBotTelegram`
+    с заменами GraphQL-шлюза и API Telegram.
+    """
+
+    def __init__(
+        self,
+        gateway_latency: float = 0.0,
+        telegram_latency: float = 0.0,
+        places_per_user: int = 20,
+        concurrency: int = 8,
+        async_mode: bool = False,
+    ):
+        """
+        Конструктор.
+
+        :param gateway_latency: Задержка ответа GraphQL-шлюза (в секундах).
+        :param telegram_latency: Задержка ответа API Telegram (в секундах).
+        :param places_per_user: Количество мест у каждого пользователя.
+        :param concurrency: Количество одновременно работающих пользователей.
+        :param async_mode: Обрабатывать обновления в цикле событий asyncio.
+        """
+
+        self.concurrency = concurrency
+        self.gateway = StandInGateway(latency=gateway_latency).start()
+        self.telegram = FakeTelegramApi(latency=telegram_latency).start()
+        for user_id in range(1, USERS_COUNT + 1):
+            for index in range(places_per_user):
+                self.gateway.store.add(
+                    55.75 + index / 1000, 37.61, f"Place {index}", str(user_id)
+                )
+
+        self._update_ids = itertools.count(1)
+        self._chat_ids = itertools.count(1_000_000)
+        self._lock = threading.Lock()
+        self.bot = self.__create_bot(async_mode)
+
+    def __create_bot(self, async_mode: bool) -> Any:
+        """
+        Создание чат-бота, подключенного к заменам внешних сервисов.
+
+        Модули чат-бота импортируются после настройки окружения,
+        так как настройки читаются при импорте.
+
+        :param async_mode: Обрабатывать обновления в цикле событий asyncio.
+        :return:
+        """
+
+        os.environ["GATEWAY_URL"] = self.gateway.url
+        os.environ["CHATBOT_TELEGRAM__API_TOKEN"] = BENCH_TOKEN
+        os.environ["ASYNC_MODE__ENABLED"] = str(async_mode)
+        os.environ.setdefault("PROJECT__RELEASE_VERSION", "bench")
+        # ограничения частоты API Telegram не относятся к замене API
+        for name in ("GLOBAL_RATE", "CHAT_RATE", "GROUP_RATE"):
+            os.environ.setdefault(f"OUTBOUND__{name}", "1000000")
+
+        # pylint: disable=import-outside-toplevel
+        from telegram import Bot
+        from telegram.ext import Updater
+        from telegram.utils.request import Request
+
+        from chatbot import ChatBotTelegram, setup_handlers
+        from runtime.aio import AsyncioRunner
+        from runtime.state import StateBudget
+        from settings import settings
+
+        runner = None
+        if settings.async_mode.enabled:
+            runner = AsyncioRunner(max_in_flight=settings.async_mode.max_in_flight)
+            runner.start()
+
+        bot = Bot(
+            BENCH_TOKEN,
+            base_url=self.telegram.base_url,
+            request=Request(con_pool_size=self.concurrency + 8),
+        )
+        updater = Updater(bot=bot)
+        state = StateBudget(
+            updater.dispatcher,  # type: ignore
+            max_bytes=settings.state.max_bytes,
+            idle_ttl=settings.state.idle_ttl,
+        )
+        chatbot = ChatBotTelegram(updater, runner=runner, state=state)
+        setup_handlers(chatbot)
+        dispatcher = updater.dispatcher  # type: ignore
+        threading.Thread(
+            target=dispatcher.start, name="dispatcher", daemon=True
+        ).start()
+
+        return chatbot
+
+    def close(self) -> None:
+        """
+        Остановка чат-бота и замен внешних сервисов.
+
+        :return:
+        """
+
+        # pylint: disable=import-outside-toplevel
+        from clients.gateway_async import async_gateway_client
+
+        self.bot.updater.dispatcher.stop()
+        if self.bot.runner:
+            self.bot.runner.run(async_gateway_client.close())
+            self.bot.runner.stop()
+        self.gateway.shutdown()
+        self.telegram.shutdown()
+
+    def feed(self, data: dict[str, Any]) -> None:
+        """
+        Передача обновления диспетчеру чат-бота.
+
+        :param data: Данные обновления (JSON).
+        :return:
+        """
+
+        # pylint: disable=import-outside-toplevel
+        from telegram import Update
+
+        dispatcher = self.bot.updater.dispatcher
+        dispatcher.update_queue.put(Update.de_json(data, dispatcher.bot))
+
+    def send_message(
+        self,
+        chat_id: int,
+        text: Optional[str] = None,
+        location: Optional[tuple[float, float]] = None,
+    ) -> float:
+        """
+        Отправка сообщения чат-боту с ожиданием ответа.
+
+        :param chat_id: Идентификатор чата (и пользователя).
+        :param text: Текст сообщения.
+        :param location: Координаты (широта, долгота).
+        :return: Время ожидания ответа (в секундах).
+        """
+
+        key = str(chat_id)
+        expected = self.telegram.replies(key) + 1
+        started = time.perf_counter()
+        self.feed(message_update(next(self._update_ids), chat_id, text, location))
+        if not self.telegram.wait(key, expected):
+            raise TimeoutError(f"No reply to message {text!r} in chat {chat_id}.")
+
+        return time.perf_counter() - started
+
+    def send_inline(self, user_id: int, query: str) -> float:
+        """
+        Отправка inline-запроса чат-боту с ожиданием ответа.
+
+        :param user_id: Идентификатор пользователя.
+        :param query: Текст запроса.
+        :return: Время ожидания ответа (в секундах).
+        """
+
+        update_id = next(self._update_ids)
+        query_id = f"inline-{user_id}-{update_id}"
+        started = time.perf_counter()
+        self.feed(inline_update(update_id, user_id, query_id, query))
+        if not self.telegram.wait(query_id, 1):
+            raise TimeoutError(f"No answer to inline query {query!r}.")
+
+        return time.perf_counter() - started
+
+    def send_callback(self, chat_id: int, data: str) -> float:
+        """
+        Отправка обратного вызова чат-боту с ожиданием ответа.
+
+        :param chat_id: Идентификатор чата (и пользователя).
+        :param data: Данные обратного вызова.
+        :return: Время ожидания ответа (в секундах).
+        """
+
+        update_id = next(self._update_ids)
+        query_id = f"{chat_id}-{update_id}"
+        started = time.perf_counter()
+        self.feed(callback_update(update_id, chat_id, query_id, data))
+        if not self.telegram.wait(query_id, 1):
+            raise TimeoutError(f"No answer to callback {data!r} in chat {chat_id}.")
+
+        return time.perf_counter() - started
+
+    def scenario_places(self) -> tuple[int, float]:
+        """
+        Сценарий: команда `/places`.
+
+        :return: Количество обновлений и время выполнения.
+        """
+
+        return 1, self.send_message(random.randint(1, USERS_COUNT), "/places")
+
+    def scenario_place(self) -> tuple[int, float]:
+        """
+        Сценарий: просмотр места (`place:<id>`).
+
+        :return: Количество обновлений и время выполнения.
+        """
+
+        place_id = random.choice(list(self.gateway.store.places))
+
+        return 1, self.send_callback(
+            random.randint(1, USERS_COUNT), encode("place", place_id)
+        )
+
+    def scenario_delete(self) -> tuple[int, float]:
+        """
+        Сценарий: удаление места (`place.delete:<id>`).
+
+        :return: Количество обновлений и время выполнения.
+        """
+
+        user_id = random.randint(1, USERS_COUNT)
+        place = self.gateway.store.add(55.75, 37.61, "Place to delete", str(user_id))
+
+        return 1, self.send_callback(user_id, encode("place.delete", place["id"]))
+
+    def scenario_add(self) -> tuple[int, float]:
+        """
+        Сценарий: полный диалог добавления места (`/add`, местоположение, описание).
+
+        :return: Количество обновлений и время выполнения.
+        """
+
+        with self._lock:
+            chat_id = next(self._chat_ids)
+
+        elapsed = self.send_message(chat_id, "/add")
+        elapsed += self.send_message(chat_id, location=(55.75, 37.61))
+        elapsed += self.send_message(chat_id, "Benchmark place")
+
+        return 3, elapsed
+
+    def scenario_nearby(self) -> tuple[int, float]:
+        """
+        Сценарий: поиск мест рядом с отправленным местоположением.
+
+        :return: Количество обновлений и время выполнения.
+        """
+
+        location = (
+            55.75 + random.uniform(-0.05, 0.05),
+            37.61 + random.uniform(-0.05, 0.05),
+        )
+
+        return 1, self.send_message(random.randint(1, USERS_COUNT), location=location)
+
+    def scenario_inline(self) -> tuple[int, float]:
+        """
+        Сценарий: поиск мест inline-запросом по началу слов.
+
+        :return: Количество обновлений и время выполнения.
+        """
+
+        query = random.choice(
+            [
+                "pl",
+                f"place {random.randint(0, 9)}",
+                f"city {random.randint(0, 99)}",
+                f"loc {random.randint(1, 999)}",
+            ]
+        )
+
+        return 1, self.send_inline(random.randint(1, USERS_COUNT), query)
+
+    def run(
+        self, name: str, scenario: Callable[[], tuple[int, float]], iterations: int
+    ) -> BenchmarkResult:
+        """
+        Выполнение сценария.
+
+        :param name: Название сценария.
+        :param scenario: Функция сценария.
+        :param iterations: Количество итераций.
+        :return:
+        """
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            results = list(executor.map(lambda _: scenario(), range(iterations)))
+        elapsed = time.perf_counter() - started
+
+        return BenchmarkResult(
+            name,
+            updates=sum(updates for updates, _ in results),
+            elapsed=elapsed,
+            latencies=[latency for _, latency in results],
+        )
+
+
+def message_update(
+    update_id: int,
+    chat_id: int,
+    text: Optional[str] = None,
+    location: Optional[tuple[float, float]] = None,
+) -> dict[str, Any]:
+    """
+    Формирование обновления с сообщением пользователя.
+
+    :param update_id: Идентификатор обновления.
+    :param chat_id: Идентификатор чата (и пользователя).
+    :param text: Текст сообщения.
+    :param location: Координаты (широта, долгота).
+    :return:
+    """
+
+    message: dict[str, Any] = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private", "first_name": "Bench"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+    }
+    if text is not None:
+        message["text"] = text
+        if text.startswith("/"):
+            message["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(text.split()[0])}
+            ]
+    if location is not None:
+        message["location"] = {"latitude": location[0], "longitude": location[1]}
+
+    return {"update_id": update_id, "message": message}
+
+
+def callback_update(
+    update_id: int, chat_id: int, query_id: str, data: str
+) -> dict[str, Any]:
+    """
+    Формирование обновления с обратным вызовом от inline-меню.
+
+    :param update_id: Идентификатор обновления.
+    :param chat_id: Идентификатор чата (и пользователя).
+    :param query_id: Идентификатор запроса обратного вызова.
+    :param data: Данные обратного вызова.
+    :return:
+    """
+
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": query_id,
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private", "first_name": "Bench"},
+                "text": "Мои любимые места:",
+            },
+        },
+    }
+
+
+def inline_update(
+    update_id: int, user_id: int, query_id: str, query: str
+) -> dict[str, Any]:
+    """
+    Формирование обновления с inline-запросом.
+
+    :param update_id: Идентификатор обновления.
+    :param user_id: Идентификатор пользователя.
+    :param query_id: Идентификатор inline-запроса.
+    :param query: Текст запроса.
+    :return:
+    """
+
+    return {
+        "update_id": update_id,
+        "inline_query": {
+            "id": query_id,
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+            "query": query,
+            "offset": "",
+        },
+    }
@@ -0,0 +1,186 @@
+"""
+Замена API Telegram для нагрузочного тестирования.
+
+Сервер принимает вызовы методов Bot API и сообщает ожидающим сторонам
+о каждом ответе чат-бота (по идентификатору чата или запроса обратного вызова).
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl
+
+# данные чат-бота, возвращаемые методом `getMe`
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Favorite Places Bot",
+    "username": "favorite_places_bench_bot",
+}
+
+
+class FakeTelegramApi(ThreadingHTTPServer):
+    """
+    HTTP-сервер, заменяющий API Telegram.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        """
+        Конструктор.
+
+        :param latency: Искусственная задержка ответа (в секундах).
+        :param port: Порт сервера (0 – любой свободный).
+        """
+
+        super().__init__(("127.0.0.1", port), TelegramRequestHandler)
+
+        self.latency = latency
+        #: количество вызовов по методам API
+        self.calls: defaultdict[str, int] = defaultdict(int)
+        self._message_id = 0
+        self._lock = threading.Lock()
+        self._conditions: defaultdict[str, threading.Condition] = defaultdict(
+            lambda: threading.Condition(self._lock)
+        )
+        self._replies: defaultdict[str, int] = defaultdict(int)
+        #: функции, вызываемые с ключом каждого ответа чат-бота (вне блокировки)
+        self.listeners: list[Callable[[str], None]] = []
+        #: учитывать ответы по ключам для `replies` и `wait` (при длительном
+        #: воспроизведении счетчики не ведутся, чтобы не расходовать память)
+        self.track_replies = True
+
+    @property
+    def base_url(self) -> str:
+        """
+        Базовый адрес API для объекта `telegram.Bot`.
+
+        :return:
+        """
+
+        return f"http://127.0.0.1:{self.server_port}/bot"
+
+    def start(self) -> "FakeTelegramApi":
+        """
+        Запуск сервера в отдельном потоке.
+
+        :return:
+        """
+
+        threading.Thread(
+            target=self.serve_forever, name="telegram", daemon=True
+        ).start()
+
+        return self
+
+    def replies(self, key: str) -> int:
+        """
+        Количество ответов чат-бота для ключа (идентификатора чата или запроса).
+
+        :param key: Ключ ответа.
+        :return:
+        """
+
+        with self._lock:
+            return self._replies[key]
+
+    def wait(self, key: str, count: int, timeout: float = 30.0) -> bool:
+        """
+        Ожидание заданного количества ответов чат-бота для ключа.
+
+        :param key: Ключ ответа.
+        :param count: Ожидаемое общее количество ответов.
+        :param timeout: Время ожидания (в секундах).
+        :return: Признак получения ответов.
+        """
+
+        with self._lock:
+            return self._conditions[key].wait_for(
+                lambda: self._replies[key] >= count, timeout
+            )
+
+    def call(self, method: str, params: dict[str, Any]) -> Any:
+        """
+        Выполнение метода API.
+
+        :param method: Название метода.
+        :param params: Параметры метода.
+        :return: Результат метода.
+        """
+
+        with self._lock:
+            self.calls[method] += 1
+            self._message_id += 1
+            message_id = self._message_id
+
+        if method == "getMe":
+            return BOT_USER
+
+        result: Any = True
+        key: Optional[str] = None
+        if method in ("sendMessage", "editMessageText", "editMessageReplyMarkup"):
+            chat_id = params.get("chat_id")
+            result = {
+                "message_id": params.get("message_id") or message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+            key = str(chat_id)
+        elif method == "answerCallbackQuery":
+            key = str(params.get("callback_query_id"))
+        elif method == "answerInlineQuery":
+            key = str(params.get("inline_query_id"))
+
+        if key is not None:
+            if self.track_replies:
+                with self._lock:
+                    self._replies[key] += 1
+                    self._conditions[key].notify_all()
+            for listener in self.listeners:
+                listener(key)
+
+        return result
+
+
+class TelegramRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов к замене API Telegram.
+    """
+
+    server: FakeTelegramApi
+    protocol_version = "HTTP/1.1"
+    # заголовки и тело ответа записываются отдельно; без TCP_NODELAY на соединении
+    # keep-alive каждый ответ задерживается алгоритмом Нейгла до подтверждения клиента
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        Выполнение метода API.
+
+        :return:
+        """
+
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if "json" in (self.headers.get("Content-Type") or ""):
+            params = json.loads(body or b"{}")
+        else:
+            params = dict(parse_qsl(body.decode("utf-8")))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        method = self.path.rsplit("/", 1)[-1]
+        response = {"ok": True, "result": self.server.call(method, params)}
+        data = json.dumps(response).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        pass
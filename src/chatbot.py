@@ -2,15 +2,12 @@
 Функции взаимодействия с API Telegram.
 """
 import logging
+import signal
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Coroutine, Optional
 
-from telegram import (
-    Bot,
-    Chat,
-    ParseMode,
-    ReplyKeyboardMarkup,
-    ReplyKeyboardRemove,
-    Update,
-)
+from telegram import Chat, KeyboardButton, ParseMode, ReplyKeyboardRemove, Update
 from telegram.ext import (
     CallbackContext,
     CallbackQueryHandler,
@@ -18,19 +15,24 @@ from telegram.ext import (
     ConversationHandler,
     Filters,
     Handler,
+    InlineQueryHandler,
     MessageHandler,
+    TypeHandler,
     Updater,
 )
 from telegram.ext.utils.types import CCT
 
-from handlers.callback.places import PlaceCallbackHandler, PlaceDeleteCallbackHandler
-from handlers.command.places import PlacesCommandHandler
-from handlers.message.places import PlaceAddMessageHandler
-from settings import settings
+from menu.cache import FrozenReplyKeyboardMarkup
+from menu.callbacks import CallbackData, CallbackDataError, decode
+from metrics.instruments import defer, instrumented
+from outbound.sender import outbound_sender
+from settings import Webhook, settings
 
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+if TYPE_CHECKING:
+    from runtime.aio import AsyncioRunner
+    from runtime.jobs import JobWorkerPool
+    from runtime.recording import UpdateRecorder
+    from runtime.state import StateBudget
 
 
 class ChatBotTelegram:
@@ -42,44 +44,245 @@ class ChatBotTelegram:
     KEYBOARD_COMMANDS = {
         "places": "🧭 Список мест",
         "add": "📌 Добавить место",
+        "nearby": "📍 Места рядом",
         "help": "ℹ Техподдержка",
     }
+    # команды чат-бота по подписям кнопок
+    KEYBOARD_COMMAND_NAMES = {value: key for key, value in KEYBOARD_COMMANDS.items()}
+    # основное кнопочное меню (формируется однократно)
+    MAIN_KEYBOARD = FrozenReplyKeyboardMarkup(
+        keyboard=[
+            [KEYBOARD_COMMANDS["places"], KEYBOARD_COMMANDS["add"]],
+            [
+                # кнопка сразу отправляет местоположение пользователя
+                KeyboardButton(KEYBOARD_COMMANDS["nearby"], request_location=True),
+                KEYBOARD_COMMANDS["help"],
+            ],
+        ],
+        resize_keyboard=True,
+    )
+
+    # обработчики функций обратного вызова по действиям кнопок (см. `menu.callbacks`)
+    CALLBACK_ACTIONS = {
+        "place": "callback_place",
+        "place.delete": "callback_place_delete",
+        "place.edit": "callback_place_edit",
+        "place.page": "callback_places_page",
+    }
 
     # значение состояния для запроса местоположения
     STATE_LOCATION = 1
     # значение состояния для запроса описания
     STATE_DESCRIPTION = 2
 
-    def __init__(self, updater_object: Updater):
+    def __init__(
+        self,
+        updater_object: Updater,
+        runner: Optional["AsyncioRunner"] = None,
+        jobs: Optional["JobWorkerPool"] = None,
+        recorder: Optional["UpdateRecorder"] = None,
+        state: Optional["StateBudget"] = None,
+    ):
         """
         Конструктор.
 
         :param updater_object: Объект для получения обновлений (сообщений пользователя) от чат-бота.
+        :param runner: Цикл событий для асинхронной обработки обновлений
+            (если не передан, обновления обрабатываются синхронно).
+        :param jobs: Пул потоков для фонового создания мест
+            (если не передан, места создаются до ответа пользователю).
+        :param recorder: Объект для записи входящих обновлений (если не передан, обновления не записываются).
+        :param state: Объект для вытеснения данных пользователей и чатов из памяти
+            (если не передан, данные хранятся в памяти бессрочно).
         """
 
         self.updater = updater_object
+        self.runner = runner
+        self.jobs = jobs
+        self.recorder = recorder
+        self.state = state
+
+    def submit(self, update: Update, coroutine: Coroutine[Any, Any, Any]) -> None:
+        """
+        Передача обработчика-корутины в цикл событий.
+
+        Ошибка обработчика сообщается пользователю так же, как ошибки синхронных обработчиков.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param coroutine: Корутина обработчика.
+        :return:
+        """
+
+        if self.runner is None:
+            raise RuntimeError("Asyncio runner is not configured.")
 
-    def add_handler(self, handler: Handler[Update, CCT]) -> None:
+        self.runner.submit(defer(coroutine)).add_done_callback(
+            lambda future: self.__async_done(update, future)
+        )
+
+    def __async_done(self, update: Update, future: "Future[Any]") -> None:
+        """
+        Сообщение пользователю об ошибке обработчика-корутины.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param future: Результат обработчика.
+        :return:
+        """
+
+        if not future.cancelled() and (error := future.exception()) is not None:
+            self.notify_failure(update, error)
+
+    def add_handler(self, handler: Handler[Update, CCT], group: int = 0) -> None:
         """
         Добавление обработчиков команд от пользователя чат-бота.
 
         :param handler: Обработчик команд.
+        :param group: Группа обработчиков (группы проверяются по возрастанию номера).
+        :return:
+        """
+
+        self.updater.dispatcher.add_handler(handler, group)  # type: ignore
+
+    def error(self, update: object, context: CallbackContext) -> None:
+        """
+        Обработка ошибок обработчиков (обработчик ошибок диспетчера).
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса (содержит ошибку).
         :return:
         """
 
-        self.updater.dispatcher.add_handler(handler)  # type: ignore
+        from clients.resilience import GatewayUnavailableError
+
+        if isinstance(context.error, GatewayUnavailableError):
+            logging.warning("GraphQL gateway is unavailable: %r", context.error)
+        else:
+            logging.error("Unhandled exception in handler", exc_info=context.error)
+
+        if isinstance(update, Update) and context.error is not None:
+            self.notify_failure(update, context.error)
+
+    def notify_failure(self, update: Update, error: BaseException) -> None:
+        """
+        Сообщение пользователю о том, что запрос не выполнен.
+
+        На запрос обратного вызова дается ответ (иначе клиент продолжает ожидание),
+        на сообщение – ответное сообщение. Вызовы ставятся в очередь без ожидания,
+        поэтому метод можно вызывать из цикла событий.
 
-    def start(self) -> None:
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param error: Ошибка обработчика.
+        :return:
+        """
+
+        # обработчики ошибок вызываются и для синхронных, и для асинхронных обработчиков
+        from clients.resilience import GatewayUnavailableError
+
+        if isinstance(error, GatewayUnavailableError):
+            text = "Сервис временно недоступен. Попробуйте позже."
+        else:
+            text = "Не удалось выполнить запрос. Попробуйте позже."
+
+        if (callback_query := update.callback_query) is not None:
+            outbound_sender.send(
+                update.effective_chat.id
+                if update.effective_chat
+                else callback_query.from_user.id,
+                callback_query.answer,
+                text=text,
+            )
+        elif update.effective_message is not None and update.effective_chat:
+            outbound_sender.send(
+                update.effective_chat.id,
+                update.effective_message.reply_text,
+                text=text,
+            )
+
+    def start(self, webhook: Optional[Webhook] = None) -> None:
         """
         Запуск функций взаимодействия с Telegram
         для получения обновлений (сообщений от пользователя) и их обработки.
 
+        :param webhook: Конфигурация вебхука (если не передана, используется long polling).
+        :return:
+        """
+
+        if webhook:
+            self.start_webhook(webhook)
+        else:
+            self.updater.start_polling()
+            self.updater.idle()
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        Освобождение ресурсов после остановки получения обновлений.
+
+        :return:
+        """
+
+        # клиент шлюза и хранилище состояния импортируются лениво (см. `app.create_app`)
+        from clients.gateway_async import async_gateway_client
+        from persistence.writebehind import WriteBehindPersistence
+
+        # задания выполняются через клиент шлюза, поэтому останавливаются первыми
+        if self.jobs:
+            self.jobs.stop()
+
+        # отправка сообщений, оставшихся в очередях чатов
+        outbound_sender.stop(timeout=10)
+
+        if self.runner:
+            self.runner.run(async_gateway_client.close())
+            self.runner.stop()
+
+        persistence = self.updater.dispatcher.persistence  # type: ignore
+        if isinstance(persistence, WriteBehindPersistence):
+            persistence.close()
+
+        if self.recorder:
+            self.recorder.close()
+
+    def start_webhook(self, webhook: Webhook) -> None:
+        """
+        Получение обновлений через встроенный HTTP-сервер вебхука.
+
+        :param webhook: Конфигурация вебхука.
         :return:
         """
 
-        self.updater.start_polling()
-        self.updater.idle()
+        from runtime.webhook import WebhookServer
+
+        dispatcher = self.updater.dispatcher  # type: ignore
+        server = WebhookServer(
+            dispatcher,
+            listen=webhook.listen,
+            port=webhook.port,
+            path=webhook.path,
+            secret_token=webhook.secret_token,
+        )
+        if webhook.url:
+            self.updater.bot.set_webhook(  # type: ignore
+                url=webhook.url, secret_token=webhook.secret_token
+            )
 
+        dispatcher_thread = threading.Thread(target=dispatcher.start, name="dispatcher")
+        dispatcher_thread.start()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: server.stop())
+
+        logging.info("Webhook is listening on %s:%s", webhook.listen, webhook.port)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            dispatcher.stop()
+            dispatcher_thread.join()
+            if dispatcher.persistence:
+                dispatcher.update_persistence()
+
+    @instrumented
     def command_start(
         self,
         update: Update,
@@ -94,26 +297,18 @@ class ChatBotTelegram:
         """
 
         if isinstance(update.effective_chat, Chat):
-            keyboard_buttons = [
-                [
-                    self.KEYBOARD_COMMANDS["places"],
-                    self.KEYBOARD_COMMANDS["add"],
-                ],
-                [self.KEYBOARD_COMMANDS["help"]],
-            ]
-            keyboard = ReplyKeyboardMarkup(
-                keyboard=keyboard_buttons, resize_keyboard=True
-            )
-
-            update.effective_chat.send_message(
+            outbound_sender.send(
+                update.effective_chat.id,
+                update.effective_chat.send_message,
                 text=f"Добро пожаловать, {update.message.chat.first_name}!" + "\n\n"
                 "Желаем приятного пользования сервисом.\n\n"
                 'Список команд бота раскрывается при вводе символа "/".\n'
                 "Также команды доступны в основном кнопочном меню бота.\n\n"
                 "/help - руководство пользователя.\n",
-                reply_markup=keyboard,
+                reply_markup=self.MAIN_KEYBOARD,
             )
 
+    @instrumented
     def command_places(
         self,
         update: Update,
@@ -127,8 +322,15 @@ class ChatBotTelegram:
         :return:
         """
 
-        PlacesCommandHandler().handle(update)
+        # модули обработчиков импортируются при первом обращении к ним
+        from handlers.command.places import PlacesCommandHandler
+
+        if self.runner:
+            self.submit(update, PlacesCommandHandler().handle_async(update))
+        else:
+            PlacesCommandHandler().handle(update)
 
+    @instrumented
     def command_add(
         self,
         update: Update,
@@ -142,10 +344,84 @@ class ChatBotTelegram:
         :return:
         """
 
-        update.message.reply_text("Пожалуйста, отправьте ваше местоположение:")
+        outbound_sender.send(
+            update.message.chat_id,
+            update.message.reply_text,
+            text="Пожалуйста, отправьте ваше местоположение:",
+        )
 
         return self.STATE_LOCATION
 
+    @instrumented
+    def command_nearby(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Обработка команды `/nearby`.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        outbound_sender.send(
+            update.message.chat_id,
+            update.message.reply_text,
+            text="Чтобы найти любимые места рядом, отправьте ваше местоположение "
+            f'(кнопка "{self.KEYBOARD_COMMANDS["nearby"]}"):',
+            reply_markup=self.MAIN_KEYBOARD,
+        )
+
+    @instrumented
+    def command_import(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Обработка команды `/import`.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        outbound_sender.send(
+            update.message.chat_id,
+            update.message.reply_text,
+            text="Чтобы импортировать места, отправьте файл CSV, GPX или KML.\n\n"
+            "CSV: первая строка – названия столбцов latitude, longitude "
+            "и description (или lat, lon и name).\n"
+            "GPX: импортируются путевые точки (wpt).\n"
+            "KML: импортируются метки (Placemark) с точкой.",
+        )
+
+    @instrumented
+    def command_export(self, update: Update, context: CallbackContext) -> None:
+        """
+        Обработка команды `/export [csv|gpx|kml]`.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        from handlers.command.transfer import PlacesExportCommandHandler
+
+        file_format = context.args[0] if context.args else None
+        if self.runner:
+            self.submit(
+                update,
+                PlacesExportCommandHandler().handle_async(
+                    update, file_format=file_format
+                ),
+            )
+        else:
+            PlacesExportCommandHandler().handle(update, file_format=file_format)
+
+    @instrumented
     def command_help(
         self,
         update: Update,
@@ -159,13 +435,45 @@ class ChatBotTelegram:
         :return:
         """
 
-        update.effective_chat.send_message(  # type: ignore
+        outbound_sender.send(
+            update.effective_chat.id,  # type: ignore
+            update.effective_chat.send_message,  # type: ignore
             text="По вопросам работы сервиса и техподдержки направляйте, пожалуйста, "
             "сообщения пользователю @MichaelNV.\n\n"
             "Будем рады вашим предложениям и пожеланиям!\n\n",
             parse_mode=ParseMode.HTML,
         )
 
+    @instrumented
+    def command_state(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Обработка служебной команды `/state` (отчет о данных пользователей в памяти).
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        if self.state is None:
+            return
+
+        report = self.state.report()
+        outbound_sender.send(
+            update.message.chat_id,
+            update.message.reply_text,
+            text=f"Пользователей в памяти: {report['users']}\n"
+            f"Чатов в памяти: {report['chats']}\n"
+            f"Объем данных: {report['bytes'] / 1024:.1f} КБ "
+            f"из {report['max_bytes'] / 1024:.0f} КБ\n"
+            f"Вытеснено по неактивности: {report['evicted_idle']}\n"
+            f"Вытеснено по объему: {report['evicted_budget']}",
+        )
+
+    @instrumented
     def cancel(
         self,
         update: Update,
@@ -179,14 +487,20 @@ class ChatBotTelegram:
         :return:
         """
 
-        update.message.reply_text(
-            "Спасибо, что обратились к нашему сервису.",
+        if isinstance(context.user_data, dict):
+            context.user_data.pop("location", None)
+
+        outbound_sender.send(
+            update.message.chat_id,
+            update.message.reply_text,
+            text="Спасибо, что обратились к нашему сервису.",
             reply_markup=ReplyKeyboardRemove(),
         )
 
         return ConversationHandler.END
 
     @staticmethod
+    @instrumented
     def message_unknown(
         update: Update, context: CallbackContext  # pylint: disable=unused-argument
     ) -> None:
@@ -198,42 +512,180 @@ class ChatBotTelegram:
         :return:
         """
 
-        update.effective_chat.send_message(  # type: ignore
+        outbound_sender.send(
+            update.effective_chat.id,  # type: ignore
+            update.effective_chat.send_message,  # type: ignore
             text="Пока не очень понимаю что имелось в виду.\n\n"
             'Список доступных команд раскрывается при вводе символа "/".\n'
             "Техподдержка – /help.\n",
         )
 
+    @instrumented
+    def callback_router(self, update: Update, context: CallbackContext) -> None:
+        """
+        Выбор обработчика функции обратного вызова по действию кнопки.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        try:
+            data = decode(update.callback_query.data or "")
+        except CallbackDataError:
+            return self.callback_unknown(update, context)
+
+        if method_name := self.CALLBACK_ACTIONS.get(data.action):
+            return getattr(self, method_name)(update, context, data)
+
+        return self.callback_unknown(update, context)
+
+    @instrumented
     def callback_place(
         self,
         update: Update,
         context: CallbackContext,  # pylint: disable=unused-argument
+        data: CallbackData,
     ) -> None:
         """
         Обработка запроса на просмотр объекта любимого места.
 
         :param update: Объект с данными, поступившими от чат-бота.
         :param context: Объект с данными контекста запроса.
+        :param data: Данные кнопки (идентификатор места).
         :return:
         """
 
-        PlaceCallbackHandler().handle(update.callback_query)
+        from handlers.callback.places import PlaceCallbackHandler
+
+        (place_id,) = data.args
+        if self.runner:
+            self.submit(
+                update,
+                PlaceCallbackHandler().handle_async(update.callback_query, place_id),
+            )
+        else:
+            PlaceCallbackHandler().handle(update.callback_query, place_id)
 
+    @instrumented
     def callback_place_delete(
         self,
         update: Update,
         context: CallbackContext,  # pylint: disable=unused-argument
+        data: CallbackData,
     ) -> None:
         """
         Обработка запроса на удаление объекта любимого места.
 
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :param data: Данные кнопки (идентификатор места).
+        :return:
+        """
+
+        from handlers.callback.places import PlaceDeleteCallbackHandler
+
+        (place_id,) = data.args
+        if self.runner:
+            self.submit(
+                update,
+                PlaceDeleteCallbackHandler().handle_async(
+                    update.callback_query, place_id
+                ),
+            )
+        else:
+            PlaceDeleteCallbackHandler().handle(update.callback_query, place_id)
+
+    @instrumented
+    def callback_place_edit(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+        data: CallbackData,
+    ) -> None:
+        """
+        Обработка запроса на редактирование объекта любимого места.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :param data: Данные кнопки (идентификатор места).
+        :return:
+        """
+
+        from handlers.callback.places import PlaceEditCallbackHandler
+
+        (place_id,) = data.args
+        PlaceEditCallbackHandler().handle(update.callback_query, place_id)
+
+    @instrumented
+    def callback_places_page(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+        data: CallbackData,
+    ) -> None:
+        """
+        Обработка запроса на переход к странице списка любимых мест.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :param data: Данные кнопки (курсор страницы).
+        :return:
+        """
+
+        from handlers.callback.places import PlacesPageCallbackHandler
+
+        (cursor,) = data.args
+        if self.runner:
+            self.submit(
+                update,
+                PlacesPageCallbackHandler().handle_async(update.callback_query, cursor),
+            )
+        else:
+            PlacesPageCallbackHandler().handle(update.callback_query, cursor)
+
+    @instrumented
+    def callback_unknown(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Обработка запроса с неизвестными или устаревшими данными кнопки.
+
         :param update: Объект с данными, поступившими от чат-бота.
         :param context: Объект с данными контекста запроса.
         :return:
         """
 
-        PlaceDeleteCallbackHandler().handle(update.callback_query)
+        from handlers.callback.places import UnknownCallbackHandler
+
+        UnknownCallbackHandler().handle(update.callback_query)
 
+    @instrumented
+    def inline_places(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Обработка inline-запроса на поиск любимых мест.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        from handlers.inline.places import PlacesInlineQueryHandler
+
+        if self.runner:
+            self.submit(
+                update, PlacesInlineQueryHandler().handle_async(update.inline_query)
+            )
+        else:
+            PlacesInlineQueryHandler().handle(update.inline_query)
+
+    @instrumented
     def text_message_handler(self, update: Update, context: CallbackContext) -> None:
         """
         Обработка текстовых сообщений от пользователя.
@@ -243,11 +695,8 @@ class ChatBotTelegram:
         :return:
         """
 
-        keyboard_commands = {
-            value: key for key, value in self.KEYBOARD_COMMANDS.items()
-        }
         # поиск команды и её выполнение
-        if command_name := keyboard_commands.get(update.message.text):
+        if command_name := self.KEYBOARD_COMMAND_NAMES.get(update.message.text):
             if method := getattr(self, "command_" + command_name):
                 return method(update, context)
 
@@ -256,6 +705,7 @@ class ChatBotTelegram:
         # обработка неизвестной команды
         return self.message_unknown(update, context)
 
+    @instrumented
     def message_location(self, update: Update, context: CallbackContext) -> int:
         """
         Обработка текстовых сообщений от пользователя.
@@ -268,39 +718,117 @@ class ChatBotTelegram:
         if isinstance(context.user_data, dict):
             context.user_data["location"] = update.message.location
 
-        update.message.reply_text("Добавьте описание для места: ")
+        outbound_sender.send(
+            update.message.chat_id,
+            update.message.reply_text,
+            text="Добавьте описание для места: ",
+        )
 
         return self.STATE_DESCRIPTION
 
-    def message_description(self, update: Update, context: CallbackContext) -> int:
+    @instrumented
+    def message_nearby(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
         """
-        Обработка текстовых сообщений от пользователя.
+        Обработка местоположения, отправленного вне диалога добавления места.
 
         :param update: Объект с данными, поступившими от чат-бота.
         :param context: Объект с данными контекста запроса.
         :return:
         """
 
-        if context.user_data and "location" in context.user_data:
-            PlaceAddMessageHandler().handle(
+        from handlers.message.places import PlaceNearbyMessageHandler
+
+        if self.runner:
+            self.submit(
                 update,
-                location=context.user_data["location"],
-                description=update.message.text,
+                PlaceNearbyMessageHandler().handle_async(
+                    update, location=update.message.location
+                ),
             )
+        else:
+            PlaceNearbyMessageHandler().handle(update, location=update.message.location)
+
+    @instrumented
+    def message_document(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Обработка загруженного файла с местами для импорта.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        from handlers.message.transfer import PlacesImportMessageHandler
+
+        if self.runner:
+            self.submit(update, PlacesImportMessageHandler().handle_async(update))
+        else:
+            PlacesImportMessageHandler().handle(update)
+
+    @instrumented
+    def message_description(self, update: Update, context: CallbackContext) -> int:
+        """
+        Обработка текстовых сообщений от пользователя.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        # местоположение удаляется из данных пользователя вместе с завершением диалога
+        location = None
+        if isinstance(context.user_data, dict):
+            location = context.user_data.pop("location", None)
+
+        if location is not None:
+            from handlers.message.places import PlaceAddMessageHandler
+
+            if self.runner:
+                self.submit(
+                    update,
+                    PlaceAddMessageHandler(self.jobs).handle_async(
+                        update, location=location, description=update.message.text
+                    ),
+                )
+            else:
+                PlaceAddMessageHandler(self.jobs).handle(
+                    update, location=location, description=update.message.text
+                )
         # todo: обработать исключительную ситуацию
 
         return ConversationHandler.END
 
 
-try:
-    updater = Updater(
-        bot=Bot(settings.chatbot_telegram.api_token),
-    )
-    bot = ChatBotTelegram(updater)
+def setup_handlers(bot: ChatBotTelegram) -> None:
+    """
+    Регистрация обработчиков команд, сообщений и функций обратного вызова.
+
+    :param bot: Объект чат-бота.
+    :return:
+    """
+
+    # запись всех входящих обновлений (отдельная группа не мешает выбору обработчика)
+    if bot.recorder:
+        bot.add_handler(TypeHandler(Update, bot.recorder.record), group=-1)
+
+    # ответ пользователю при ошибке обработчика (в том числе при недоступности шлюза)
+    bot.updater.dispatcher.add_error_handler(bot.error)  # type: ignore
 
     # обработка команд
     bot.add_handler(CommandHandler("start", bot.command_start))
     bot.add_handler(CommandHandler("places", bot.command_places))
+    bot.add_handler(CommandHandler("nearby", bot.command_nearby))
+    bot.add_handler(CommandHandler("import", bot.command_import))
+    # импорт и экспорт выполняются долго, поэтому не блокируют обработку других обновлений
+    bot.add_handler(CommandHandler("export", bot.command_export, run_async=True))
     bot.add_handler(CommandHandler("help", bot.command_help))
 
     # обработка команды для создания нового объекта любимого места
@@ -326,25 +854,44 @@ try:
                 ],
             },
             fallbacks=[CommandHandler("cancel", bot.cancel)],
+            # состояние диалога сохраняется, если у диалога есть хранилище
+            name="add_place",
+            persistent=bot.updater.dispatcher.persistence is not None,  # type: ignore
         )
     )
 
-    # обработка функций обратного вызова
-    # просмотр объекта
-    bot.add_handler(CallbackQueryHandler(bot.callback_place, pattern=r"place:\d{1,20}"))
-    # удаление объекта
+    # поиск мест рядом с отправленным местоположением (вне диалога добавления места)
+    bot.add_handler(MessageHandler(Filters.location, bot.message_nearby))
+
+    # импорт мест из загруженного файла
     bot.add_handler(
-        CallbackQueryHandler(
-            bot.callback_place_delete, pattern=r"place.delete:\d{1,20}"
-        )
+        MessageHandler(Filters.document, bot.message_document, run_async=True)
     )
 
+    # обработка функций обратного вызова (действие кнопки выбирается по ее данным)
+    bot.add_handler(CallbackQueryHandler(bot.callback_router))
+
+    # поиск мест в inline-режиме (`@bot <текст>`)
+    bot.add_handler(InlineQueryHandler(bot.inline_places))
+
+    # учет и вытеснение данных пользователей и чатов после обработки обновления
+    if bot.state:
+        bot.add_handler(TypeHandler(Update, bot.state.touch), group=1)
+        # отчет доступен только администраторам (для остальных команда неизвестна)
+        bot.add_handler(
+            CommandHandler(
+                "state",
+                bot.command_state,
+                filters=Filters.user(user_id=settings.chatbot_telegram.admin_ids),
+            )
+        )
+
     # обработка текстовых сообщений (кнопочного меню или любого текста)
     bot.add_handler(MessageHandler(Filters.text, bot.text_message_handler))
 
-    # запуск взаимодействия с чат-ботом
-    bot.start()
 
-except Exception as exception:
-    # todo: реализовать обработку исключений
-    raise exception
+if __name__ == "__main__":
+    # запуск через `python chatbot.py` сохранен для совместимости (см. `app.py`)
+    from app import main
+
+    main()
@@ -5,7 +5,9 @@
 from abc import ABC, abstractmethod
 from typing import Any, Union
 
-from graphql import DocumentNode, ExecutionResult
+from graphql import ExecutionResult
+
+from clients.operations import Operation
 
 
 class BaseClient(ABC):
@@ -23,7 +25,7 @@ class BaseClient(ABC):
         """
 
     @abstractmethod
-    def _request(self, query: DocumentNode) -> Union[dict[str, Any], ExecutionResult]:
+    def _request(self, query: Operation) -> Union[dict[str, Any], ExecutionResult]:
         """
         Формирование и выполнение запроса.
 
@@ -0,0 +1,128 @@
+"""
+Объединение одновременных запросов мест к GraphQL-шлюзу (по принципу DataLoader).
+"""
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from gql.transport.exceptions import TransportQueryError
+from graphql import ExecutionResult
+
+from clients.gateway import build_place
+from clients.operations import GET_PLACES_BATCH, Operation
+from clients.shemas import PlaceDTO
+
+# функция выполнения операции шлюза
+Executor = Callable[[Operation, dict], Awaitable[ExecutionResult]]
+
+
+class PlaceBatchLoader:
+    """
+    Загрузка мест с объединением запросов.
+
+    Запросы мест, поступившие в течение короткого окна, отправляются шлюзу
+    одной операцией, а повторяющиеся идентификаторы запрашиваются однократно.
+    Все методы должны вызываться из одного цикла событий.
+    """
+
+    def __init__(
+        self,
+        execute: Executor,
+        window: float,
+        max_batch_size: int,
+        validate: bool = False,
+    ):
+        """
+        Конструктор.
+
+        :param execute: Функция выполнения операции шлюза.
+        :param window: Окно объединения запросов (в секундах).
+        :param max_batch_size: Максимальное количество мест в одном запросе.
+        :param validate: Проверять данные мест по модели.
+        """
+
+        self._execute = execute
+        self.validate = validate
+        self.window = window
+        self.max_batch_size = min(max_batch_size, len(GET_PLACES_BATCH))
+        self._pending: dict[str, asyncio.Future] = {}
+        self._handle: Optional[asyncio.TimerHandle] = None
+        #: количество отправленных объединенных запросов
+        self.batches = 0
+        #: количество мест, запрошенных у шлюза
+        self.loaded = 0
+
+    async def load(self, place_id: str) -> Optional[PlaceDTO]:
+        """
+        Получение места по идентификатору.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        key = str(place_id)
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._handle is None:
+                self._handle = loop.call_later(self.window, self._dispatch)
+
+        # отмена ожидания одним из обработчиков не должна отменять запрос для остальных
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        """
+        Отправка накопленных запросов одной операцией.
+
+        :return:
+        """
+
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.get_running_loop().create_task(self._load_batch(batch))
+
+    async def _load_batch(self, batch: dict[str, asyncio.Future]) -> None:
+        """
+        Выполнение объединенного запроса и передача результатов ожидающим обработчикам.
+
+        :param batch: Ожидаемые результаты по идентификаторам мест.
+        :return:
+        """
+
+        place_ids = list(batch)
+        variables = {f"id{index}": place_id for index, place_id in enumerate(place_ids)}
+        self.batches += 1
+        self.loaded += len(place_ids)
+
+        try:
+            result = await self._execute(GET_PLACES_BATCH[len(place_ids)], variables)
+            if result.data is None:
+                raise TransportQueryError(str(result.errors), errors=result.errors)
+        except Exception as exception:  # pylint: disable=broad-except
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exception)
+
+            return
+
+        for index, place_id in enumerate(place_ids):
+            future = batch[place_id]
+            if future.done():
+                continue
+
+            # место, не найденное шлюзом, возвращается как `None`
+            item = result.data.get(f"p{index}")
+            try:
+                future.set_result(
+                    build_place(item, validate=self.validate) if item else None
+                )
+            except Exception as exception:  # pylint: disable=broad-except
+                future.set_exception(exception)
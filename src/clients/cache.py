@@ -0,0 +1,254 @@
+"""
+Кеширование данных о любимых местах, полученных от GraphQL-шлюза.
+"""
+from typing import Any, Hashable, Optional, Sequence
+
+from clients.search import PlaceSearchIndex
+from clients.shemas import PlaceBatch, PlaceDTO, PlacesPageDTO
+from clients.spatial import PlaceIndex
+from settings import Cache, settings
+from utils.ttlcache import TTLCache
+
+
+class UserPlaces:
+    """
+    Индексы всех мест одного пользователя: пространственный (поиск ближайших мест)
+    и текстовый (поиск по началу слов).
+    """
+
+    def __init__(self, cell_size: float):
+        """
+        Конструктор.
+
+        :param cell_size: Размер ячейки сетки пространственного индекса (в градусах).
+        """
+
+        self.index = PlaceIndex(cell_size)
+        self.search_index = PlaceSearchIndex()
+
+    def update(self, places: PlaceBatch) -> "UserPlaces":
+        """
+        Приведение индексов к полному списку мест пользователя.
+
+        :param places: Полный список мест пользователя.
+        :return:
+        """
+
+        self.index.update(places)
+        self.search_index.update(places)
+
+        return self
+
+    def add(self, place: PlaceDTO) -> None:
+        """
+        Добавление места в индексы.
+
+        :param place: Объект места.
+        :return:
+        """
+
+        self.index.add(place)
+        self.search_index.add(place)
+
+    def remove(self, place_id: Any) -> None:
+        """
+        Удаление места из индексов.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        self.index.remove(place_id)
+        self.search_index.remove(place_id)
+
+
+class PlaceCache:
+    """
+    Кеш любимых мест и их списков.
+
+    При изменении мест (создании или удалении) соответствующие записи сбрасываются.
+    Места каждого пользователя хранятся в его индексах (`UserPlaces`),
+    поэтому поиск не выдает места других пользователей.
+    """
+
+    def __init__(self, config: Cache):
+        """
+        Конструктор.
+
+        :param config: Конфигурация кеша.
+        """
+
+        self.enabled = config.enabled
+        self.places: TTLCache[PlaceDTO] = TTLCache(
+            config.max_places, config.ttl, stale_ttl=config.stale_ttl
+        )
+        self.pages: TTLCache[PlacesPageDTO] = TTLCache(
+            config.max_lists, config.ttl, stale_ttl=config.stale_ttl
+        )
+        self.users: TTLCache[UserPlaces] = TTLCache(
+            config.max_lists, config.ttl, stale_ttl=config.stale_ttl
+        )
+        self.cell_size = config.index_cell_size
+
+    def get_place(self, place_id: Any, stale: bool = False) -> Optional[PlaceDTO]:
+        """
+        Получение места из кеша.
+
+        :param place_id: Идентификатор места.
+        :param stale: Выдать устаревшую запись (при недоступности шлюза).
+        :return:
+        """
+
+        if not self.enabled:
+            return None
+
+        if stale:
+            return self.places.peek(str(place_id))
+
+        return self.places.get(str(place_id))
+
+    def set_place(self, place: PlaceDTO) -> None:
+        """
+        Сохранение места в кеше.
+
+        :param place: Объект места.
+        :return:
+        """
+
+        if self.enabled:
+            self.places.set(str(place.id), place)
+
+    def get_user_places(
+        self, user_id: int, stale: bool = False
+    ) -> Optional[UserPlaces]:
+        """
+        Получение индексов мест пользователя из кеша.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param stale: Выдать устаревшую запись (при недоступности шлюза).
+        :return:
+        """
+
+        if not self.enabled:
+            return None
+
+        if stale:
+            return self.users.peek(user_id)
+
+        return self.users.get(user_id)
+
+    def set_user_places(self, user_id: int, places: PlaceBatch) -> UserPlaces:
+        """
+        Формирование индексов по полному списку мест пользователя и их сохранение в кеше.
+
+        Индексы устаревшей записи обновляются только для изменившихся мест.
+        Если кеш выключен, индексы формируются заново и не сохраняются.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param places: Полный список мест пользователя.
+        :return:
+        """
+
+        if not self.enabled:
+            return UserPlaces(self.cell_size).update(places)
+
+        entry = self.users.peek(user_id) or UserPlaces(self.cell_size)
+        self.users.set(user_id, entry.update(places))
+
+        return entry
+
+    def get_page(self, key: Hashable, stale: bool = False) -> Optional[PlacesPageDTO]:
+        """
+        Получение страницы списка мест из кеша.
+
+        :param key: Ключ страницы (параметры запроса страницы).
+        :param stale: Выдать устаревшую запись (при недоступности шлюза).
+        :return:
+        """
+
+        if not self.enabled:
+            return None
+
+        if stale:
+            return self.pages.peek(key)
+
+        return self.pages.get(key)
+
+    def set_page(self, page: PlacesPageDTO, key: Hashable) -> None:
+        """
+        Сохранение страницы списка мест в кеше.
+
+        :param page: Страница списка мест.
+        :param key: Ключ страницы (параметры запроса страницы).
+        :return:
+        """
+
+        if not self.enabled:
+            return
+
+        self.pages.set(key, page)
+
+    def invalidate_place(self, place_id: Any) -> None:
+        """
+        Сброс записи о месте и всех списков, в которые оно могло входить.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        self.places.delete(str(place_id))
+        # владелец места неизвестен, поэтому место удаляется из индексов всех пользователей
+        for entry in self.users.values():
+            entry.remove(place_id)
+        self.invalidate_lists()
+
+    def invalidate_lists(self) -> None:
+        """
+        Сброс всех страниц списков мест.
+
+        :return:
+        """
+
+        self.pages.clear()
+
+    def add_user_places(
+        self, user_id: Optional[int], places: Sequence[Optional[PlaceDTO]]
+    ) -> None:
+        """
+        Добавление созданных мест в кеш и в индексы мест пользователя.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param places: Созданные места (`None`, если шлюз не вернул созданное место).
+        :return:
+        """
+
+        created = [place for place in places if place is not None]
+        for place in created:
+            self.set_place(place)
+        # новое место меняет курсоры страниц, поэтому страницы сбрасываются
+        self.invalidate_lists()
+        if user_id is None:
+            return
+        if len(created) < len(places):
+            # без полей места индексы нельзя дополнить, они будут загружены заново
+            self.users.delete(user_id)
+        elif entry := self.users.peek(user_id):
+            for place in created:
+                entry.add(place)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Получение статистики использования кеша.
+
+        :return:
+        """
+
+        return {
+            "places": self.places.stats(),
+            "pages": self.pages.stats(),
+            "users": self.users.stats(),
+        }
+
+
+# инициализация кеша мест (общий для синхронного и асинхронного клиентов)
+place_cache = PlaceCache(settings.cache)
@@ -1,38 +1,420 @@
 """
 Функции для взаимодействия с внешним сервисом-провайдером данных о местонахождении.
 """
-from typing import Optional
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
-from gql import Client, gql
-from gql.transport.requests import RequestsHTTPTransport
-from graphql import DocumentNode
+from gql.transport.exceptions import TransportQueryError
+from graphql import (
+    ExecutionResult,
+    GraphQLSchema,
+    build_client_schema,
+    build_schema,
+    get_introspection_query,
+    parse,
+)
 
 from clients.base.base import BaseClient
-from clients.shemas import PlaceDTO
-from settings import settings
+from clients.cache import PlaceCache, UserPlaces, place_cache
+from clients.operations import (
+    CREATE_PLACE,
+    CREATE_PLACES_BATCH,
+    DELETE_PLACE,
+    GET_PLACE,
+    GET_PLACES_PAGE,
+    GET_USER_PLACES_PAGE,
+    Operation,
+    operations,
+)
+from clients.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    GatewayUnavailableError,
+    RetryPolicy,
+    is_retryable,
+)
+from clients.shemas import (
+    NewPlaceDTO,
+    PlaceBatch,
+    PlaceDTO,
+    PlaceListItemDTO,
+    PlacesPageDTO,
+    construct_trusted,
+)
+from clients.spatial import PlaceDistance
+from clients.transport import PooledRequestsHTTPTransport
+from metrics.instruments import track_operation
+from settings import Gateway, settings
+
+logger = logging.getLogger(__name__)
+
+# запрос схемы GraphQL-шлюза
+INTROSPECTION_QUERY = parse(get_introspection_query())
+
+
+def read_schema(path: str) -> GraphQLSchema:
+    """
+    Загрузка схемы GraphQL из файла (SDL).
+
+    :param path: Путь к файлу схемы.
+    :return:
+    """
+
+    return build_schema(Path(path).read_text(encoding="utf-8"))
+
+
+def build_introspected_schema(result: ExecutionResult) -> GraphQLSchema:
+    """
+    Формирование схемы GraphQL по результату запроса схемы у шлюза.
+
+    :param result: Результат запроса `INTROSPECTION_QUERY`.
+    :return:
+    """
+
+    if result.errors or not result.data:
+        raise TransportQueryError(
+            f"Unable to fetch the gateway schema: {result.errors}",
+            errors=result.errors,
+        )
+
+    return build_client_schema(result.data)  # type: ignore
+
+
+def get_result_data(result: ExecutionResult) -> dict:
+    """
+    Получение данных из результата выполнения операции.
+
+    :param result: Результат выполнения операции.
+    :return:
+    """
+
+    if result.errors:
+        raise TransportQueryError(
+            str(result.errors[0]),
+            errors=result.errors,
+            data=result.data,
+            extensions=result.extensions,
+        )
+
+    return result.data or {}
+
+
+def build_place(item: dict, validate: bool = False) -> PlaceDTO:
+    """
+    Формирование объекта любимого места из ответа шлюза.
+
+    :param item: Данные места.
+    :param validate: Проверять данные по модели (иначе данные шлюза считаются доверенными).
+    :return:
+    """
+
+    values = {
+        "id": item.get("id"),
+        "latitude": item.get("latitude"),
+        "longitude": item.get("longitude"),
+        "description": item.get("description"),
+        "city": item.get("city"),
+        "locality": item.get("locality"),
+    }
+    if validate:
+        return PlaceDTO(**values)
+
+    return construct_trusted(PlaceDTO, values)
+
+
+def build_places(items: list[dict], validate: bool = False) -> PlaceBatch:
+    """
+    Формирование списка любимых мест из ответа шлюза.
+
+    :param items: Данные мест.
+    :param validate: Проверять данные по модели (иначе данные шлюза считаются доверенными).
+    :return:
+    """
+
+    return PlaceBatch.from_items(items, validate=validate)
+
+
+def build_places_page(connection: dict, validate: bool = False) -> PlacesPageDTO:
+    """
+    Формирование страницы списка мест из ответа шлюза.
+
+    :param connection: Данные страницы (connection).
+    :param validate: Проверять данные по модели (иначе данные шлюза считаются доверенными).
+    :return:
+    """
+
+    page_info = connection.get("pageInfo") or {}
+    items = [
+        {
+            "id": edge["node"].get("id"),
+            "city": edge["node"].get("city"),
+            "locality": edge["node"].get("locality"),
+        }
+        for edge in connection.get("edges") or []
+        if edge and edge.get("node")
+    ]
+    values = {
+        "end_cursor": page_info.get("endCursor"),
+        "has_next_page": page_info.get("hasNextPage", False),
+    }
+    if validate:
+        return PlacesPageDTO(items=items, **values)
+
+    return construct_trusted(
+        PlacesPageDTO,
+        {
+            "items": [construct_trusted(PlaceListItemDTO, item) for item in items],
+            **values,
+        },
+    )
+
+
+def build_create_places_variables(
+    places: list[NewPlaceDTO], user_id: Optional[int]
+) -> dict:
+    """
+    Формирование значений переменных мутации создания нескольких мест.
+
+    :param places: Создаваемые места.
+    :param user_id: Идентификатор пользователя Telegram (владельца мест).
+    :return:
+    """
+
+    variables: dict = {"userId": user_id}
+    for index, place in enumerate(places):
+        variables[f"latitude{index}"] = place.latitude
+        variables[f"longitude{index}"] = place.longitude
+        variables[f"description{index}"] = place.description
+
+    return variables
+
+
+def count_created_places(result: ExecutionResult, size: int) -> int:
+    """
+    Подсчет мест, созданных мутацией создания нескольких мест.
+
+    Ошибка создания отдельного места не отменяет создание остальных мест запроса.
+
+    :param result: Результат выполнения мутации.
+    :param size: Количество мест в запросе.
+    :return:
+    """
+
+    if result.data is None:
+        get_result_data(result)
+
+        return 0
+
+    if result.errors:
+        logger.warning("Some places were not created: %s", result.errors)
+
+    return sum(
+        1 for index in range(size) if (result.data.get(f"c{index}") or {}).get("result")
+    )
+
+
+def build_created_places(
+    payloads: Iterable[Optional[dict]], validate: bool = False
+) -> list[Optional[PlaceDTO]]:
+    """
+    Формирование объектов созданных мест из результатов мутации `createPlace`.
+
+    :param payloads: Результаты создания отдельных мест.
+    :param validate: Проверять данные по модели (иначе данные шлюза считаются доверенными).
+    :return: Созданные места (`None`, если шлюз не вернул поля созданного места).
+    """
+
+    return [
+        build_place(payload["place"], validate) if payload.get("place") else None
+        for payload in payloads
+        if payload and payload.get("result")
+    ]
 
 
 class GatewayClient(BaseClient):
     """
     Реализация функций для взаимодействия с GraphQL-шлюзом.
+
+    Клиент рассчитан на использование одним экземпляром во всем процессе:
+    соединения с шлюзом переиспользуются, а схема загружается однократно.
     """
 
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        config: Optional[Gateway] = None,
+        cache: Optional[PlaceCache] = None,
+    ):
+        """
+        Конструктор.
+
+        :param url: Адрес GraphQL-шлюза (по умолчанию – из настроек).
+        :param config: Конфигурация клиента (по умолчанию – из настроек).
+        :param cache: Кеш мест (по умолчанию – общий для процесса).
+        """
+
+        self._url = url or settings.gateway_url
+        self._config = config or settings.gateway
+        self.cache = cache or place_cache
+        self._lock = threading.Lock()
+        self._transport: Optional[PooledRequestsHTTPTransport] = None
+        self._schema: Optional[GraphQLSchema] = None
+        self.breaker = CircuitBreaker(
+            "gateway",
+            failure_threshold=self._config.breaker_failures,
+            reset_timeout=self._config.breaker_reset_timeout,
+        )
+        self.retry_policy = RetryPolicy(
+            retries=self._config.retries,
+            backoff_base=self._config.backoff_base,
+            backoff_max=self._config.backoff_max,
+            deadline=self._config.deadline,
+        )
+
     @property
     def base_url(self) -> str:
-        return settings.gateway_url
-
-    def _request(self, query: DocumentNode, variables: Optional[dict] = None) -> dict:
-        # конфигурация транспорта данных
-        transport = RequestsHTTPTransport(
-            url=self.base_url,
-            verify=True,
-            retries=3,
+        return self._url
+
+    @property
+    def schema(self) -> Optional[GraphQLSchema]:
+        """
+        Схема GraphQL-шлюза (доступна после подключения).
+
+        :return:
+        """
+
+        return self._schema
+
+    def connect(self) -> None:
+        """
+        Установка соединения с шлюзом, загрузка схемы GraphQL
+        и проверка по ней всех операций из реестра.
+
+        Повторный вызов для уже подключенного клиента ничего не делает.
+
+        :return:
+        """
+
+        with self._lock:
+            if self._transport is not None:
+                return
+
+            # конфигурация транспорта данных с пулом соединений
+            # повторы выполняются клиентом (с учетом времени на запрос)
+            transport = PooledRequestsHTTPTransport(
+                url=self.base_url,
+                pool_size=self._config.pool_size,
+                persisted_queries=self._config.persisted_queries,
+                timeout=(self._config.connect_timeout, self._config.read_timeout),
+                verify=True,
+                retries=0,
+            )
+            transport.connect()
+            try:
+                schema = self._load_schema(transport)
+                operations.validate(schema)
+            except Exception:
+                transport.close()
+                raise
+
+            self._schema = schema
+            self._transport = transport
+            logger.info("Connected to GraphQL gateway %s", self.base_url)
+
+    def close(self) -> None:
+        """
+        Закрытие соединений с шлюзом.
+
+        :return:
+        """
+
+        with self._lock:
+            if self._transport is not None:
+                self._transport.close()
+            self._transport = None
+
+    def _load_schema(self, transport: PooledRequestsHTTPTransport) -> GraphQLSchema:
+        """
+        Загрузка схемы из файла или однократный запрос схемы у шлюза.
+
+        :param transport: Подключенный транспорт.
+        :return:
+        """
+
+        if self._config.schema_path:
+            return read_schema(self._config.schema_path)
+
+        return build_introspected_schema(transport.execute(INTROSPECTION_QUERY))
+
+    def _execute(
+        self, query: Operation, variables: Optional[dict] = None
+    ) -> ExecutionResult:
+        """
+        Выполнение запроса с повторами при недоступности шлюза.
+
+        Пока автоматический выключатель разомкнут, запросы отклоняются сразу.
+
+        :param query: Операция для выполнения.
+        :param variables: Значения переменных операции.
+        :return:
+        """
+
+        deadline = time.monotonic() + self.retry_policy.deadline
+        timeout = self._config.operation_timeouts.get(
+            query.name, self._config.read_timeout
         )
-        # инициализация клиента для взаимодействия с GraphQL
-        client = Client(transport=transport, fetch_schema_from_transport=True)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"Gateway circuit is open, {query.name} rejected."
+                )
+
+            try:
+                if self._transport is None:
+                    self.connect()
 
-        # выполнение запроса и возврат результата
-        return client.execute(query, variable_values=variables)
+                # выполнение запроса (операция уже проверена по схеме при подключении)
+                with track_operation(query.name):
+                    result = self._transport.execute_operation(  # type: ignore
+                        query,
+                        variable_values=variables,
+                        timeout=self.retry_policy.timeout(timeout, deadline),
+                    )
+            except Exception as exception:
+                if not is_retryable(exception):
+                    # шлюз ответил, но запрос выполнить нельзя
+                    self.breaker.record_success()
+                    raise
+
+                self.breaker.record_failure()
+                delay = self.retry_policy.backoff(
+                    attempt, exception, deadline, query.is_mutation
+                )
+                if delay is None or self.breaker.state == CircuitState.OPEN:
+                    raise GatewayUnavailableError(
+                        f"Gateway is unavailable, {query.name} failed."
+                    ) from exception
+
+                logger.warning(
+                    "Gateway request %s failed (%s), retrying in %.2fs",
+                    query.name,
+                    exception,
+                    delay,
+                )
+                attempt += 1
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+
+                return result
+
+    def _request(self, query: Operation, variables: Optional[dict] = None) -> dict:
+        return get_result_data(self._execute(query, variables))
 
     def get_place(self, place_id: str) -> Optional[PlaceDTO]:
         """
@@ -42,111 +424,238 @@ class GatewayClient(BaseClient):
         :return:
         """
 
-        # формирование GraphQL-запроса
-        query = gql(
-            """
-            query getPlace($placeId: ID!) {
-                place(placeId: $placeId) {
-                    id
-                    latitude
-                    longitude
-                    description
-                    city
-                    locality
-                }
-            }
-            """
-        )
+        if cached := self.cache.get_place(place_id):
+            return cached
+
         variables = {"placeId": place_id}
-        if response := self._request(query, variables=variables):
+        try:
+            response = self._request(GET_PLACE, variables=variables)
+        except GatewayUnavailableError:
+            # при недоступности шлюза выдается устаревшая запись из кеша
+            if stale := self.cache.get_place(place_id, stale=True):
+                return stale
+            raise
+
+        if response:
             # todo: добавить обработку исключений
-            item = response["place"]
-
-            return PlaceDTO(
-                id=item.get("id"),
-                latitude=item.get("latitude"),
-                longitude=item.get("longitude"),
-                description=item.get("description"),
-                city=item.get("city"),
-                locality=item.get("locality"),
+            place = build_place(
+                response["place"], validate=self._config.validate_responses
             )
+            self.cache.set_place(place)
+
+            return place
 
         return None
 
-    def get_places(self) -> Optional[list[PlaceDTO]]:
+    def get_user_places(self, user_id: int) -> UserPlaces:
         """
-        Получение списка любимых мест.
+        Получение индексов всех мест пользователя.
+
+        Места загружаются постранично по списку мест пользователя
+        и хранятся в кеше вместе с индексами до устаревания.
 
+        :param user_id: Идентификатор пользователя Telegram.
         :return:
         """
 
-        # формирование GraphQL-запроса
-        query = gql(
-            """
-            query {
-                places {
-                    id
-                    latitude
-                    longitude
-                    description
-                    city
-                    locality
-                }
-            }
-            """
-        )
+        if (cached := self.cache.get_user_places(user_id)) is not None:
+            return cached
 
-        if response := self._request(query):
-            places = response.get("places", [])
-            items = []
-            for item in places:
-                items.append(
-                    PlaceDTO(
-                        id=item.get("id"),
-                        latitude=item.get("latitude"),
-                        longitude=item.get("longitude"),
-                        description=item.get("description"),
-                        city=item.get("city"),
-                        locality=item.get("locality"),
-                    )
+        try:
+            items = [
+                item
+                for page in self._user_place_pages(
+                    user_id, self._config.places_page_size
                 )
-            return items
+                for item in page
+            ]
+        except GatewayUnavailableError:
+            # при недоступности шлюза выдается устаревшая запись из кеша
+            if (stale := self.cache.get_user_places(user_id, stale=True)) is not None:
+                return stale
+            raise
+
+        return self.cache.set_user_places(
+            user_id, build_places(items, validate=self._config.validate_responses)
+        )
+
+    def get_nearby_places(
+        self, user_id: int, latitude: float, longitude: float, limit: int, radius: float
+    ) -> list[PlaceDistance]:
+        """
+        Получение ближайших к точке любимых мест пользователя.
+
+        Места ищутся по пространственному индексу мест пользователя.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param latitude: Широта точки.
+        :param longitude: Долгота точки.
+        :param limit: Максимальное количество мест.
+        :param radius: Радиус поиска (в километрах).
+        :return: Места и расстояния до них в порядке возрастания расстояния.
+        """
+
+        return self.get_user_places(user_id).index.nearest(
+            latitude, longitude, limit, radius
+        )
+
+    def search_places(self, user_id: int, query: str, limit: int) -> list[PlaceDTO]:
+        """
+        Поиск любимых мест пользователя по началу слов описания, города и местонахождения.
+
+        Места ищутся по текстовому индексу мест пользователя, поэтому запрос к шлюзу
+        выполняется только при устаревании индекса.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param query: Текст запроса.
+        :param limit: Максимальное количество мест.
+        :return:
+        """
+
+        return (self.get_user_places(user_id)).search_index.search(query, limit)
+
+    def get_places_page(
+        self, user_id: int, first: int, after: Optional[str] = None
+    ) -> Optional[PlacesPageDTO]:
+        """
+        Получение страницы списка любимых мест пользователя.
+
+        Запрашиваются только поля, необходимые для меню списка.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param first: Количество мест на странице.
+        :param after: Курсор, после которого начинается страница.
+        :return:
+        """
+
+        key = (user_id, first, after)
+        if cached := self.cache.get_page(key):
+            return cached
+
+        variables = {"userId": user_id, "first": first, "after": after}
+        try:
+            response = self._request(GET_PLACES_PAGE, variables=variables)
+        except GatewayUnavailableError:
+            # при недоступности шлюза выдается устаревшая запись из кеша
+            if stale := self.cache.get_page(key, stale=True):
+                return stale
+            raise
+
+        if response:
+            page = build_places_page(
+                response.get("placesConnection") or {},
+                validate=self._config.validate_responses,
+            )
+            self.cache.set_page(page, key)
+
+            return page
 
         return None
 
-    def create(self, latitude: float, longitude: float, description: str) -> bool:
+    def create(
+        self,
+        latitude: float,
+        longitude: float,
+        description: str,
+        user_id: Optional[int] = None,
+    ) -> bool:
         """
         Создание нового объекта любимого места.
 
         :param latitude: Широта.
         :param longitude: Долгота.
         :param description: Описание.
+        :param user_id: Идентификатор пользователя Telegram (владельца места).
         :return:
         """
 
-        # формирование GraphQL-запроса
-        query = gql(
-            """
-            mutation createPlace($latitude: Float!, $longitude: Float!, $description: String!) {
-                createPlace(latitude: $latitude, longitude: $longitude, description: $description) {
-                    result
-                }
-            }
-            """
-        )
         variables = {
             "latitude": latitude,
             "longitude": longitude,
             "description": description,
+            "userId": user_id,
         }
-        if response := self._request(query, variables=variables):
+        if response := self._request(CREATE_PLACE, variables=variables):
             # todo: добавить обработку исключений
-            result = response.get("createPlace", {}).get("result")
+            payload = response.get("createPlace") or {}
+            # новое место сразу появляется в индексах мест пользователя
+            self.cache.add_user_places(
+                user_id,
+                build_created_places(
+                    [payload], validate=self._config.validate_responses
+                ),
+            )
 
-            return result
+            return bool(payload.get("result"))
 
         return False
 
+    def create_many(
+        self, places: list[NewPlaceDTO], user_id: Optional[int] = None
+    ) -> int:
+        """
+        Создание нескольких мест одним запросом.
+
+        :param places: Создаваемые места (не больше `CREATE_PLACES_BATCH.max_size`).
+        :param user_id: Идентификатор пользователя Telegram (владельца мест).
+        :return: Количество созданных мест.
+        """
+
+        result = self._execute(
+            CREATE_PLACES_BATCH[len(places)],
+            build_create_places_variables(places, user_id),
+        )
+        # новые места сразу появляются в индексах мест пользователя
+        data = result.data or {}
+        self.cache.add_user_places(
+            user_id,
+            build_created_places(
+                (data.get(f"c{index}") for index in range(len(places))),
+                validate=self._config.validate_responses,
+            ),
+        )
+
+        return count_created_places(result, len(places))
+
+    def iter_user_places(self, user_id: int, page_size: int) -> Iterator[PlaceBatch]:
+        """
+        Получение всех мест пользователя постранично (без кеширования).
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param page_size: Количество мест, запрашиваемых за один раз.
+        :return: Страницы мест.
+        """
+
+        for items in self._user_place_pages(user_id, page_size):
+            yield build_places(items, validate=self._config.validate_responses)
+
+    def _user_place_pages(self, user_id: int, page_size: int) -> Iterator[list[dict]]:
+        """
+        Получение данных всех мест пользователя постранично.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param page_size: Количество мест, запрашиваемых за один раз.
+        :return: Данные мест каждой страницы.
+        """
+
+        after = None
+        while True:
+            response = self._request(
+                GET_USER_PLACES_PAGE,
+                variables={"userId": user_id, "first": page_size, "after": after},
+            )
+            connection = response.get("placesConnection") or {}
+            yield [
+                edge["node"]
+                for edge in connection.get("edges") or []
+                if edge and edge.get("node")
+            ]
+
+            page_info = connection.get("pageInfo") or {}
+            after = page_info.get("endCursor")
+            if not page_info.get("hasNextPage") or not after:
+                break
+
     def delete(self, place_id: str) -> bool:
         """
         Удаление объекта любимого места по его идентификатору.
@@ -155,21 +664,17 @@ class GatewayClient(BaseClient):
         :return:
         """
 
-        # формирование GraphQL-запроса
-        query = gql(
-            """
-            mutation deletePlace($placeId: Int!) {
-                deletePlace(placeId: $placeId) {
-                    result
-                }
-            }
-            """
-        )
-        variables = {"placeId": place_id}
-        if response := self._request(query, variables=variables):
+        # идентификатор места в мутации удаления имеет тип `Int!`
+        variables = {"placeId": int(place_id)}
+        if response := self._request(DELETE_PLACE, variables=variables):
             # todo: добавить обработку исключений
             result = response.get("deletePlace", {}).get("result")
+            self.cache.invalidate_place(place_id)
 
             return result
 
         return False
+
+
+# инициализация клиента GraphQL-шлюза (общий для всех обработчиков)
+gateway_client = GatewayClient()
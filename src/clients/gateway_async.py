@@ -0,0 +1,522 @@
+"""
+Асинхронный клиент GraphQL-шлюза для обработки обновлений в цикле событий asyncio.
+"""
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Optional
+
+from graphql import ExecutionResult, GraphQLSchema
+
+from clients.batching import PlaceBatchLoader
+from clients.cache import PlaceCache, UserPlaces, place_cache
+from clients.gateway import (
+    INTROSPECTION_QUERY,
+    build_create_places_variables,
+    build_created_places,
+    build_introspected_schema,
+    build_place,
+    build_places,
+    build_places_page,
+    count_created_places,
+    get_result_data,
+    read_schema,
+)
+from clients.operations import (
+    CREATE_PLACE,
+    CREATE_PLACES_BATCH,
+    DELETE_PLACE,
+    GET_PLACE,
+    GET_PLACES_PAGE,
+    GET_USER_PLACES_PAGE,
+    Operation,
+    operations,
+)
+from clients.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    GatewayUnavailableError,
+    RetryPolicy,
+    is_retryable,
+)
+from clients.shemas import NewPlaceDTO, PlaceBatch, PlaceDTO, PlacesPageDTO
+from clients.spatial import PlaceDistance
+from clients.transport import PooledAIOHTTPTransport
+from metrics.instruments import track_operation
+from settings import Gateway, settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGatewayClient:
+    """
+    Реализация асинхронных функций для взаимодействия с GraphQL-шлюзом.
+
+    Все методы должны вызываться из одного цикла событий.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        config: Optional[Gateway] = None,
+        cache: Optional[PlaceCache] = None,
+    ):
+        """
+        Конструктор.
+
+        :param url: Адрес GraphQL-шлюза (по умолчанию – из настроек).
+        :param config: Конфигурация клиента (по умолчанию – из настроек).
+        :param cache: Кеш мест (по умолчанию – общий для процесса).
+        """
+
+        self._url = url or settings.gateway_url
+        self._config = config or settings.gateway
+        self.cache = cache or place_cache
+        # объединение одновременных запросов мест в один запрос к шлюзу
+        self.loader: Optional[PlaceBatchLoader] = None
+        if self._config.batch_window > 0:
+            self.loader = PlaceBatchLoader(
+                self._execute,
+                self._config.batch_window,
+                self._config.batch_max_size,
+                validate=self._config.validate_responses,
+            )
+        self._lock: Optional[asyncio.Lock] = None
+        # загрузки мест пользователей (одна загрузка на пользователя)
+        self._user_places_tasks: dict[int, asyncio.Task] = {}
+        self._transport: Optional[PooledAIOHTTPTransport] = None
+        self._schema: Optional[GraphQLSchema] = None
+        self.breaker = CircuitBreaker(
+            "gateway-async",
+            failure_threshold=self._config.breaker_failures,
+            reset_timeout=self._config.breaker_reset_timeout,
+        )
+        self.retry_policy = RetryPolicy(
+            retries=self._config.retries,
+            backoff_base=self._config.backoff_base,
+            backoff_max=self._config.backoff_max,
+            deadline=self._config.deadline,
+        )
+
+    @property
+    def base_url(self) -> str:
+        """
+        Получение базового URL для запросов.
+
+        :return:
+        """
+
+        return self._url
+
+    async def connect(self) -> None:
+        """
+        Установка соединения с шлюзом, загрузка схемы GraphQL
+        и проверка по ней всех операций из реестра.
+
+        :return:
+        """
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._transport is not None:
+                return
+
+            transport = PooledAIOHTTPTransport(
+                url=self.base_url,
+                pool_size=self._config.pool_size,
+                connect_timeout=self._config.connect_timeout,
+                read_timeout=self._config.read_timeout,
+                persisted_queries=self._config.persisted_queries,
+            )
+            await transport.connect()
+            try:
+                if self._config.schema_path:
+                    schema = read_schema(self._config.schema_path)
+                else:
+                    schema = build_introspected_schema(
+                        await transport.execute(INTROSPECTION_QUERY)
+                    )
+                operations.validate(schema)
+            except Exception:
+                await transport.close()
+                raise
+
+            self._schema = schema
+            self._transport = transport
+            logger.info("Connected to GraphQL gateway %s (asyncio)", self.base_url)
+
+    async def close(self) -> None:
+        """
+        Закрытие соединений с шлюзом.
+
+        :return:
+        """
+
+        if self._transport is not None:
+            await self._transport.close()
+        self._transport = None
+
+    async def _execute(
+        self, query: Operation, variables: Optional[dict] = None
+    ) -> ExecutionResult:
+        """
+        Выполнение запроса с получением полного результата (включая ошибки)
+        и повторами при недоступности шлюза.
+
+        Пока автоматический выключатель разомкнут, запросы отклоняются сразу.
+
+        :param query: Операция для выполнения.
+        :param variables: Значения переменных операции.
+        :return:
+        """
+
+        deadline = time.monotonic() + self.retry_policy.deadline
+        timeout = self._config.operation_timeouts.get(
+            query.name, self._config.read_timeout
+        )
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"Gateway circuit is open, {query.name} rejected."
+                )
+
+            try:
+                if self._transport is None:
+                    await self.connect()
+
+                with track_operation(query.name):
+                    result = await self._transport.execute_operation(  # type: ignore
+                        query,
+                        variable_values=variables,
+                        timeout=self.retry_policy.timeout(timeout, deadline),
+                    )
+            except Exception as exception:
+                if not is_retryable(exception):
+                    # шлюз ответил, но запрос выполнить нельзя
+                    self.breaker.record_success()
+                    raise
+
+                self.breaker.record_failure()
+                delay = self.retry_policy.backoff(
+                    attempt, exception, deadline, query.is_mutation
+                )
+                if delay is None or self.breaker.state == CircuitState.OPEN:
+                    raise GatewayUnavailableError(
+                        f"Gateway is unavailable, {query.name} failed."
+                    ) from exception
+
+                logger.warning(
+                    "Gateway request %s failed (%s), retrying in %.2fs",
+                    query.name,
+                    exception,
+                    delay,
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+
+                return result
+
+    async def _request(
+        self, query: Operation, variables: Optional[dict] = None
+    ) -> dict:
+        """
+        Формирование и выполнение запроса.
+
+        :param query: Операция для выполнения.
+        :param variables: Значения переменных операции.
+        :return:
+        """
+
+        return get_result_data(await self._execute(query, variables))
+
+    async def get_place(self, place_id: str) -> Optional[PlaceDTO]:
+        """
+        Получение объекта любимого места по его идентификатору.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        if cached := self.cache.get_place(place_id):
+            return cached
+
+        try:
+            if self.loader:
+                if place := await self.loader.load(place_id):
+                    self.cache.set_place(place)
+
+                return place
+
+            variables = {"placeId": place_id}
+            response = await self._request(GET_PLACE, variables=variables)
+        except GatewayUnavailableError:
+            # при недоступности шлюза выдается устаревшая запись из кеша
+            if stale := self.cache.get_place(place_id, stale=True):
+                return stale
+            raise
+
+        if response:
+            place = build_place(
+                response["place"], validate=self._config.validate_responses
+            )
+            self.cache.set_place(place)
+
+            return place
+
+        return None
+
+    async def get_user_places(self, user_id: int) -> UserPlaces:
+        """
+        Получение индексов всех мест пользователя.
+
+        Одновременные запросы мест одного пользователя ожидают одной загрузки.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :return:
+        """
+
+        if (cached := self.cache.get_user_places(user_id)) is not None:
+            return cached
+
+        if (task := self._user_places_tasks.get(user_id)) is None:
+            task = asyncio.create_task(self._load_user_places(user_id))
+            self._user_places_tasks[user_id] = task
+            task.add_done_callback(
+                lambda task: self._user_places_tasks.pop(user_id, None)
+            )
+
+        # отмена ожидания одним из обработчиков не должна отменять загрузку для остальных
+        return await asyncio.shield(task)
+
+    async def _load_user_places(self, user_id: int) -> UserPlaces:
+        """
+        Загрузка всех мест пользователя от шлюза и формирование их индексов.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :return:
+        """
+
+        items: list[dict] = []
+        try:
+            async for page in self._user_place_pages(
+                user_id, self._config.places_page_size
+            ):
+                items.extend(page)
+        except GatewayUnavailableError:
+            # при недоступности шлюза выдается устаревшая запись из кеша
+            if (stale := self.cache.get_user_places(user_id, stale=True)) is not None:
+                return stale
+            raise
+
+        return self.cache.set_user_places(
+            user_id, build_places(items, validate=self._config.validate_responses)
+        )
+
+    async def get_nearby_places(
+        self, user_id: int, latitude: float, longitude: float, limit: int, radius: float
+    ) -> list[PlaceDistance]:
+        """
+        Получение ближайших к точке любимых мест пользователя.
+
+        Места ищутся по пространственному индексу мест пользователя.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param latitude: Широта точки.
+        :param longitude: Долгота точки.
+        :param limit: Максимальное количество мест.
+        :param radius: Радиус поиска (в километрах).
+        :return: Места и расстояния до них в порядке возрастания расстояния.
+        """
+
+        return (await self.get_user_places(user_id)).index.nearest(
+            latitude, longitude, limit, radius
+        )
+
+    async def search_places(
+        self, user_id: int, query: str, limit: int
+    ) -> list[PlaceDTO]:
+        """
+        Поиск любимых мест пользователя по началу слов описания, города и местонахождения.
+
+        Места ищутся по текстовому индексу мест пользователя, поэтому запрос к шлюзу
+        выполняется только при устаревании индекса.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param query: Текст запроса.
+        :param limit: Максимальное количество мест.
+        :return:
+        """
+
+        return (await self.get_user_places(user_id)).search_index.search(query, limit)
+
+    async def get_places_page(
+        self, user_id: int, first: int, after: Optional[str] = None
+    ) -> Optional[PlacesPageDTO]:
+        """
+        Получение страницы списка любимых мест пользователя.
+
+        Запрашиваются только поля, необходимые для меню списка.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param first: Количество мест на странице.
+        :param after: Курсор, после которого начинается страница.
+        :return:
+        """
+
+        key = (user_id, first, after)
+        if cached := self.cache.get_page(key):
+            return cached
+
+        variables = {"userId": user_id, "first": first, "after": after}
+        try:
+            response = await self._request(GET_PLACES_PAGE, variables=variables)
+        except GatewayUnavailableError:
+            # при недоступности шлюза выдается устаревшая запись из кеша
+            if stale := self.cache.get_page(key, stale=True):
+                return stale
+            raise
+
+        if response:
+            page = build_places_page(
+                response.get("placesConnection") or {},
+                validate=self._config.validate_responses,
+            )
+            self.cache.set_page(page, key)
+
+            return page
+
+        return None
+
+    async def create(
+        self,
+        latitude: float,
+        longitude: float,
+        description: str,
+        user_id: Optional[int] = None,
+    ) -> bool:
+        """
+        Создание нового объекта любимого места.
+
+        :param latitude: Широта.
+        :param longitude: Долгота.
+        :param description: Описание.
+        :param user_id: Идентификатор пользователя Telegram (владельца места).
+        :return:
+        """
+
+        variables = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "description": description,
+            "userId": user_id,
+        }
+        if response := await self._request(CREATE_PLACE, variables=variables):
+            payload = response.get("createPlace") or {}
+            # новое место сразу появляется в индексах мест пользователя
+            self.cache.add_user_places(
+                user_id,
+                build_created_places(
+                    [payload], validate=self._config.validate_responses
+                ),
+            )
+
+            return bool(payload.get("result"))
+
+        return False
+
+    async def create_many(
+        self, places: list[NewPlaceDTO], user_id: Optional[int] = None
+    ) -> int:
+        """
+        Создание нескольких мест одним запросом.
+
+        :param places: Создаваемые места (не больше `CREATE_PLACES_BATCH.max_size`).
+        :param user_id: Идентификатор пользователя Telegram (владельца мест).
+        :return: Количество созданных мест.
+        """
+
+        result = await self._execute(
+            CREATE_PLACES_BATCH[len(places)],
+            build_create_places_variables(places, user_id),
+        )
+        # новые места сразу появляются в индексах мест пользователя
+        data = result.data or {}
+        self.cache.add_user_places(
+            user_id,
+            build_created_places(
+                (data.get(f"c{index}") for index in range(len(places))),
+                validate=self._config.validate_responses,
+            ),
+        )
+
+        return count_created_places(result, len(places))
+
+    async def iter_user_places(
+        self, user_id: int, page_size: int
+    ) -> AsyncIterator[PlaceBatch]:
+        """
+        Получение всех мест пользователя постранично (без кеширования).
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param page_size: Количество мест, запрашиваемых за один раз.
+        :return: Страницы мест.
+        """
+
+        async for items in self._user_place_pages(user_id, page_size):
+            yield build_places(items, validate=self._config.validate_responses)
+
+    async def _user_place_pages(
+        self, user_id: int, page_size: int
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Получение данных всех мест пользователя постранично.
+
+        :param user_id: Идентификатор пользователя Telegram.
+        :param page_size: Количество мест, запрашиваемых за один раз.
+        :return: Данные мест каждой страницы.
+        """
+
+        after = None
+        while True:
+            response = await self._request(
+                GET_USER_PLACES_PAGE,
+                variables={"userId": user_id, "first": page_size, "after": after},
+            )
+            connection = response.get("placesConnection") or {}
+            yield [
+                edge["node"]
+                for edge in connection.get("edges") or []
+                if edge and edge.get("node")
+            ]
+
+            page_info = connection.get("pageInfo") or {}
+            after = page_info.get("endCursor")
+            if not page_info.get("hasNextPage") or not after:
+                break
+
+    async def delete(self, place_id: str) -> bool:
+        """
+        Удаление объекта любимого места по его идентификатору.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        # идентификатор места в мутации удаления имеет тип `Int!`
+        variables = {"placeId": int(place_id)}
+        if response := await self._request(DELETE_PLACE, variables=variables):
+            self.cache.invalidate_place(place_id)
+
+            return response.get("deletePlace", {}).get("result")
+
+        return False
+
+
+# инициализация асинхронного клиента GraphQL-шлюза (общий для всех обработчиков)
+async_gateway_client = AsyncGatewayClient()
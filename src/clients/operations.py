@@ -0,0 +1,387 @@
+"""
+Реестр GraphQL-операций, используемых клиентом шлюза.
+
+Тексты операций разбираются однократно при импорте модуля
+и проверяются по схеме шлюза при подключении клиента.
+Операции объединенных запросов мест разбираются при первом обращении,
+но операции наименьшего и наибольшего размера проверяются при подключении.
+"""
+import hashlib
+import threading
+from typing import Callable, Iterator, Mapping, Optional
+
+from gql import gql
+from graphql import (
+    DocumentNode,
+    GraphQLSchema,
+    OperationDefinitionNode,
+    OperationType,
+    print_ast,
+    validate,
+)
+
+from settings import settings
+
+
+class OperationValidationError(Exception):
+    """
+    Операция не соответствует схеме GraphQL-шлюза.
+    """
+
+
+class Operation:
+    """
+    Разобранная GraphQL-операция.
+    """
+
+    def __init__(self, name: str, document: DocumentNode):
+        """
+        Конструктор.
+
+        :param name: Название операции.
+        :param document: Разобранный документ операции.
+        """
+
+        self.name = name
+        self.document = document
+        #: нормализованный текст операции для отправки шлюзу
+        self.query = print_ast(document)
+        #: хеш текста операции для автоматически сохраняемых запросов (APQ)
+        self.sha256 = hashlib.sha256(self.query.encode("utf-8")).hexdigest()
+        #: операция изменяет данные (мутация)
+        self.is_mutation = any(
+            isinstance(definition, OperationDefinitionNode)
+            and definition.operation == OperationType.MUTATION
+            for definition in document.definitions
+        )
+
+
+class OperationRegistry:
+    """
+    Реестр GraphQL-операций.
+
+    Операции могут регистрироваться из потоков обработчиков (операции объединенных запросов),
+    поэтому реестр защищен блокировкой.
+    """
+
+    def __init__(self) -> None:
+        """
+        Конструктор.
+        """
+
+        self._operations: dict[str, Operation] = {}
+        # операции объединенных запросов (проверяются при подключении по крайним размерам)
+        self._batches: list["BatchOperations"] = []
+        # схема, по которой проверяются операции, зарегистрированные после подключения
+        self._schema: Optional[GraphQLSchema] = None
+        # повторно входимая: регистрация выполняется и внутри проверки
+        self._lock = threading.RLock()
+
+    def register(self, name: str, source: str) -> Operation:
+        """
+        Разбор и регистрация операции.
+
+        :param name: Название операции (должно совпадать с названием в тексте).
+        :param source: Текст операции.
+        :return:
+        """
+
+        with self._lock:
+            if name in self._operations:
+                raise ValueError(f"Operation {name} is already registered.")
+
+            operation = Operation(name, gql(source))
+            if self._schema is not None:
+                self._validate_operation(self._schema, operation)
+            self._operations[name] = operation
+
+        return operation
+
+    def get_or_register(self, name: str, build: Callable[[], str]) -> Operation:
+        """
+        Получение операции или ее регистрация, если она еще не зарегистрирована.
+
+        :param name: Название операции.
+        :param build: Функция формирования текста операции.
+        :return:
+        """
+
+        with self._lock:
+            if (operation := self._operations.get(name)) is None:
+                operation = self.register(name, build())
+
+        return operation
+
+    def add_batch(self, batch: "BatchOperations") -> None:
+        """
+        Добавление операций объединенных запросов для проверки при подключении.
+
+        :param batch: Операции объединенных запросов.
+        :return:
+        """
+
+        with self._lock:
+            self._batches.append(batch)
+
+    def validate(self, schema: GraphQLSchema) -> None:
+        """
+        Проверка всех зарегистрированных операций по схеме GraphQL,
+        а также операций объединенных запросов наименьшего и наибольшего размера.
+
+        :param schema: Схема GraphQL-шлюза.
+        :return:
+        """
+
+        with self._lock:
+            previous, self._schema = self._schema, schema
+            try:
+                for operation in list(self._operations.values()):
+                    self._validate_operation(schema, operation)
+                # операции регистрируются (и проверяются по новой схеме) при обращении
+                for batch in list(self._batches):
+                    for size in {1, batch.max_size}:
+                        batch[size]  # pylint: disable=pointless-statement
+            except Exception:
+                self._schema = previous
+                raise
+
+    @staticmethod
+    def _validate_operation(schema: GraphQLSchema, operation: Operation) -> None:
+        """
+        Проверка операции по схеме GraphQL.
+
+        :param schema: Схема GraphQL-шлюза.
+        :param operation: Операция.
+        :return:
+        """
+
+        if errors := validate(schema, operation.document):
+            raise OperationValidationError(
+                f"Operation {operation.name} is invalid: "
+                + "; ".join(error.message for error in errors)
+            )
+
+    def __getitem__(self, name: str) -> Operation:
+        return self._operations[name]
+
+    def __iter__(self) -> Iterator[Operation]:
+        with self._lock:
+            return iter(list(self._operations.values()))
+
+
+# реестр операций GraphQL-шлюза
+operations = OperationRegistry()
+
+GET_PLACE = operations.register(
+    "getPlace",
+    """
+    query getPlace($placeId: ID!) {
+        place(placeId: $placeId) {
+            id
+            latitude
+            longitude
+            description
+            city
+            locality
+        }
+    }
+    """,
+)
+
+GET_PLACES_PAGE = operations.register(
+    "getPlacesPage",
+    """
+    query getPlacesPage($userId: ID!, $first: Int!, $after: String) {
+        placesConnection(userId: $userId, first: $first, after: $after) {
+            edges {
+                node {
+                    id
+                    city
+                    locality
+                }
+            }
+            pageInfo {
+                endCursor
+                hasNextPage
+            }
+        }
+    }
+    """,
+)
+
+
+# все поля мест пользователя (для экспорта и индексов поиска)
+GET_USER_PLACES_PAGE = operations.register(
+    "getUserPlacesPage",
+    """
+    query getUserPlacesPage($userId: ID!, $first: Int!, $after: String) {
+        placesConnection(userId: $userId, first: $first, after: $after) {
+            edges {
+                node {
+                    id
+                    latitude
+                    longitude
+                    description
+                    city
+                    locality
+                }
+            }
+            pageInfo {
+                endCursor
+                hasNextPage
+            }
+        }
+    }
+    """,
+)
+
+
+# поля места, запрашиваемые для его просмотра
+PLACE_FIELDS = "id latitude longitude description city locality"
+
+
+def build_places_batch_query(size: int) -> str:
+    """
+    Формирование текста операции для получения нескольких мест одним запросом.
+
+    Каждое место запрашивается отдельным полем `place` с псевдонимом `p<N>`.
+
+    :param size: Количество мест в запросе.
+    :return:
+    """
+
+    variables = ", ".join(f"$id{index}: ID!" for index in range(size))
+    fields = " ".join(
+        f"p{index}: place(placeId: $id{index}) {{ {PLACE_FIELDS} }}"
+        for index in range(size)
+    )
+
+    return f"query getPlacesBatch{size}({variables}) {{ {fields} }}"
+
+
+def build_create_places_batch_mutation(size: int) -> str:
+    """
+    Формирование текста мутации для создания нескольких мест одним запросом.
+
+    Каждое место создается отдельным полем `createPlace` с псевдонимом `c<N>`.
+
+    :param size: Количество мест в запросе.
+    :return:
+    """
+
+    variables = ", ".join(
+        f"$latitude{index}: Float!, $longitude{index}: Float!, $description{index}: String!"
+        for index in range(size)
+    )
+    fields = " ".join(
+        f"c{index}: createPlace(latitude: $latitude{index}, longitude: $longitude{index}, "
+        f"description: $description{index}, userId: $userId) "
+        f"{{ result place {{ {PLACE_FIELDS} }} }}"
+        for index in range(size)
+    )
+
+    return f"mutation createPlacesBatch{size}({variables}, $userId: ID) {{ {fields} }}"
+
+
+class BatchOperations(Mapping[int, Operation]):
+    """
+    Операции для нескольких мест по количеству мест в запросе.
+
+    Операция разбирается и регистрируется при первом обращении к ней,
+    чтобы не замедлять импорт модуля разбором операций, которые могут не понадобиться.
+    Операции наименьшего и наибольшего размера проверяются при подключении клиента
+    (см. `OperationRegistry.validate`), поэтому несовместимая схема обнаруживается при запуске.
+    """
+
+    def __init__(
+        self,
+        registry: OperationRegistry,
+        name: str,
+        build: Callable[[int], str],
+        max_size: int,
+    ):
+        """
+        Конструктор.
+
+        :param registry: Реестр операций.
+        :param name: Префикс названия операции (к нему добавляется количество мест).
+        :param build: Функция формирования текста операции по количеству мест.
+        :param max_size: Максимальное количество мест в одном запросе.
+        """
+
+        self.registry = registry
+        self.name = name
+        self.build = build
+        self.max_size = max_size
+        self._operations: dict[int, Operation] = {}
+        registry.add_batch(self)
+
+    def __getitem__(self, size: int) -> Operation:
+        if not 1 <= size <= self.max_size:
+            raise KeyError(size)
+
+        if (operation := self._operations.get(size)) is None:
+            # регистрация выполняется под блокировкой реестра (однократно для размера)
+            operation = self.registry.get_or_register(
+                f"{self.name}{size}", lambda: self.build(size)
+            )
+            self._operations[size] = operation
+
+        return operation
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(1, self.max_size + 1))
+
+    def __len__(self) -> int:
+        return self.max_size
+
+
+# операции получения нескольких мест по количеству мест в запросе
+GET_PLACES_BATCH = BatchOperations(
+    operations,
+    "getPlacesBatch",
+    build_places_batch_query,
+    settings.gateway.batch_max_size,
+)
+
+# операции создания нескольких мест по количеству мест в запросе (для импорта)
+CREATE_PLACES_BATCH = BatchOperations(
+    operations,
+    "createPlacesBatch",
+    build_create_places_batch_mutation,
+    settings.transfer.chunk_size,
+)
+
+CREATE_PLACE = operations.register(
+    "createPlace",
+    """
+    mutation createPlace(
+        $latitude: Float!, $longitude: Float!, $description: String!, $userId: ID
+    ) {
+        createPlace(
+            latitude: $latitude, longitude: $longitude, description: $description, userId: $userId
+        ) {
+            result
+            place {
+                id
+                latitude
+                longitude
+                description
+                city
+                locality
+            }
+        }
+    }
+    """,
+)
+
+DELETE_PLACE = operations.register(
+    "deletePlace",
+    """
+    mutation deletePlace($placeId: Int!) {
+        deletePlace(placeId: $placeId) {
+            result
+        }
+    }
+    """,
+)
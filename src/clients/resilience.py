@@ -0,0 +1,285 @@
+"""
+Защита обработчиков от недоступности GraphQL-шлюза:
+автоматический выключатель (circuit breaker) и повторы с ограничением по времени.
+"""
+import asyncio
+import enum
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import aiohttp
+import requests
+from gql.transport.exceptions import TransportProtocolError, TransportServerError
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayUnavailableError(Exception):
+    """
+    Шлюз недоступен (попытки исчерпаны или время ожидания истекло).
+    """
+
+
+class CircuitOpenError(GatewayUnavailableError):
+    """
+    Запрос отклонен без обращения к шлюзу, так как выключатель разомкнут.
+    """
+
+
+class CircuitState(enum.IntEnum):
+    """
+    Состояние выключателя.
+    """
+
+    #: запросы выполняются
+    CLOSED = 0
+    #: выполняется пробный запрос после паузы
+    HALF_OPEN = 1
+    #: запросы отклоняются
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель.
+
+    После `failure_threshold` ошибок подряд запросы отклоняются в течение
+    `reset_timeout` секунд, затем выполняется один пробный запрос:
+    при его успехе выключатель замыкается, при ошибке – снова размыкается.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Конструктор.
+
+        :param name: Название выключателя (для журнала и метрик).
+        :param failure_threshold: Количество ошибок подряд для размыкания.
+        :param reset_timeout: Время до пробного запроса (в секундах).
+        :param clock: Источник времени.
+        """
+
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        #: количество размыканий
+        self.opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """
+        Текущее состояние выключателя.
+
+        :return:
+        """
+
+        with self._lock:
+            if (
+                self._state == CircuitState.OPEN
+                and self._clock() - self._opened_at >= self.reset_timeout
+            ):
+                return CircuitState.HALF_OPEN
+
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Проверка, можно ли выполнить запрос.
+
+        :return:
+        """
+
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return True
+
+            if self._state == CircuitState.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = CircuitState.HALF_OPEN
+                self._trial = False
+
+            # в полуоткрытом состоянии допускается только один пробный запрос
+            if self._trial:
+                return False
+            self._trial = True
+
+            return True
+
+    def record_success(self) -> None:
+        """
+        Учет успешного запроса.
+
+        :return:
+        """
+
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                logger.info("Circuit %s is closed", self.name)
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """
+        Учет ошибки запроса.
+
+        :return:
+        """
+
+        with self._lock:
+            self._failures += 1
+            if self._state == CircuitState.HALF_OPEN or (
+                self._state == CircuitState.CLOSED
+                and self._failures >= self.failure_threshold
+            ):
+                if self._state == CircuitState.CLOSED:
+                    logger.warning("Circuit %s is open", self.name)
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+                self._trial = False
+                self.opened += 1
+
+
+class RetryPolicy:
+    """
+    Повторы запросов с экспоненциальной задержкой и случайным разбросом (full jitter)
+    в пределах общего времени на запрос.
+    """
+
+    def __init__(
+        self,
+        retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        deadline: float,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Конструктор.
+
+        :param retries: Количество повторных попыток.
+        :param backoff_base: Базовая задержка перед повтором (в секундах).
+        :param backoff_max: Максимальная задержка перед повтором (в секундах).
+        :param deadline: Общее время на запрос с учетом повторов (в секундах).
+        :param rng: Генератор случайных чисел.
+        """
+
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """
+        Задержка перед повтором.
+
+        :param attempt: Номер неудачной попытки (начиная с 0).
+        :return:
+        """
+
+        return self._rng.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2**attempt)
+        )
+
+    def timeout(self, timeout: float, deadline: float) -> float:
+        """
+        Таймаут попытки с учетом оставшегося времени на запрос.
+
+        :param timeout: Таймаут ожидания ответа операции (в секундах).
+        :param deadline: Момент истечения времени на запрос (`time.monotonic`).
+        :return:
+        """
+
+        return max(0.001, min(timeout, deadline - time.monotonic()))
+
+    def backoff(
+        self,
+        attempt: int,
+        exception: BaseException,
+        deadline: float,
+        mutation: bool = False,
+    ) -> Optional[float]:
+        """
+        Задержка перед следующей попыткой.
+
+        Изменяющие операции повторяются, только если запрос не был доставлен шлюзу.
+
+        :param attempt: Номер неудачной попытки (начиная с 0).
+        :param exception: Ошибка попытки.
+        :param deadline: Момент истечения времени на запрос (`time.monotonic`).
+        :param mutation: Операция изменяет данные.
+        :return: Задержка или `None`, если повтор невозможен.
+        """
+
+        if attempt >= self.retries or (mutation and not is_connection_error(exception)):
+            return None
+
+        delay = self.delay(attempt)
+        if time.monotonic() + delay >= deadline:
+            return None
+
+        return delay
+
+
+def is_connection_error(exception: BaseException) -> bool:
+    """
+    Проверка, что запрос не был доставлен шлюзу (его можно безопасно повторить).
+
+    Недоставленным считается только запрос, для которого не удалось установить соединение.
+    Разрыв соединения (`Connection aborted`) возможен после отправки запроса,
+    поэтому изменение данных могло быть выполнено.
+
+    :param exception: Исключение.
+    :return:
+    """
+
+    if isinstance(exception, requests.ConnectTimeout):
+        return True
+    if isinstance(exception, requests.ConnectionError):
+        reason = exception.args[0] if exception.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+
+        # `NewConnectionError` – ошибка установки соединения (наследует `ConnectTimeoutError`)
+        return isinstance(reason, ConnectTimeoutError)
+
+    return isinstance(exception, aiohttp.ClientConnectorError)
+
+
+def is_retryable(exception: BaseException) -> bool:
+    """
+    Проверка, что ошибка вызвана недоступностью шлюза (а не ошибкой в запросе).
+
+    :param exception: Исключение.
+    :return:
+    """
+
+    if isinstance(exception, TransportServerError):
+        return exception.code is None or exception.code >= 500
+
+    return isinstance(
+        exception,
+        (
+            requests.RequestException,
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            TransportProtocolError,
+        ),
+    )
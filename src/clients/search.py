@@ -0,0 +1,244 @@
+"""
+Текстовый индекс любимых мест для поиска по началу слов.
+"""
+import bisect
+import heapq
+import re
+import threading
+from collections import Counter
+from typing import Any, Iterable, NamedTuple, Optional, Sequence
+
+from clients.shemas import PlaceBatch, PlaceDTO
+
+# слова текста (буквы и цифры)
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """
+    Разбиение текста на слова в нормализованном виде (нижний регистр, «ё» как «е»).
+
+    :param text: Текст.
+    :return:
+    """
+
+    if not text:
+        return []
+
+    return WORD_PATTERN.findall(text.casefold().replace("ё", "е"))
+
+
+class SearchEntry(NamedTuple):
+    """
+    Место в текстовом индексе.
+    """
+
+    #: индексируемые поля места (для пропуска неизмененных мест)
+    fields: tuple[str, Optional[str], Optional[str]]
+    #: слова полей места
+    tokens: frozenset[str]
+    #: список, содержащий место, и номер места в нем
+    source: Sequence[PlaceDTO]
+    row: int
+
+
+class PlaceSearchIndex:
+    """
+    Индекс мест по словам описания, города и местонахождения.
+
+    Для каждого слова хранятся идентификаторы мест, а отсортированный словарь слов
+    позволяет найти все слова с заданным началом двоичным поиском.
+    Место найдено, если каждое слово запроса является началом одного из его слов.
+    Индекс обновляется поштучно при добавлении и удалении мест.
+    """
+
+    def __init__(self) -> None:
+        """
+        Конструктор.
+        """
+
+        self._entries: dict[int, SearchEntry] = {}
+        self._postings: dict[str, set[int]] = {}
+        # отсортированный словарь слов (формируется заново после массового обновления)
+        self._words: list[str] = []
+        self._sorted = True
+        self._lock = threading.Lock()
+
+    def add(self, place: PlaceDTO) -> None:
+        """
+        Добавление места в индекс (или обновление его полей).
+
+        :param place: Объект места.
+        :return:
+        """
+
+        with self._lock:
+            self._add(
+                place.id,
+                (place.description, place.city, place.locality),
+                (place,),
+                0,
+            )
+
+    def remove(self, place_id: Any) -> None:
+        """
+        Удаление места из индекса.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        with self._lock:
+            self._remove(int(place_id))
+
+    def update(self, places: Sequence[PlaceDTO]) -> None:
+        """
+        Приведение индекса к полному списку мест.
+
+        Слова пересчитываются только для новых и измененных мест.
+        Поля компактного списка мест (`PlaceBatch`) читаются без создания объектов мест.
+
+        :param places: Полный список мест.
+        :return:
+        """
+
+        rows: Iterable[tuple[int, str, Optional[str], Optional[str]]]
+        if isinstance(places, PlaceBatch):
+            rows = zip(
+                places.ids, places.descriptions, places.cities, places.localities
+            )
+        else:
+            rows = (
+                (place.id, place.description, place.city, place.locality)
+                for place in places
+            )
+
+        with self._lock:
+            # словарь слов сортируется один раз после всех изменений
+            self._sorted = False
+            seen = set()
+            for row, (place_id, description, city, locality) in enumerate(rows):
+                seen.add(place_id)
+                self._add(place_id, (description, city, locality), places, row)
+            for place_id in self._entries.keys() - seen:
+                self._remove(place_id)
+            self._sort()
+
+    def search(self, query: str, limit: int) -> list[PlaceDTO]:
+        """
+        Поиск мест, слова которых начинаются со слов запроса.
+
+        Выше в результатах места, в которых больше слов запроса совпадает со словами целиком,
+        далее – более новые места.
+
+        :param query: Текст запроса.
+        :param limit: Максимальное количество мест.
+        :return:
+        """
+
+        # длинные слова запроса выбирают меньше мест, поэтому проверяются первыми
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms:
+            return []
+
+        with self._lock:
+            candidates = self._match(terms[0])
+            for term in terms[1:]:
+                if not candidates:
+                    break
+                candidates &= self._match(term)
+
+            exact: Counter[int] = Counter()
+            for term in terms:
+                exact.update(self._postings.get(term, set()) & candidates)
+
+            entries = [
+                self._entries[place_id]
+                for place_id in heapq.nlargest(
+                    limit, candidates, key=lambda place_id: (exact[place_id], place_id)
+                )
+            ]
+
+        return [entry.source[entry.row] for entry in entries]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _match(self, prefix: str) -> set[int]:
+        """
+        Получение мест, одно из слов которых начинается с заданного (вызывается под блокировкой).
+
+        :param prefix: Начало слова.
+        :return:
+        """
+
+        words = self._words
+        matched: set[int] = set()
+        for position in range(bisect.bisect_left(words, prefix), len(words)):
+            if not words[position].startswith(prefix):
+                break
+            matched.update(self._postings[words[position]])
+
+        return matched
+
+    def _add(
+        self,
+        place_id: int,
+        fields: tuple[str, Optional[str], Optional[str]],
+        source: Sequence[PlaceDTO],
+        row: int,
+    ) -> None:
+        """
+        Добавление места в индекс (вызывается под блокировкой).
+
+        :param place_id: Идентификатор места.
+        :param fields: Описание, город и местонахождение.
+        :param source: Список, содержащий место.
+        :param row: Номер места в списке.
+        :return:
+        """
+
+        current = self._entries.get(place_id)
+        if current is not None and current.fields == fields:
+            # поля не изменились – обновляется только ссылка на место
+            self._entries[place_id] = SearchEntry(fields, current.tokens, source, row)
+            return
+
+        self._remove(place_id)
+        tokens = frozenset(tokenize(" ".join(filter(None, fields))))
+        self._entries[place_id] = SearchEntry(fields, tokens, source, row)
+        for token in tokens:
+            if (postings := self._postings.get(token)) is None:
+                postings = self._postings[token] = set()
+                if self._sorted:
+                    bisect.insort(self._words, token)
+            postings.add(place_id)
+
+    def _remove(self, place_id: int) -> None:
+        """
+        Удаление места из индекса (вызывается под блокировкой).
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        if (entry := self._entries.pop(place_id, None)) is None:
+            return
+
+        for token in entry.tokens:
+            postings = self._postings[token]
+            postings.discard(place_id)
+            if not postings:
+                del self._postings[token]
+                if self._sorted:
+                    del self._words[bisect.bisect_left(self._words, token)]
+
+    def _sort(self) -> None:
+        """
+        Формирование отсортированного словаря слов (вызывается под блокировкой).
+
+        :return:
+        """
+
+        self._words = sorted(self._postings)
+        self._sorted = True
@@ -1,10 +1,32 @@
 """
 Описание моделей данных (DTO).
 """
-from typing import Optional
+from array import array
+from typing import Any, Iterable, Iterator, Optional, Sequence, Type, TypeVar, overload
 
 from pydantic import BaseModel, Field
 
+M = TypeVar("M", bound=BaseModel)
+
+
+def construct_trusted(model: Type[M], values: dict[str, Any]) -> M:
+    """
+    Создание модели из доверенных данных без проверки и копирования значений.
+
+    В отличие от `BaseModel.construct` значения по умолчанию не подставляются,
+    поэтому `values` должен содержать все поля модели.
+
+    :param model: Класс модели.
+    :param values: Значения всех полей модели.
+    :return:
+    """
+
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__fields_set__", set(values))
+
+    return instance
+
 
 class PlaceDTO(BaseModel):
     """
@@ -21,3 +43,137 @@ class PlaceDTO(BaseModel):
     locality: Optional[str] = Field(
         None, title="Местонахождение", min_length=2, max_length=255
     )
+
+
+class NewPlaceDTO(BaseModel):
+    """
+    Модель для представления данных о создаваемом месте (например, при импорте из файла).
+    """
+
+    latitude: float = Field(title="Широта", ge=-90, le=90)
+    longitude: float = Field(title="Долгота", ge=-180, le=180)
+    description: str = Field(title="Описание", min_length=2, max_length=255)
+
+
+class PlaceBatch(Sequence[PlaceDTO]):
+    """
+    Компактное представление списка мест в виде столбцов (параллельных массивов).
+
+    Объекты `PlaceDTO` создаются только при обращении к отдельным местам.
+    """
+
+    __slots__ = (
+        "ids",
+        "latitudes",
+        "longitudes",
+        "descriptions",
+        "cities",
+        "localities",
+        "_rows",
+    )
+
+    def __init__(self) -> None:
+        """
+        Конструктор.
+        """
+
+        self.ids = array("q")
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.descriptions: list[str] = []
+        self.cities: list[Optional[str]] = []
+        self.localities: list[Optional[str]] = []
+        # номера строк по идентификаторам мест (формируются при первом поиске)
+        self._rows: Optional[dict[int, int]] = None
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict], validate: bool = False) -> "PlaceBatch":
+        """
+        Формирование списка мест из ответа шлюза.
+
+        :param items: Данные мест.
+        :param validate: Проверять данные по модели `PlaceDTO` (для недоверенных источников).
+        :return:
+        """
+
+        batch = cls()
+        for item in items:
+            if validate:
+                item = PlaceDTO(**item).dict()
+            batch.ids.append(item["id"])
+            batch.latitudes.append(item["latitude"])
+            batch.longitudes.append(item["longitude"])
+            batch.descriptions.append(item["description"])
+            batch.cities.append(item.get("city"))
+            batch.localities.append(item.get("locality"))
+
+        return batch
+
+    def find(self, place_id: Any) -> Optional[PlaceDTO]:
+        """
+        Поиск места по идентификатору.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        if self._rows is None:
+            self._rows = {place_id: row for row, place_id in enumerate(self.ids)}
+
+        row = self._rows.get(int(place_id))
+
+        return None if row is None else self[row]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> PlaceDTO:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[PlaceDTO]:
+        ...
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[row] for row in range(*index.indices(len(self)))]
+
+        return construct_trusted(
+            PlaceDTO,
+            {
+                "id": self.ids[index],
+                "latitude": self.latitudes[index],
+                "longitude": self.longitudes[index],
+                "description": self.descriptions[index],
+                "city": self.cities[index],
+                "locality": self.localities[index],
+            },
+        )
+
+    def __iter__(self) -> Iterator[PlaceDTO]:
+        return (self[row] for row in range(len(self)))
+
+
+class PlaceListItemDTO(BaseModel):
+    """
+    Модель для представления места в списке (только поля, необходимые для меню).
+    """
+
+    id: int = Field(title="Идентификатор")
+    city: Optional[str] = Field(
+        None, title="Название города", min_length=2, max_length=50
+    )
+    locality: Optional[str] = Field(
+        None, title="Местонахождение", min_length=2, max_length=255
+    )
+
+
+class PlacesPageDTO(BaseModel):
+    """
+    Модель для представления страницы списка мест.
+    """
+
+    items: list[PlaceListItemDTO] = Field(title="Места на странице")
+    end_cursor: Optional[str] = Field(None, title="Курсор последнего места на странице")
+    has_next_page: bool = Field(False, title="Признак наличия следующей страницы")
@@ -0,0 +1,322 @@
+"""
+Пространственный индекс любимых мест для поиска ближайших мест.
+"""
+import heapq
+import math
+import threading
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence
+
+from clients.shemas import PlaceBatch, PlaceDTO
+
+# средний радиус Земли (в километрах)
+EARTH_RADIUS = 6371.0088
+
+
+class IndexedPlace(NamedTuple):
+    """
+    Место в индексе с заранее вычисленными значениями для формулы гаверсинусов.
+    """
+
+    #: широта и долгота (в радианах)
+    latitude: float
+    longitude: float
+    #: косинус широты
+    cos_latitude: float
+    #: ячейка сетки
+    cell: tuple[int, int]
+    #: список, содержащий место, и номер места в нем
+    source: Sequence[PlaceDTO]
+    row: int
+
+    @property
+    def place(self) -> PlaceDTO:
+        """
+        Объект места (для компактного списка мест формируется при обращении).
+
+        :return:
+        """
+
+        return self.source[self.row]
+
+
+class PlaceDistance(NamedTuple):
+    """
+    Место и расстояние до него.
+    """
+
+    #: расстояние (в километрах)
+    distance: float
+    #: объект места
+    place: PlaceDTO
+
+
+class PlaceIndex:
+    """
+    Индекс мест на сетке географических координат (по принципу geohash).
+
+    Места распределяются по ячейкам сетки с шагом `cell_size` градусов.
+    При поиске просматриваются только ячейки, покрывающие окрестность точки,
+    а расстояния до мест в них вычисляются по формуле гаверсинусов.
+    Индекс обновляется поштучно при добавлении и удалении мест.
+    """
+
+    def __init__(self, cell_size: float):
+        """
+        Конструктор.
+
+        :param cell_size: Размер ячейки сетки (в градусах).
+        """
+
+        self.cell_size = cell_size
+        # количество ячеек по долготе (для перехода через 180-й меридиан)
+        self._columns = max(1, math.ceil(360 / cell_size))
+        self._cells: dict[tuple[int, int], dict[int, IndexedPlace]] = {}
+        self._places: dict[int, IndexedPlace] = {}
+        self._lock = threading.Lock()
+
+    def cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        """
+        Получение ячейки сетки для точки.
+
+        :param latitude: Широта (в градусах).
+        :param longitude: Долгота (в градусах).
+        :return:
+        """
+
+        row = math.floor((latitude + 90) / self.cell_size)
+        column = math.floor((longitude + 180) / self.cell_size) % self._columns
+
+        return row, column
+
+    def add(self, place: PlaceDTO) -> None:
+        """
+        Добавление места в индекс (или обновление его координат).
+
+        :param place: Объект места.
+        :return:
+        """
+
+        with self._lock:
+            self._add(place.id, place.latitude, place.longitude, (place,), 0)
+
+    def remove(self, place_id: Any) -> None:
+        """
+        Удаление места из индекса.
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        with self._lock:
+            self._remove(int(place_id))
+
+    def update(self, places: Sequence[PlaceDTO]) -> None:
+        """
+        Приведение индекса к полному списку мест.
+
+        Добавляются только новые и перемещенные места, удаляются только отсутствующие в списке,
+        поэтому при повторной загрузке списка индекс не перестраивается целиком.
+        Координаты компактного списка мест (`PlaceBatch`) читаются без создания объектов мест.
+
+        :param places: Полный список мест.
+        :return:
+        """
+
+        rows: Iterable[tuple[int, float, float]]
+        if isinstance(places, PlaceBatch):
+            rows = zip(places.ids, places.latitudes, places.longitudes)
+        else:
+            rows = ((place.id, place.latitude, place.longitude) for place in places)
+
+        with self._lock:
+            seen = set()
+            for row, (place_id, latitude, longitude) in enumerate(rows):
+                seen.add(place_id)
+                self._add(place_id, latitude, longitude, places, row)
+            for place_id in self._places.keys() - seen:
+                self._remove(place_id)
+
+    def nearest(
+        self, latitude: float, longitude: float, limit: int, radius: float
+    ) -> list[PlaceDistance]:
+        """
+        Поиск ближайших мест в пределах радиуса.
+
+        Ячейки просматриваются кольцами от ячейки точки; поиск прекращается,
+        когда найдено `limit` мест и следующее кольцо заведомо дальше найденных.
+
+        :param latitude: Широта точки (в градусах).
+        :param longitude: Долгота точки (в градусах).
+        :param limit: Максимальное количество мест.
+        :param radius: Радиус поиска (в километрах).
+        :return: Места в порядке возрастания расстояния.
+        """
+
+        lat = math.radians(latitude)
+        lon = math.radians(longitude)
+        cos_lat = math.cos(lat)
+        # расстояния сравниваются по значению под корнем в формуле гаверсинусов,
+        # арксинус вычисляется только для найденных мест
+        max_haversine = math.sin(min(radius / EARTH_RADIUS, math.pi) / 2) ** 2
+        sin = math.sin
+
+        # `limit` ближайших мест: куча с обратным порядком (дальнее место – первое)
+        best: list[tuple[float, int, PlaceDTO]] = []
+        with self._lock:
+            for cells, min_haversine in self._rings(latitude, longitude, radius):
+                if len(best) == limit and min_haversine > -best[0][0]:
+                    break
+
+                for cell in cells:
+                    for place_id, item in self._cells[cell].items():
+                        haversine = (
+                            sin((item.latitude - lat) / 2) ** 2
+                            + cos_lat
+                            * item.cos_latitude
+                            * sin((item.longitude - lon) / 2) ** 2
+                        )
+                        if haversine > max_haversine:
+                            continue
+
+                        entry = (-haversine, -place_id, item.place)
+                        if len(best) < limit:
+                            heapq.heappush(best, entry)
+                        elif entry > best[0]:
+                            heapq.heapreplace(best, entry)
+
+        return [
+            PlaceDistance(
+                2 * EARTH_RADIUS * math.asin(math.sqrt(min(-haversine, 1.0))), place
+            )
+            for haversine, _, place in sorted(best, reverse=True)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def _add(
+        self,
+        place_id: int,
+        latitude: float,
+        longitude: float,
+        source: Sequence[PlaceDTO],
+        row: int,
+    ) -> None:
+        """
+        Добавление места в индекс (вызывается под блокировкой).
+
+        :param place_id: Идентификатор места.
+        :param latitude: Широта (в градусах).
+        :param longitude: Долгота (в градусах).
+        :param source: Список, содержащий место.
+        :param row: Номер места в списке.
+        :return:
+        """
+
+        lat = math.radians(latitude)
+        lon = math.radians(longitude)
+        current = self._places.get(place_id)
+        if current is not None and (current.latitude, current.longitude) == (lat, lon):
+            # координаты не изменились – обновляется только ссылка на место
+            item = current._replace(source=source, row=row)
+        else:
+            self._remove(place_id)
+            item = IndexedPlace(
+                latitude=lat,
+                longitude=lon,
+                cos_latitude=math.cos(lat),
+                cell=self.cell(latitude, longitude),
+                source=source,
+                row=row,
+            )
+
+        self._places[place_id] = item
+        self._cells.setdefault(item.cell, {})[place_id] = item
+
+    def _remove(self, place_id: int) -> None:
+        """
+        Удаление места из индекса (вызывается под блокировкой).
+
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        if (item := self._places.pop(place_id, None)) is None:
+            return
+
+        cell = self._cells[item.cell]
+        del cell[place_id]
+        if not cell:
+            del self._cells[item.cell]
+
+    def _rings(
+        self, latitude: float, longitude: float, radius: float
+    ) -> Iterator[tuple[list[tuple[int, int]], float]]:
+        """
+        Получение непустых ячеек окрестности точки кольцами от ячейки точки.
+
+        Для каждого кольца возвращается нижняя граница значения под корнем
+        в формуле гаверсинусов для мест в его ячейках.
+
+        :param latitude: Широта точки (в градусах).
+        :param longitude: Долгота точки (в градусах).
+        :param radius: Радиус окрестности (в километрах).
+        :return:
+        """
+
+        lat_delta = math.degrees(radius / EARTH_RADIUS)
+        south = max(latitude - lat_delta, -90.0)
+        north = min(latitude + lat_delta, 90.0)
+        # долгота окрестности расширяется к полюсам
+        min_cos = min(math.cos(math.radians(south)), math.cos(math.radians(north)))
+        if min_cos > 0:
+            lon_delta = math.degrees(radius / EARTH_RADIUS / min_cos)
+        else:
+            lon_delta = 180.0
+
+        center_row, center_column = self.cell(latitude, longitude)
+        south_row = self.cell(south, longitude)[0] - center_row
+        north_row = self.cell(north, longitude)[0] - center_row
+        column_delta = math.ceil(lon_delta / self.cell_size)
+
+        # при большой окрестности (или у полюса) дешевле перебрать все непустые ячейки
+        all_columns = 2 * column_delta + 1 >= self._columns
+        if all_columns or (north_row - south_row + 1) * (2 * column_delta + 1) > len(
+            self._cells
+        ):
+            yield [
+                cell
+                for cell in self._cells
+                if south_row <= cell[0] - center_row <= north_row
+                and (
+                    all_columns
+                    or abs(
+                        (cell[1] - center_column + self._columns // 2) % self._columns
+                        - self._columns // 2
+                    )
+                    <= column_delta
+                )
+            ], 0.0
+
+            return
+
+        cell_angle = math.radians(self.cell_size)
+        for ring in range(max(-south_row, north_row, column_delta) + 1):
+            cells = []
+            for row in range(max(-ring, south_row), min(ring, north_row) + 1):
+                if abs(row) == ring:
+                    columns = range(
+                        -min(ring, column_delta), min(ring, column_delta) + 1
+                    )
+                elif ring <= column_delta:
+                    columns = range(-ring, ring + 1, 2 * ring)
+                else:
+                    continue
+
+                for column in columns:
+                    cell = (center_row + row, (center_column + column) % self._columns)
+                    if cell in self._cells:
+                        cells.append(cell)
+
+            # между точкой и кольцом – не меньше `ring - 1` целых ячеек по широте или долготе
+            yield cells, (min_cos * math.sin(max(ring - 1, 0) * cell_angle / 2)) ** 2
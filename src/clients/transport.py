@@ -0,0 +1,375 @@
+"""
+Транспорт для взаимодействия с GraphQL-шлюзом по HTTP.
+"""
+import logging
+from typing import Any, Optional
+
+import aiohttp
+import requests
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.exceptions import (
+    TransportAlreadyConnected,
+    TransportClosed,
+    TransportProtocolError,
+    TransportServerError,
+)
+from gql.transport.requests import RequestsHTTPTransport
+from graphql import ExecutionResult
+from requests.adapters import HTTPAdapter, Retry
+
+from clients.operations import Operation
+
+logger = logging.getLogger(__name__)
+
+# сообщения и коды ошибок протокола автоматически сохраняемых запросов (APQ)
+PERSISTED_QUERY_NOT_FOUND = {"PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND"}
+PERSISTED_QUERY_NOT_SUPPORTED = {
+    "PersistedQueryNotSupported",
+    "PERSISTED_QUERY_NOT_SUPPORTED",
+}
+
+
+class PersistedQueryMixin:
+    """
+    Общие функции протокола автоматически сохраняемых запросов (APQ).
+
+    При включенных APQ шлюзу сначала отправляется только хеш операции,
+    а полный текст – лишь в случае, если шлюз его еще не сохранил.
+    """
+
+    persisted_queries: bool = False
+
+    def _operation_payload(
+        self,
+        operation: Operation,
+        variable_values: Optional[dict],
+        with_query: bool,
+    ) -> dict[str, Any]:
+        """
+        Формирование тела запроса для операции.
+
+        :param operation: Операция из реестра.
+        :param variable_values: Значения переменных операции.
+        :param with_query: Передавать ли текст операции.
+        :return:
+        """
+
+        payload: dict[str, Any] = {"operationName": operation.name}
+        if variable_values:
+            payload["variables"] = variable_values
+        if with_query:
+            payload["query"] = operation.query
+        if self.persisted_queries:
+            payload["extensions"] = {
+                "persistedQuery": {"version": 1, "sha256Hash": operation.sha256}
+            }
+
+        return payload
+
+    def _needs_query_text(self, result: ExecutionResult) -> bool:
+        """
+        Проверка, требует ли шлюз повторной отправки запроса с текстом операции.
+
+        :param result: Результат запроса, отправленного только с хешем операции.
+        :return:
+        """
+
+        codes: set[str] = set()
+        for error in result.errors or []:
+            if isinstance(error, dict):
+                codes.add(error.get("message", ""))
+                codes.add((error.get("extensions") or {}).get("code", ""))
+
+        if codes & PERSISTED_QUERY_NOT_SUPPORTED:
+            logger.warning("Persisted queries are not supported by the gateway")
+            self.persisted_queries = False
+
+            return True
+
+        return bool(codes & PERSISTED_QUERY_NOT_FOUND)
+
+    @staticmethod
+    def _execution_result(result: Any) -> Optional[ExecutionResult]:
+        """
+        Формирование результата выполнения из ответа шлюза.
+
+        :param result: Разобранный JSON-ответ шлюза.
+        :return: Результат или `None`, если ответ не является результатом GraphQL.
+        """
+
+        if not isinstance(result, dict) or (
+            "errors" not in result and "data" not in result
+        ):
+            return None
+
+        return ExecutionResult(
+            errors=result.get("errors"),
+            data=result.get("data"),
+            extensions=result.get("extensions"),
+        )
+
+
+class PooledRequestsHTTPTransport(PersistedQueryMixin, RequestsHTTPTransport):
+    """
+    HTTP-транспорт с пулом постоянных (keep-alive) соединений.
+
+    Сессия создается один раз и переиспользуется всеми потоками-обработчиками,
+    поэтому TCP/TLS-соединение со шлюзом не устанавливается заново для каждого запроса.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int,
+        persisted_queries: bool = False,
+        **kwargs: Any,
+    ):
+        """
+        Конструктор.
+
+        :param url: Адрес GraphQL-шлюза.
+        :param pool_size: Максимальное количество соединений в пуле.
+        :param persisted_queries: Использовать автоматически сохраняемые запросы (APQ).
+        :param kwargs: Параметры базового транспорта.
+        """
+
+        super().__init__(url=url, **kwargs)
+
+        self.pool_size = pool_size
+        self.persisted_queries = persisted_queries
+
+    def _timeout(self, timeout: Optional[float]) -> Any:
+        """
+        Таймауты запроса (установка соединения и ожидание ответа).
+
+        :param timeout: Таймаут ожидания ответа (в секундах, по умолчанию – общий).
+        :return:
+        """
+
+        if timeout is None:
+            return self.default_timeout
+        if isinstance(self.default_timeout, tuple):
+            return min(self.default_timeout[0], timeout), timeout
+
+        return timeout
+
+    def connect(self) -> None:
+        """
+        Создание сессии с пулом соединений.
+
+        :return:
+        """
+
+        if self.session is not None:
+            raise TransportAlreadyConnected("Transport is already connected")
+
+        max_retries: Any = 0
+        if self.retries > 0:
+            # методы по умолчанию не включают POST: изменение данных, выполненное шлюзом
+            # до ответа 502/504, не повторяется (повторы операций выполняет `RetryPolicy`)
+            max_retries = Retry(
+                total=self.retries,
+                backoff_factor=0.1,
+                status_forcelist=[500, 502, 503, 504],
+            )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size, max_retries=max_retries
+        )
+        session = requests.Session()
+        for prefix in "http://", "https://":
+            session.mount(prefix, adapter)
+
+        self.session = session  # type: ignore
+
+    def execute_operation(
+        self,
+        operation: Operation,
+        variable_values: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> ExecutionResult:
+        """
+        Выполнение зарегистрированной операции.
+
+        :param operation: Операция из реестра.
+        :param variable_values: Значения переменных операции.
+        :param timeout: Таймаут ожидания ответа (в секундах, по умолчанию – общий).
+        :return:
+        """
+
+        if self.persisted_queries:
+            result = self._post(
+                self._operation_payload(operation, variable_values, with_query=False),
+                timeout,
+            )
+            if not self._needs_query_text(result):
+                return result
+
+        return self._post(
+            self._operation_payload(operation, variable_values, with_query=True),
+            timeout,
+        )
+
+    def _post(
+        self, payload: dict[str, Any], timeout: Optional[float] = None
+    ) -> ExecutionResult:
+        """
+        Отправка запроса шлюзу.
+
+        :param payload: Тело запроса.
+        :param timeout: Таймаут ожидания ответа (в секундах, по умолчанию – общий).
+        :return:
+        """
+
+        if not self.session:
+            raise TransportClosed("Transport is not connected")
+
+        response = self.session.request(
+            self.method,
+            self.url,
+            json=payload,
+            headers=self.headers,
+            auth=self.auth,
+            cookies=self.cookies,
+            timeout=self._timeout(timeout),
+            verify=self.verify,
+            **self.kwargs,
+        )
+
+        try:
+            result = self._execution_result(response.json())
+        except ValueError:
+            result = None
+
+        if result is None:
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as exception:
+                raise TransportServerError(
+                    str(exception), response.status_code
+                ) from exception
+
+            raise TransportProtocolError(
+                f"Server did not return a GraphQL result: {response.text}"
+            )
+
+        return result
+
+
+class PooledAIOHTTPTransport(PersistedQueryMixin, AIOHTTPTransport):
+    """
+    Асинхронный HTTP-транспорт с пулом постоянных (keep-alive) соединений.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int,
+        connect_timeout: float,
+        read_timeout: float,
+        persisted_queries: bool = False,
+        **kwargs: Any,
+    ):
+        """
+        Конструктор.
+
+        :param url: Адрес GraphQL-шлюза.
+        :param pool_size: Максимальное количество соединений в пуле.
+        :param connect_timeout: Таймаут установки соединения (в секундах).
+        :param read_timeout: Таймаут ожидания ответа (в секундах).
+        :param persisted_queries: Использовать автоматически сохраняемые запросы (APQ).
+        :param kwargs: Параметры базового транспорта.
+        """
+
+        super().__init__(url=url, **kwargs)
+
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.persisted_queries = persisted_queries
+
+    async def connect(self) -> None:
+        """
+        Создание сессии с пулом соединений (выполняется внутри цикла событий).
+
+        :return:
+        """
+
+        if self.session is not None:
+            raise TransportAlreadyConnected("Transport is already connected")
+
+        self.client_session_args = {
+            "connector": aiohttp.TCPConnector(limit=self.pool_size),
+            "timeout": aiohttp.ClientTimeout(
+                sock_connect=self.connect_timeout, sock_read=self.read_timeout
+            ),
+        }
+
+        await super().connect()
+
+    async def execute_operation(
+        self,
+        operation: Operation,
+        variable_values: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> ExecutionResult:
+        """
+        Выполнение зарегистрированной операции.
+
+        :param operation: Операция из реестра.
+        :param variable_values: Значения переменных операции.
+        :param timeout: Таймаут ожидания ответа (в секундах, по умолчанию – общий).
+        :return:
+        """
+
+        if self.persisted_queries:
+            result = await self._post(
+                self._operation_payload(operation, variable_values, with_query=False),
+                timeout,
+            )
+            if not self._needs_query_text(result):
+                return result
+
+        return await self._post(
+            self._operation_payload(operation, variable_values, with_query=True),
+            timeout,
+        )
+
+    async def _post(
+        self, payload: dict[str, Any], timeout: Optional[float] = None
+    ) -> ExecutionResult:
+        """
+        Отправка запроса шлюзу.
+
+        :param payload: Тело запроса.
+        :param timeout: Таймаут ожидания ответа (в секундах, по умолчанию – общий).
+        :return:
+        """
+
+        if self.session is None:
+            raise TransportClosed("Transport is not connected")
+
+        kwargs: dict[str, Any] = {}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(
+                total=timeout, sock_connect=min(self.connect_timeout, timeout)
+            )
+
+        async with self.session.post(self.url, json=payload, **kwargs) as response:
+            try:
+                result = self._execution_result(await response.json(content_type=None))
+            except ValueError:
+                result = None
+
+            if result is None:
+                try:
+                    response.raise_for_status()
+                except aiohttp.ClientResponseError as exception:
+                    raise TransportServerError(
+                        str(exception), exception.status
+                    ) from exception
+
+                raise TransportProtocolError(
+                    f"Server did not return a GraphQL result: {await response.text()}"
+                )
+
+            return result
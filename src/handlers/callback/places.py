@@ -1,8 +1,15 @@
+import asyncio
+from typing import Optional
+
 from telegram import CallbackQuery, ParseMode
 
-from clients.gateway import GatewayClient
-from clients.shemas import PlaceDTO
-from menu.places import PlaceMenu
+from clients.gateway import gateway_client
+from clients.gateway_async import async_gateway_client
+from clients.shemas import PlaceDTO, PlacesPageDTO
+from menu.callbacks import encode
+from menu.places import PlaceMenu, PlacesMenu
+from outbound.sender import Outbox, outbound_sender
+from settings import settings
 
 
 class PlaceCallbackHandler:
@@ -10,41 +17,73 @@ class PlaceCallbackHandler:
     Обработка функций обратного вызова для управления данными о конкретном любимом месте.
     """
 
-    def handle(self, callback_query: CallbackQuery) -> bool:
+    def handle(self, callback_query: CallbackQuery, place_id: int) -> bool:
         """
         Обработка обратного вызова.
 
         :param callback_query: Объект запроса обратного вызова.
+        :param place_id: Идентификатор места.
         :return:
         """
 
-        query_data = callback_query.data
-        # получение идентификатора любимого места
-        place_id = query_data.split(":")[1]
         # получение информации о месте
-        place = GatewayClient().get_place(place_id)
+        place = gateway_client.get_place(str(place_id))
 
+        return self.__reply(callback_query, place_id, place)
+
+    async def handle_async(self, callback_query: CallbackQuery, place_id: int) -> bool:
+        """
+        Обработка обратного вызова в цикле событий asyncio.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        # получение информации о месте
+        place = await async_gateway_client.get_place(str(place_id))
+
+        # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+        return await asyncio.to_thread(self.__reply, callback_query, place_id, place)
+
+    def __reply(
+        self, callback_query: CallbackQuery, place_id: int, place: Optional[PlaceDTO]
+    ) -> bool:
+        """
+        Отправка данных о месте в чат-бот.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param place_id: Идентификатор места.
+        :param place: Объект с данными места.
+        :return:
+        """
+
+        outbox = Outbox(outbound_sender)
         if place:
             # отправка данных о месте в чат-бот
-            callback_query.edit_message_text(
-                text=self.__build_message(place), parse_mode=ParseMode.MARKDOWN
+            outbox.edit_message_text(
+                callback_query,
+                text=self.__build_message(place),
+                parse_mode=ParseMode.MARKDOWN,
             )
 
-            # формирование inline-меню
+            # формирование inline-меню (отправляется вместе с текстом одним запросом)
             reply_markup = PlaceMenu(
                 buttons={
-                    "Редактировать": f"place.edit:{place_id}",
-                    "Удалить": f"place.delete:{place_id}",
+                    "Редактировать": encode("place.edit", place_id),
+                    "Удалить": encode("place.delete", place_id),
                 }
             ).get_menu()
-            callback_query.edit_message_reply_markup(reply_markup=reply_markup)
+            outbox.edit_message_reply_markup(callback_query, reply_markup=reply_markup)
 
-            callback_query.answer(
+            outbox.answer(
+                callback_query,
                 text="Информация о любимом месте.",
             )
         else:
             # todo: обработать исключительную ситуацию с логированием
-            callback_query.answer("Любимое место не найдено.")
+            outbox.answer(callback_query, text="Любимое место не найдено.")
+        outbox.flush()
 
         return True
 
@@ -69,27 +108,170 @@ class PlaceDeleteCallbackHandler:
     Обработка функций обратного вызова для удаления мест.
     """
 
-    def handle(self, callback_query: CallbackQuery) -> bool:
+    def handle(self, callback_query: CallbackQuery, place_id: int) -> bool:
         """
         Обработка обратного вызова.
 
         :param callback_query: Объект запроса обратного вызова.
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        # удаление объекта места
+        result = gateway_client.delete(str(place_id))
+
+        return self.__reply(callback_query, result)
+
+    async def handle_async(self, callback_query: CallbackQuery, place_id: int) -> bool:
+        """
+        Обработка обратного вызова в цикле событий asyncio.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param place_id: Идентификатор места.
         :return:
         """
 
-        query_data = callback_query.data
-        # получение идентификатора любимого места
-        place_id = query_data.split(":")[1]
         # удаление объекта места
-        result = GatewayClient().delete(place_id)
+        result = await async_gateway_client.delete(str(place_id))
+
+        # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+        return await asyncio.to_thread(self.__reply, callback_query, result)
+
+    def __reply(self, callback_query: CallbackQuery, result: bool) -> bool:
+        """
+        Отправка результата удаления в чат-бот.
 
+        :param callback_query: Объект запроса обратного вызова.
+        :param result: Результат удаления.
+        :return:
+        """
+
+        outbox = Outbox(outbound_sender)
         if result:
-            callback_query.edit_message_text(text="Любимое место было удалено.")
-            callback_query.answer(
+            outbox.edit_message_text(callback_query, text="Любимое место было удалено.")
+            outbox.answer(
+                callback_query,
                 text="Успешно удалено.",
             )
         else:
             # todo: обработать исключительную ситуацию с логированием
-            callback_query.answer("Ошибка при удалении.")
+            outbox.answer(callback_query, text="Ошибка при удалении.")
+        outbox.flush()
+
+        return True
+
+
+class PlacesPageCallbackHandler:
+    """
+    Обработка функций обратного вызова для перехода по страницам списка мест.
+    """
+
+    def handle(self, callback_query: CallbackQuery, cursor: str) -> bool:
+        """
+        Обработка обратного вызова.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param cursor: Курсор страницы (пустой курсор – первая страница).
+        :return:
+        """
+
+        page = gateway_client.get_places_page(
+            user_id=callback_query.from_user.id,
+            first=settings.chatbot_telegram.places_page_size,
+            after=cursor or None,
+        )
+
+        return self.__reply(callback_query, cursor, page)
+
+    async def handle_async(self, callback_query: CallbackQuery, cursor: str) -> bool:
+        """
+        Обработка обратного вызова в цикле событий asyncio.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param cursor: Курсор страницы (пустой курсор – первая страница).
+        :return:
+        """
+
+        page = await async_gateway_client.get_places_page(
+            user_id=callback_query.from_user.id,
+            first=settings.chatbot_telegram.places_page_size,
+            after=cursor or None,
+        )
+
+        # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+        return await asyncio.to_thread(self.__reply, callback_query, cursor, page)
+
+    def __reply(
+        self,
+        callback_query: CallbackQuery,
+        cursor: str,
+        page: Optional[PlacesPageDTO],
+    ) -> bool:
+        """
+        Отправка страницы списка мест в чат-бот.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param cursor: Курсор страницы.
+        :param page: Страница списка мест.
+        :return:
+        """
+
+        outbox = Outbox(outbound_sender)
+        if page:
+            reply_markup = PlacesMenu().set_page(page, not cursor).get_menu()
+            outbox.edit_message_reply_markup(callback_query, reply_markup=reply_markup)
+            outbox.answer(callback_query)
+        else:
+            outbox.answer(callback_query, text="Не удалось получить список мест.")
+        outbox.flush()
+
+        return True
+
+
+class PlaceEditCallbackHandler:
+    """
+    Обработка функций обратного вызова для редактирования мест.
+    """
+
+    def handle(self, callback_query: CallbackQuery, place_id: int) -> bool:
+        """
+        Обработка обратного вызова.
+
+        Шлюз не поддерживает изменение мест, поэтому пользователь получает ответ
+        с предложением удалить место и добавить его заново.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param place_id: Идентификатор места.
+        :return:
+        """
+
+        Outbox(outbound_sender).answer(
+            callback_query,
+            text="Изменение мест пока не поддерживается. "
+            "Удалите место и добавьте его заново с новым описанием.",
+            show_alert=True,
+        ).flush()
+
+        return True
+
+
+class UnknownCallbackHandler:
+    """
+    Обработка функций обратного вызова с неизвестными или устаревшими данными кнопки.
+    """
+
+    def handle(self, callback_query: CallbackQuery) -> bool:
+        """
+        Обработка обратного вызова.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :return:
+        """
+
+        Outbox(outbound_sender).answer(
+            callback_query,
+            text="Кнопка устарела или не поддерживается. Обновите список мест: /places.",
+            show_alert=True,
+        ).flush()
 
         return True
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any
 
@@ -17,3 +18,15 @@ class CommandHandler(ABC):
         :param update: Объект с данными, поступившими от чат-бота.
         :return:
         """
+
+    async def handle_async(self, update: Update, **kwargs: Any) -> None:
+        """
+        Обработка команды в цикле событий asyncio.
+
+        По умолчанию синхронный обработчик выполняется в пуле потоков цикла событий.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :return:
+        """
+
+        await asyncio.to_thread(self.handle, update, **kwargs)
@@ -1,10 +1,15 @@
-from typing import Any
+import asyncio
+from typing import Any, Optional
 
 from telegram import Chat, Update
 
-from clients.gateway import GatewayClient
+from clients.gateway import gateway_client
+from clients.gateway_async import async_gateway_client
+from clients.shemas import PlacesPageDTO
 from handlers.command.base import CommandHandler
 from menu.places import PlacesMenu
+from outbound.sender import outbound_sender
+from settings import settings
 
 
 class PlacesCommandHandler(CommandHandler):
@@ -14,21 +19,52 @@ class PlacesCommandHandler(CommandHandler):
 
     def handle(self, update: Update, **kwargs: Any) -> None:
         """
-        Получение списка любимых мест.
+        Получение первой страницы списка любимых мест пользователя.
 
         :param update: Объект с данными, поступившими от чат-бота.
         :return:
         """
 
-        places = GatewayClient().get_places()
+        page = gateway_client.get_places_page(
+            user_id=update.effective_user.id,  # type: ignore
+            first=settings.chatbot_telegram.places_page_size,
+        )
 
-        menu = PlacesMenu()
-        buttons = {
-            f"{place.city} ({place.locality})": f"place:{place.id}" for place in places
-        }
-        reply_markup = menu.set_buttons(buttons).get_menu()
+        self.__reply(update, page)
+
+    async def handle_async(self, update: Update, **kwargs: Any) -> None:
+        """
+        Получение первой страницы списка любимых мест пользователя в цикле событий asyncio.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :return:
+        """
+
+        page = await async_gateway_client.get_places_page(
+            user_id=update.effective_user.id,  # type: ignore
+            first=settings.chatbot_telegram.places_page_size,
+        )
+
+        # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+        await asyncio.to_thread(self.__reply, update, page)
+
+    def __reply(self, update: Update, page: Optional[PlacesPageDTO]) -> None:
+        """
+        Отправка страницы списка любимых мест в чат-бот.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param page: Страница списка мест.
+        :return:
+        """
+
+        reply_markup = (
+            PlacesMenu().set_page(page or PlacesPageDTO(items=[]), True).get_menu()
+        )
 
         if isinstance(update.effective_chat, Chat):
-            update.effective_chat.send_message(
-                text="Мои любимые места:", reply_markup=reply_markup
+            outbound_sender.send(
+                update.effective_chat.id,
+                update.effective_chat.send_message,
+                text="Мои любимые места:",
+                reply_markup=reply_markup,
             )
@@ -0,0 +1,128 @@
+import asyncio
+import io
+import tempfile
+from typing import IO, Any, Optional
+
+from telegram import Update
+
+from clients.gateway import gateway_client
+from clients.gateway_async import async_gateway_client
+from handlers.command.base import CommandHandler
+from outbound.sender import outbound_sender
+from settings import settings
+from transfer.formats import FORMATS, PlacesWriter
+
+
+class PlacesExportCommandHandler(CommandHandler):
+    """
+    Обработчик команды `/export`.
+    """
+
+    def handle(self, update: Update, **kwargs: Any) -> None:
+        """
+        Выгрузка всех мест пользователя в файл.
+
+        Места запрашиваются у шлюза постранично и сразу записываются во временный файл.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param file_format: Формат файла (`csv`, `gpx` или `kml`).
+        :return:
+        """
+
+        file_format = self.__format(update, kwargs.get("file_format"))
+        if file_format is None:
+            return
+
+        with tempfile.TemporaryFile() as file:
+            text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+            writer = PlacesWriter(text, file_format)
+            for page in gateway_client.iter_user_places(
+                user_id=update.effective_user.id,  # type: ignore
+                page_size=settings.transfer.export_page_size,
+            ):
+                writer.write(page)
+            writer.close()
+            # временный файл остается открытым для отправки
+            text.detach()
+
+            self.__reply(update, file, writer)
+
+    async def handle_async(self, update: Update, **kwargs: Any) -> None:
+        """
+        Выгрузка всех мест пользователя в файл в цикле событий asyncio.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param file_format: Формат файла (`csv`, `gpx` или `kml`).
+        :return:
+        """
+
+        file_format = await asyncio.to_thread(
+            self.__format, update, kwargs.get("file_format")
+        )
+        if file_format is None:
+            return
+
+        with tempfile.TemporaryFile() as file:
+            text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+            writer = PlacesWriter(text, file_format)
+            async for page in async_gateway_client.iter_user_places(
+                user_id=update.effective_user.id,  # type: ignore
+                page_size=settings.transfer.export_page_size,
+            ):
+                writer.write(page)
+            writer.close()
+            # временный файл остается открытым для отправки
+            text.detach()
+
+            # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+            await asyncio.to_thread(self.__reply, update, file, writer)
+
+    @staticmethod
+    def __format(update: Update, file_format: Optional[str]) -> Optional[str]:
+        """
+        Проверка формата файла, запрошенного пользователем.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param file_format: Формат файла (по умолчанию – CSV).
+        :return: Формат файла или `None`, если формат не поддерживается.
+        """
+
+        file_format = (file_format or FORMATS[0]).lower()
+        if file_format in FORMATS:
+            return file_format
+
+        outbound_sender.call(
+            update.message.chat_id,
+            update.message.reply_text,
+            text=f"Поддерживаемые форматы: {', '.join(FORMATS)}. Например: /export gpx",
+        )
+
+        return None
+
+    @staticmethod
+    def __reply(update: Update, file: IO[bytes], writer: PlacesWriter) -> None:
+        """
+        Отправка файла с местами в чат-бот.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param file: Временный файл с местами.
+        :param writer: Объект, записавший места в файл.
+        :return:
+        """
+
+        if not writer.count:
+            outbound_sender.call(
+                update.message.chat_id,
+                update.message.reply_text,
+                text="Список мест пуст.",
+            )
+            return
+
+        file.seek(0)
+        outbound_sender.call(
+            update.message.chat_id,
+            update.message.reply_document,
+            document=file,
+            filename=f"places.{writer.file_format}",
+            caption=f"Мест: {writer.count}.",
+        )
@@ -0,0 +1,81 @@
+import asyncio
+
+from telegram import InlineQuery, InlineQueryResultVenue
+
+from clients.gateway import gateway_client
+from clients.gateway_async import async_gateway_client
+from clients.shemas import PlaceDTO
+from settings import settings
+
+
+class PlacesInlineQueryHandler:
+    """
+    Обработка inline-запросов (`@bot <текст>`) для поиска любимых мест.
+    """
+
+    def handle(self, inline_query: InlineQuery) -> None:
+        """
+        Поиск мест пользователя по тексту запроса.
+
+        :param inline_query: Объект inline-запроса.
+        :return:
+        """
+
+        places = []
+        if inline_query.query.strip():
+            places = gateway_client.search_places(
+                inline_query.from_user.id,
+                inline_query.query,
+                limit=settings.chatbot_telegram.inline_limit,
+            )
+
+        self.__reply(inline_query, places)
+
+    async def handle_async(self, inline_query: InlineQuery) -> None:
+        """
+        Поиск мест по тексту запроса в цикле событий asyncio.
+
+        :param inline_query: Объект inline-запроса.
+        :return:
+        """
+
+        places = []
+        if inline_query.query.strip():
+            places = await async_gateway_client.search_places(
+                inline_query.from_user.id,
+                inline_query.query,
+                limit=settings.chatbot_telegram.inline_limit,
+            )
+
+        # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+        await asyncio.to_thread(self.__reply, inline_query, places)
+
+    @staticmethod
+    def __reply(inline_query: InlineQuery, places: list[PlaceDTO]) -> None:
+        """
+        Отправка найденных мест (выбранное место отправляется в чат как точка на карте).
+
+        :param inline_query: Объект inline-запроса.
+        :param places: Найденные места.
+        :return:
+        """
+
+        results = [
+            InlineQueryResultVenue(
+                id=str(place.id),
+                latitude=place.latitude,
+                longitude=place.longitude,
+                title=place.description,
+                address=", ".join(filter(None, (place.city, place.locality)))
+                or f"{place.latitude:.5f}, {place.longitude:.5f}",
+            )
+            for place in places
+        ]
+
+        # ответ на inline-запрос не является сообщением и не ограничивается по чату;
+        # результаты содержат места пользователя, поэтому Telegram кеширует их только для него
+        inline_query.answer(
+            results,
+            cache_time=settings.chatbot_telegram.inline_cache_time,
+            is_personal=True,
+        )
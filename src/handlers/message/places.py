@@ -1,8 +1,25 @@
+import asyncio
 import logging
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, Optional
 
-from telegram import Location, Update
+from telegram import Bot, Location, Message, Update
 
-from clients.gateway import GatewayClient
+from clients.gateway import gateway_client
+from clients.gateway_async import async_gateway_client
+from clients.resilience import (
+    CircuitOpenError,
+    GatewayUnavailableError,
+    is_connection_error,
+)
+from clients.spatial import PlaceDistance
+from menu.places import NearbyPlacesMenu
+from outbound.sender import outbound_sender
+from persistence.jobs import Job
+from runtime.aio import AsyncioRunner
+from runtime.jobs import JobHandler, JobWorkerPool
+from settings import settings
 
 logger = logging.getLogger()
 
@@ -12,6 +29,16 @@ class PlaceAddMessageHandler:
     Функции для обработки запросов для создания нового объекта любимого места.
     """
 
+    def __init__(self, jobs: Optional[JobWorkerPool] = None):
+        """
+        Конструктор.
+
+        :param jobs: Пул потоков для фонового создания места
+            (если не передан, место создается до ответа пользователю).
+        """
+
+        self.jobs = jobs
+
     def handle(self, update: Update, location: Location, description: str) -> None:
         """
         Обработка события загрузки файла.
@@ -22,13 +49,290 @@ class PlaceAddMessageHandler:
         :return:
         """
 
-        result = GatewayClient().create(
+        if self.jobs is not None:
+            self.__enqueue(update, location, description)
+            return
+
+        result = gateway_client.create(
             latitude=location.latitude,
             longitude=location.longitude,
             description=description,
+            user_id=update.effective_user.id,  # type: ignore
         )
+
+        self.__reply(update, result)
+
+    async def handle_async(
+        self, update: Update, location: Location, description: str
+    ) -> None:
+        """
+        Обработка события загрузки файла в цикле событий asyncio.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param location: Объект с данными о местоположении.
+        :param description: Описание добавляемого места.
+        :return:
+        """
+
+        if self.jobs is not None:
+            await asyncio.to_thread(self.__enqueue, update, location, description)
+            return
+
+        result = await async_gateway_client.create(
+            latitude=location.latitude,
+            longitude=location.longitude,
+            description=description,
+            user_id=update.effective_user.id,  # type: ignore
+        )
+
+        # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+        await asyncio.to_thread(self.__reply, update, result)
+
+    def __enqueue(self, update: Update, location: Location, description: str) -> None:
+        """
+        Отправка подтверждения и передача создания места в фоновое задание.
+
+        Задание сохраняется в очереди, а по его завершении
+        подтверждение заменяется результатом создания места
+        (если подтверждение не отправлено – результат отправляется новым сообщением).
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param location: Объект с данными о местоположении.
+        :param description: Описание добавляемого места.
+        :return:
+        """
+
+        payload = {
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+            "description": description,
+            "user_id": update.effective_user.id,  # type: ignore
+            "chat_id": update.message.chat_id,
+        }
+        # задание ставится после отправки подтверждения (в потоке отправки),
+        # чтобы не задерживать поток диспетчера ограничением частоты чата
+        outbound_sender.send(
+            update.message.chat_id,
+            update.message.reply_text,
+            text="Сохраняем место…",
+        ).add_done_callback(lambda future: self.__submit(update, future, payload))
+
+    def __submit(self, update: Update, future: Future, payload: dict) -> None:
+        """
+        Передача создания места в фоновое задание после отправки подтверждения.
+
+        Место создается, даже если подтверждение не удалось отправить.
+        Если задание не удалось поставить в очередь, пользователь получает сообщение об ошибке.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param future: Результат отправки подтверждения.
+        :param payload: Данные задания (без идентификатора сообщения).
+        :return:
+        """
+
+        message: Optional[Message] = None
+        if (error := future.exception()) is not None:
+            logger.warning("Failed to send the place creation ack: %s", error)
+        else:
+            message = future.result()
+
+        try:
+            self.jobs.submit(  # type: ignore
+                PlaceCreateJob.KIND,
+                {**payload, "message_id": message.message_id if message else None},
+            )
+        except Exception:  # pylint: disable=broad-except
+            # без задания подтверждение не будет заменено результатом
+            logger.exception("Failed to submit the place creation job")
+            outbound_sender.send(
+                payload["chat_id"],
+                message.edit_text if message else update.message.reply_text,
+                text="Место не было добавлено. Попробуйте позже.",
+            )
+
+    def __reply(self, update: Update, result: bool) -> None:
+        """
+        Отправка результата создания места в чат-бот.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param result: Результат создания места.
+        :return:
+        """
+
         if result:
-            update.message.reply_text("Место добавлено.")
+            text = "Место добавлено."
+        else:
+            # ошибки запроса к шлюзу записываются обработчиком ошибок чат-бота
+            logger.warning("Place was not created: the gateway returned no result")
+            text = "Место не было добавлено."
+
+        outbound_sender.send(
+            update.message.chat_id, update.message.reply_text, text=text
+        )
+
+
+class PlaceCreateJob(JobHandler):
+    """
+    Фоновое задание создания любимого места.
+
+    Задание повторяется, только если запрос не был доставлен шлюзу,
+    чтобы не создать место дважды.
+    """
+
+    # вид задания в очереди
+    KIND = "place.create"
+
+    def __init__(self, bot: Bot, runner: Optional[AsyncioRunner] = None):
+        """
+        Конструктор.
+
+        :param bot: Объект бота для изменения сообщения с подтверждением.
+        :param runner: Цикл событий для асинхронного клиента шлюза
+            (если не передан, используется синхронный клиент).
+        """
+
+        self.bot = bot
+        self.runner = runner
+
+    def run(self, job: Job) -> None:
+        """
+        Создание места и замена подтверждения результатом.
+
+        :param job: Задание.
+        :return:
+        """
+
+        payload = job.payload
+        place = {
+            "latitude": payload["latitude"],
+            "longitude": payload["longitude"],
+            "description": payload["description"],
+            "user_id": payload["user_id"],
+        }
+        try:
+            if self.runner:
+                result = self.runner.run(async_gateway_client.create(**place))
+            else:
+                result = gateway_client.create(**place)
+        except GatewayUnavailableError as exception:
+            if isinstance(exception, CircuitOpenError) or is_connection_error(
+                exception.__cause__
+            ):
+                raise
+            logger.exception("Place creation failed")
+            result = False
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Place creation failed")
+            result = False
+
+        self.__notify(
+            payload, "Место добавлено." if result else "Место не было добавлено."
+        )
+
+    def give_up(self, job: Job) -> None:
+        """
+        Сообщение о том, что место не удалось создать.
+
+        :param job: Задание.
+        :return:
+        """
+
+        self.__notify(
+            job.payload,
+            "Место не было добавлено: сервис недоступен. Попробуйте позже.",
+        )
+
+    def __notify(self, payload: dict, text: str) -> None:
+        """
+        Замена подтверждения текстом результата
+        (если подтверждение не было отправлено – отправка нового сообщения).
+
+        Ошибки API Telegram не приводят к повтору задания (место уже создано).
+
+        :param payload: Данные задания.
+        :param text: Текст сообщения.
+        :return:
+        """
+
+        method: Callable[..., Any]
+        if payload.get("message_id") is None:
+            method = partial(self.bot.send_message, chat_id=payload["chat_id"])
+        else:
+            method = partial(
+                self.bot.edit_message_text,
+                chat_id=payload["chat_id"],
+                message_id=payload["message_id"],
+            )
+        try:
+            outbound_sender.call(payload["chat_id"], method, text=text)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to edit the place creation message")
+
+
+class PlaceNearbyMessageHandler:
+    """
+    Функции для обработки запросов на поиск любимых мест рядом с пользователем.
+    """
+
+    def handle(self, update: Update, location: Location) -> None:
+        """
+        Поиск ближайших мест пользователя к отправленному местоположению.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param location: Объект с данными о местоположении.
+        :return:
+        """
+
+        places = gateway_client.get_nearby_places(
+            user_id=update.effective_user.id,  # type: ignore
+            latitude=location.latitude,
+            longitude=location.longitude,
+            limit=settings.chatbot_telegram.nearby_limit,
+            radius=settings.chatbot_telegram.nearby_radius,
+        )
+
+        self.__reply(update, places)
+
+    async def handle_async(self, update: Update, location: Location) -> None:
+        """
+        Поиск ближайших мест к отправленному местоположению в цикле событий asyncio.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param location: Объект с данными о местоположении.
+        :return:
+        """
+
+        places = await async_gateway_client.get_nearby_places(
+            user_id=update.effective_user.id,  # type: ignore
+            latitude=location.latitude,
+            longitude=location.longitude,
+            limit=settings.chatbot_telegram.nearby_limit,
+            radius=settings.chatbot_telegram.nearby_radius,
+        )
+
+        # API Telegram вызывается синхронно, поэтому отправка выполняется в пуле потоков
+        await asyncio.to_thread(self.__reply, update, places)
+
+    def __reply(self, update: Update, places: list[PlaceDistance]) -> None:
+        """
+        Отправка списка ближайших мест в чат-бот.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param places: Места и расстояния до них.
+        :return:
+        """
+
+        radius = settings.chatbot_telegram.nearby_radius
+        if places:
+            outbound_sender.send(
+                update.message.chat_id,
+                update.message.reply_text,
+                text=f"Любимые места в радиусе {radius:g} км:",
+                reply_markup=NearbyPlacesMenu().set_places(places).get_menu(),
+            )
         else:
-            # todo: добавить обработку исключительных ситуаций с логированием
-            update.message.reply_text("Место не было добавлено.")
+            outbound_sender.send(
+                update.message.chat_id,
+                update.message.reply_text,
+                text=f"В радиусе {radius:g} км нет любимых мест.",
+            )
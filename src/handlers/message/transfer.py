@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+import urllib.request
+from contextlib import closing
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from telegram import Document, Message, Update
+
+from clients.gateway import gateway_client
+from clients.gateway_async import async_gateway_client
+from clients.shemas import NewPlaceDTO
+from outbound.sender import outbound_sender
+from settings import settings
+from transfer.formats import FORMATS, UnsupportedFormatError, detect_format, read_places
+
+logger = logging.getLogger()
+
+
+def open_document(document: Document) -> BinaryIO:
+    """
+    Открытие загруженного в Telegram файла для потокового чтения.
+
+    Содержимое файла читается из ответа HTTP по частям, без сохранения на диск.
+
+    :param document: Объект файла из сообщения.
+    :return:
+    """
+
+    file = document.get_file(timeout=settings.transfer.download_timeout)
+    path = file.file_path or ""
+    if path.startswith(("http://", "https://")):
+        return urllib.request.urlopen(  # nosec
+            path, timeout=settings.transfer.download_timeout
+        )
+
+    # локальный сервер Bot API возвращает путь к файлу на диске
+    return open(path, "rb")  # pylint: disable=consider-using-with
+
+
+def next_chunk(chunks: Iterator[list[NewPlaceDTO]]) -> Optional[list[NewPlaceDTO]]:
+    """
+    Получение следующей части мест (для чтения файла в пуле потоков).
+
+    :param chunks: Части мест.
+    :return: Часть мест или `None`, если файл прочитан.
+    """
+
+    return next(chunks, None)
+
+
+class ImportProgress:
+    """
+    Ход импорта мест: счетчики и сообщение, в котором отображается ход импорта.
+    """
+
+    def __init__(self, message: Message):
+        """
+        Конструктор (отправляет сообщение о начале импорта).
+
+        :param message: Сообщение пользователя с файлом.
+        """
+
+        #: количество добавленных и пропущенных мест
+        self.added = 0
+        self.skipped = 0
+        self._updated = time.monotonic()
+        self._text = "Импорт мест начат…"
+        self._message = outbound_sender.call(
+            message.chat_id, message.reply_text, text=self._text
+        )
+
+    def chunks(
+        self, places: Iterable[Optional[NewPlaceDTO]], size: int
+    ) -> Iterator[list[NewPlaceDTO]]:
+        """
+        Разбиение прочитанных мест на части для создания одним запросом.
+
+        Некорректные записи (`None`) пропускаются и учитываются в счетчике.
+
+        :param places: Места, прочитанные из файла.
+        :param size: Количество мест в части.
+        :return:
+        """
+
+        places = iter(places)
+        while chunk := list(islice(places, size)):
+            valid = [place for place in chunk if place is not None]
+            self.skipped += len(chunk) - len(valid)
+            if valid:
+                yield valid
+
+    def update(self, final: bool = False) -> None:
+        """
+        Отображение хода импорта (не чаще `progress_interval` секунд).
+
+        :param final: Признак завершения импорта (отображается всегда).
+        :return:
+        """
+
+        if not final:
+            if time.monotonic() - self._updated < settings.transfer.progress_interval:
+                return
+            text = f"Импорт мест… Добавлено: {self.added}, пропущено: {self.skipped}."
+        else:
+            text = (
+                f"Импорт мест завершен. Добавлено: {self.added}, "
+                f"пропущено: {self.skipped}."
+            )
+
+        self.edit(text)
+
+    def fail(self) -> None:
+        """
+        Отображение ошибки импорта.
+
+        :return:
+        """
+
+        self.edit(
+            f"Импорт мест прерван из-за ошибки. Добавлено: {self.added}, "
+            f"пропущено: {self.skipped}."
+        )
+
+    def edit(self, text: str) -> None:
+        """
+        Изменение текста сообщения о ходе импорта.
+
+        :param text: Текст сообщения.
+        :return:
+        """
+
+        self._updated = time.monotonic()
+        if text != self._text:
+            self._text = text
+            outbound_sender.call(
+                self._message.chat_id, self._message.edit_text, text=text
+            )
+
+
+class PlacesImportMessageHandler:
+    """
+    Функции для обработки загруженного файла с любимыми местами (CSV, GPX, KML).
+    """
+
+    def handle(self, update: Update) -> None:
+        """
+        Импорт мест из файла.
+
+        Файл читается потоково, места создаются частями по `chunk_size` мест
+        одним запросом к шлюзу.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :return:
+        """
+
+        if (file_format := self.__check(update)) is None:
+            return
+
+        progress = ImportProgress(update.message)
+        try:
+            with closing(open_document(update.message.document)) as stream:
+                for chunk in progress.chunks(
+                    read_places(stream, file_format), settings.transfer.chunk_size
+                ):
+                    progress.added += gateway_client.create_many(
+                        chunk, user_id=update.effective_user.id  # type: ignore
+                    )
+                    progress.update()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Places import failed")
+            progress.fail()
+        else:
+            progress.update(final=True)
+
+    async def handle_async(self, update: Update) -> None:
+        """
+        Импорт мест из файла в цикле событий asyncio.
+
+        Чтение файла и вызовы API Telegram выполняются в пуле потоков,
+        создание мест – в цикле событий.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :return:
+        """
+
+        if (file_format := await asyncio.to_thread(self.__check, update)) is None:
+            return
+
+        progress = await asyncio.to_thread(ImportProgress, update.message)
+        try:
+            stream = await asyncio.to_thread(open_document, update.message.document)
+            with closing(stream):
+                chunks = progress.chunks(
+                    read_places(stream, file_format), settings.transfer.chunk_size
+                )
+                while chunk := await asyncio.to_thread(next_chunk, chunks):
+                    progress.added += await async_gateway_client.create_many(
+                        chunk, user_id=update.effective_user.id  # type: ignore
+                    )
+                    await asyncio.to_thread(progress.update)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Places import failed")
+            await asyncio.to_thread(progress.fail)
+        else:
+            await asyncio.to_thread(progress.update, True)
+
+    @staticmethod
+    def __check(update: Update) -> Optional[str]:
+        """
+        Проверка загруженного файла.
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :return: Формат файла или `None`, если файл не может быть импортирован.
+        """
+
+        document = update.message.document
+        try:
+            file_format = detect_format(document.file_name, document.mime_type)
+        except UnsupportedFormatError:
+            text = (
+                "Формат файла не поддерживается. "
+                f"Импорт возможен из файлов {', '.join(FORMATS).upper()}."
+            )
+        else:
+            max_size = settings.transfer.max_file_size
+            if not document.file_size or document.file_size <= max_size:
+                return file_format
+
+            text = f"Файл слишком большой (не более {max_size // 2 ** 20} МБ)."
+
+        outbound_sender.call(
+            update.message.chat_id, update.message.reply_text, text=text
+        )
+
+        return None
@@ -1,5 +1,7 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from menu.cache import render_cache
+
 
 class BaseMenu:
     """
@@ -24,10 +26,19 @@ class BaseMenu:
     def get_menu(self) -> InlineKeyboardMarkup:
         """
         Получение сформированного меню.
+
+        Меню с одинаковыми кнопками формируется однократно и берется из кеша.
+
         :return:
         """
 
-        return self.build_buttons(self.buttons)
+        key = (
+            type(self).__name__,
+            tuple(self.buttons.items()),
+            tuple(self.default_buttons.items()),
+        )
+
+        return render_cache.get_or_build(key, lambda: self.build_buttons(self.buttons))
 
     def build_buttons(self, buttons: dict[str, str]) -> InlineKeyboardMarkup:
         """
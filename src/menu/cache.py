@@ -0,0 +1,126 @@
+"""
+Кеш сформированных меню (разметки кнопок) вместе с их JSON-представлением.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from telegram import InlineKeyboardMarkup, ReplyKeyboardMarkup
+
+from settings import settings
+
+
+class FrozenMarkupMixin:
+    """
+    Разметка с однократно вычисляемым JSON-представлением.
+
+    Объекты разметки из кеша используются повторно и не должны изменяться.
+    """
+
+    __slots__ = ()
+
+    def to_json(self) -> str:
+        """
+        JSON-представление разметки (вычисляется при первом обращении).
+
+        :return:
+        """
+
+        json: Optional[str] = getattr(self, "_json", None)
+        if json is None:
+            json = super().to_json()  # type: ignore
+            self._json = json  # type: ignore
+
+        return json
+
+
+class FrozenInlineKeyboardMarkup(FrozenMarkupMixin, InlineKeyboardMarkup):
+    """
+    Inline-меню с однократно вычисляемым JSON-представлением.
+    """
+
+    __slots__ = ("_json",)
+
+
+class FrozenReplyKeyboardMarkup(FrozenMarkupMixin, ReplyKeyboardMarkup):
+    """
+    Кнопочное меню с однократно вычисляемым JSON-представлением.
+    """
+
+    __slots__ = ("_json",)
+
+
+class RenderCache:
+    """
+    Ограниченный по размеру кеш меню с вытеснением давно не используемых (LRU).
+
+    Ключ меню включает его содержимое (подписи и данные кнопок),
+    поэтому при изменении мест меню формируется заново.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Конструктор.
+
+        :param max_size: Максимальное количество меню в кеше.
+        """
+
+        self.max_size = max_size
+        self._items: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        #: количество попаданий в кеш
+        self.hits = 0
+        #: количество промахов
+        self.misses = 0
+
+    def get_or_build(
+        self, key: Hashable, build: Callable[[], InlineKeyboardMarkup]
+    ) -> InlineKeyboardMarkup:
+        """
+        Получение меню из кеша или его формирование.
+
+        :param key: Ключ меню.
+        :param build: Функция формирования меню.
+        :return:
+        """
+
+        with self._lock:
+            markup = self._items.get(key)
+            if markup is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+
+                return markup
+            self.misses += 1
+
+        markup = FrozenInlineKeyboardMarkup(build().inline_keyboard)
+        markup.to_json()
+        with self._lock:
+            self._items[key] = markup
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+        return markup
+
+    def clear(self) -> None:
+        """
+        Удаление всех меню.
+
+        :return:
+        """
+
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Получение статистики использования кеша.
+
+        :return:
+        """
+
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+# инициализация кеша меню (общий для всех обработчиков)
+render_cache = RenderCache(settings.chatbot_telegram.menu_cache_size)
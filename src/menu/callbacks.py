@@ -0,0 +1,273 @@
+"""
+Компактное кодирование данных кнопок inline-меню (`callback_data`).
+
+Данные кнопки содержат версию формата, код действия и аргументы:
+`1p9ix` – просмотр места 12345, `1nq3Zx0a-K` – страница списка после курсора.
+Идентификаторы записываются в системе счисления по основанию 36,
+списки идентификаторов разделяются `,`, аргументы – `|`.
+Telegram ограничивает данные кнопки 64 байтами, более длинные данные не кодируются.
+Курсоры страниц хранятся на сервере, в кнопку записывается их короткий токен.
+
+Данные кнопок прежнего формата (`place:12345`) и выведенных из употребления действий
+остаются в отправленных сообщениях, поэтому также декодируются.
+"""
+from typing import Any, NamedTuple, Sequence
+
+# максимальная длина данных кнопки в API Telegram (в байтах)
+CALLBACK_DATA_LIMIT = 64
+# версия формата данных
+VERSION = "1"
+# разделители аргументов и идентификаторов в списке
+ARGS_SEPARATOR = "|"
+IDS_SEPARATOR = ","
+
+# типы аргументов: идентификатор, список идентификаторов, строка,
+# курсор страницы (в данных кнопки – токен курсора)
+ARG_ID = "id"
+ARG_IDS = "ids"
+ARG_TEXT = "text"
+ARG_CURSOR = "cursor"
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+class CallbackDataError(ValueError):
+    """
+    Ошибка кодирования или декодирования данных кнопки.
+    """
+
+
+class CallbackAction(NamedTuple):
+    """
+    Действие кнопки inline-меню.
+    """
+
+    #: название действия
+    name: str
+    #: код действия в данных кнопки (один символ)
+    code: str
+    #: типы аргументов действия
+    args: tuple[str, ...]
+
+
+class CallbackData(NamedTuple):
+    """
+    Декодированные данные кнопки.
+    """
+
+    #: название действия
+    action: str
+    #: аргументы действия
+    args: tuple[Any, ...]
+
+
+# действия кнопок (коды действий не изменяются, пока действуют отправленные кнопки)
+ACTIONS = (
+    CallbackAction("place", "p", (ARG_ID,)),
+    CallbackAction("place.delete", "d", (ARG_ID,)),
+    CallbackAction("place.edit", "e", (ARG_ID,)),
+    CallbackAction("place.page", "n", (ARG_CURSOR,)),
+)
+# выведенные из употребления действия (только декодируются, их коды заняты)
+RETIRED_ACTIONS = (
+    # курсор страницы целиком в данных кнопки (длинный курсор не помещался в 64 байта)
+    CallbackAction("place.page", "g", (ARG_TEXT,)),
+)
+ACTIONS_BY_NAME = {action.name: action for action in ACTIONS}
+ACTIONS_BY_CODE = {action.code: action for action in (*ACTIONS, *RETIRED_ACTIONS)}
+# данные кнопок прежнего формата содержат аргументы целиком (как у выведенных действий)
+LEGACY_ACTIONS_BY_NAME = {
+    action.name: action for action in (*ACTIONS, *RETIRED_ACTIONS)
+}
+
+
+def encode_id(value: int) -> str:
+    """
+    Запись идентификатора по основанию 36.
+
+    :param value: Идентификатор.
+    :return:
+    """
+
+    if value < 0:
+        raise CallbackDataError(f"Negative id: {value}.")
+
+    digits = []
+    while True:
+        value, digit = divmod(value, 36)
+        digits.append(DIGITS[digit])
+        if not value:
+            break
+
+    return "".join(reversed(digits))
+
+
+def decode_id(value: str, base: int = 36) -> int:
+    """
+    Чтение идентификатора.
+
+    :param value: Запись идентификатора.
+    :param base: Основание системы счисления.
+    :return:
+    """
+
+    if not value.isalnum() or not value.isascii():
+        raise CallbackDataError(f"Invalid id: {value!r}.")
+
+    try:
+        return int(value, base)
+    except ValueError as exception:
+        raise CallbackDataError(f"Invalid id: {value!r}.") from exception
+
+
+def encode_arg(kind: str, value: Any, last: bool) -> str:
+    """
+    Запись аргумента действия.
+
+    :param kind: Тип аргумента.
+    :param value: Значение аргумента.
+    :param last: Признак последнего аргумента (может содержать разделитель аргументов).
+    :return:
+    """
+
+    if kind == ARG_ID:
+        return encode_id(int(value))
+    if kind == ARG_IDS:
+        return IDS_SEPARATOR.join(encode_id(int(item)) for item in value)
+    if kind == ARG_CURSOR:
+        # хранилище курсоров зависит от настроек, поэтому импортируется при первом использовании
+        # pylint: disable=import-outside-toplevel
+        from menu.cursors import page_cursors
+
+        return page_cursors.token(value or "")
+
+    text = "" if value is None else str(value)
+    if not last and ARGS_SEPARATOR in text:
+        raise CallbackDataError(f"Argument contains {ARGS_SEPARATOR!r}: {text!r}.")
+
+    return text
+
+
+def decode_arg(kind: str, value: str, base: int = 36) -> Any:
+    """
+    Чтение аргумента действия.
+
+    :param kind: Тип аргумента.
+    :param value: Запись аргумента.
+    :param base: Основание системы счисления идентификаторов.
+    :return:
+    """
+
+    if kind == ARG_ID:
+        return decode_id(value, base)
+    if kind == ARG_IDS:
+        return (
+            tuple(decode_id(item, base) for item in value.split(IDS_SEPARATOR))
+            if value
+            else ()
+        )
+    if kind == ARG_CURSOR:
+        # pylint: disable=import-outside-toplevel
+        from menu.cursors import page_cursors
+
+        if (cursor := page_cursors.cursor(value)) is None:
+            raise CallbackDataError(f"Expired page cursor token: {value!r}.")
+
+        return cursor
+
+    return value
+
+
+def encode(action: str, *args: Any) -> str:
+    """
+    Кодирование действия и его аргументов в данные кнопки.
+
+    :param action: Название действия.
+    :param args: Аргументы действия.
+    :return:
+    """
+
+    if (spec := ACTIONS_BY_NAME.get(action)) is None:
+        raise CallbackDataError(f"Unknown callback action: {action}.")
+    if len(args) != len(spec.args):
+        raise CallbackDataError(
+            f"Callback action {action} takes {len(spec.args)} arguments."
+        )
+
+    data = (
+        VERSION
+        + spec.code
+        + ARGS_SEPARATOR.join(
+            encode_arg(kind, value, last=index == len(args) - 1)
+            for index, (kind, value) in enumerate(zip(spec.args, args))
+        )
+    )
+    if len(data.encode()) > CALLBACK_DATA_LIMIT:
+        raise CallbackDataError(
+            f"Callback data exceeds {CALLBACK_DATA_LIMIT} bytes: {data!r}."
+        )
+
+    return data
+
+
+def decode(data: str) -> CallbackData:
+    """
+    Декодирование данных кнопки.
+
+    :param data: Данные кнопки.
+    :return:
+    """
+
+    if not data:
+        raise CallbackDataError("Empty callback data.")
+
+    if data[0] != VERSION:
+        return decode_legacy(data)
+
+    if (spec := ACTIONS_BY_CODE.get(data[1:2])) is None:
+        raise CallbackDataError(f"Unknown callback action code: {data!r}.")
+
+    return CallbackData(spec.name, decode_args(spec, data[2:].split(ARGS_SEPARATOR)))
+
+
+def decode_legacy(data: str) -> CallbackData:
+    """
+    Декодирование данных кнопки прежнего формата (`<действие>:<аргумент>`).
+
+    :param data: Данные кнопки.
+    :return:
+    """
+
+    name, separator, value = data.partition(":")
+    if not separator or (spec := LEGACY_ACTIONS_BY_NAME.get(name)) is None:
+        raise CallbackDataError(f"Unknown callback data: {data!r}.")
+
+    return CallbackData(spec.name, decode_args(spec, [value], base=10))
+
+
+def decode_args(
+    spec: CallbackAction, values: Sequence[str], base: int = 36
+) -> tuple[Any, ...]:
+    """
+    Чтение аргументов действия.
+
+    Последний аргумент содержит остаток данных (в том числе разделители).
+
+    :param spec: Действие.
+    :param values: Записи аргументов.
+    :param base: Основание системы счисления идентификаторов.
+    :return:
+    """
+
+    count = len(spec.args)
+    if not count:
+        return ()
+    if len(values) < count:
+        raise CallbackDataError(f"Callback action {spec.name} takes {count} arguments.")
+
+    head, tail = values[: count - 1], values[count - 1 :]  # noqa: E203
+    values = [*head, ARGS_SEPARATOR.join(tail)]
+
+    return tuple(
+        decode_arg(kind, value, base) for kind, value in zip(spec.args, values)
+    )
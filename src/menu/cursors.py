@@ -0,0 +1,71 @@
+"""
+Хранение курсоров страниц списка мест для кнопок навигации.
+
+Курсор шлюза может не поместиться в 64 байта данных кнопки,
+поэтому в кнопку записывается короткий токен, а курсор хранится на сервере.
+"""
+import base64
+import hashlib
+from typing import Optional
+
+from settings import settings
+from utils.ttlcache import TTLCache
+
+# длина хеша курсора в токене (в байтах, 8 символов в записи base64)
+TOKEN_BYTES = 6
+
+
+class PageCursors:
+    """
+    Ограниченное хранилище курсоров страниц по коротким токенам.
+
+    Токен вычисляется по курсору, поэтому повторная отрисовка страницы
+    не добавляет запись, а только продлевает ее время жизни.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Конструктор.
+
+        :param max_size: Максимальное количество курсоров.
+        :param ttl: Время хранения курсора (в секундах).
+        """
+
+        self._cursors: TTLCache[str] = TTLCache(max_size=max_size, ttl=ttl)
+
+    def token(self, cursor: str) -> str:
+        """
+        Сохранение курсора и получение его токена.
+
+        :param cursor: Курсор страницы (пустой курсор – первая страница).
+        :return:
+        """
+
+        if not cursor:
+            return ""
+
+        digest = hashlib.blake2b(cursor.encode(), digest_size=TOKEN_BYTES).digest()
+        token = base64.urlsafe_b64encode(digest).decode()
+        self._cursors.set(token, cursor)
+
+        return token
+
+    def cursor(self, token: str) -> Optional[str]:
+        """
+        Получение курсора по токену.
+
+        :param token: Токен курсора.
+        :return: Курсор или `None`, если курсор вытеснен или устарел.
+        """
+
+        if not token:
+            return ""
+
+        return self._cursors.get(token)
+
+
+# инициализация хранилища курсоров (общее для всех обработчиков)
+page_cursors = PageCursors(
+    settings.chatbot_telegram.page_cursors_size,
+    settings.chatbot_telegram.page_cursors_ttl,
+)
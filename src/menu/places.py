@@ -1,6 +1,9 @@
 from telegram import InlineKeyboardButton
 
+from clients.shemas import PlacesPageDTO
+from clients.spatial import PlaceDistance
 from menu.base import BaseMenu
+from menu.callbacks import encode
 
 
 class PlacesMenu(BaseMenu):
@@ -8,6 +11,31 @@ class PlacesMenu(BaseMenu):
     Функции меню для списка любимых мест.
     """
 
+    def set_page(self, page: PlacesPageDTO, is_first_page: bool) -> "PlacesMenu":
+        """
+        Назначение кнопок для страницы списка мест с кнопками навигации.
+
+        :param page: Страница списка мест.
+        :param is_first_page: Признак первой страницы списка.
+        :return:
+        """
+
+        self.set_buttons(
+            {
+                f"{place.city} ({place.locality})": encode("place", place.id)
+                for place in page.items
+            }
+        )
+
+        navigation = {}
+        if not is_first_page:
+            navigation["« В начало"] = encode("place.page", "")
+        if page.has_next_page and page.end_cursor:
+            navigation["Далее »"] = encode("place.page", page.end_cursor)
+        self.default_buttons = navigation
+
+        return self
+
     def build_menu(
         self, buttons: list[InlineKeyboardButton], cols_count: int
     ) -> list[list[InlineKeyboardButton]]:
@@ -22,6 +50,57 @@ class PlacesMenu(BaseMenu):
         return super().build_menu(buttons, 1)
 
 
+class NearbyPlacesMenu(BaseMenu):
+    """
+    Функции меню для списка ближайших любимых мест.
+    """
+
+    def set_places(self, places: list[PlaceDistance]) -> "NearbyPlacesMenu":
+        """
+        Назначение кнопок для мест с расстоянием до них.
+
+        :param places: Места и расстояния до них.
+        :return:
+        """
+
+        self.set_buttons(
+            {
+                f"{item.place.city} ({item.place.locality}) – "
+                f"{format_distance(item.distance)}": encode("place", item.place.id)
+                for item in places
+            }
+        )
+
+        return self
+
+    def build_menu(
+        self, buttons: list[InlineKeyboardButton], cols_count: int
+    ) -> list[list[InlineKeyboardButton]]:
+        """
+        Формирование меню на основе переданной конфигурации.
+
+        :param buttons: Список объектов кнопок.
+        :param cols_count: Количество колонок.
+        :return:
+        """
+
+        return super().build_menu(buttons, 1)
+
+
+def format_distance(distance: float) -> str:
+    """
+    Форматирование расстояния для подписи кнопки.
+
+    :param distance: Расстояние (в километрах).
+    :return:
+    """
+
+    if distance < 1:
+        return f"{round(distance * 1000)} м"
+
+    return f"{distance:.1f} км"
+
+
 class PlaceMenu(BaseMenu):
     """
     Функции меню для работы с объектом любимого места.
@@ -0,0 +1,194 @@
+"""
+Метрики состояния чат-бота, вычисляемые в момент сбора.
+"""
+from typing import Callable, Iterable, Optional
+
+from telegram.ext import Dispatcher
+
+from clients.cache import place_cache
+from clients.gateway import gateway_client
+from clients.gateway_async import async_gateway_client
+from menu.cache import render_cache
+from metrics.registry import Counter, Gauge, LabelValues, registry
+from outbound.sender import outbound_sender
+from runtime.aio import AsyncioRunner
+from runtime.jobs import JobWorkerPool
+from runtime.state import StateBudget
+
+
+def cache_stats(name: str) -> Callable[[], Iterable[tuple[LabelValues, float]]]:
+    """
+    Получение функции сбора показателя кеша мест.
+
+    :param name: Название показателя (`size`, `hits`, `misses`, `evictions`, `stale_hits`).
+    :return:
+    """
+
+    def collect() -> Iterable[tuple[LabelValues, float]]:
+        return [((cache,), stats[name]) for cache, stats in place_cache.stats().items()]
+
+    return collect
+
+
+def menu_cache_stats(name: str) -> Callable[[], Iterable[tuple[LabelValues, float]]]:
+    """
+    Получение функции сбора показателя кеша меню.
+
+    :param name: Название показателя (`size`, `hits`, `misses`).
+    :return:
+    """
+
+    def collect() -> Iterable[tuple[LabelValues, float]]:
+        return [((), render_cache.stats()[name])]
+
+    return collect
+
+
+def register_collectors(
+    dispatcher: Dispatcher,
+    runner: Optional[AsyncioRunner] = None,
+    jobs: Optional[JobWorkerPool] = None,
+    state: Optional[StateBudget] = None,
+) -> None:
+    """
+    Регистрация метрик очередей, кеша и отправки сообщений.
+
+    :param dispatcher: Диспетчер обновлений чат-бота.
+    :param runner: Цикл событий для асинхронной обработки обновлений.
+    :param jobs: Пул потоков, выполняющих фоновые задания.
+    :param state: Объект учета данных пользователей и чатов в памяти.
+    :return:
+    """
+
+    registry.register(
+        Gauge(
+            "chatbot_update_queue_size",
+            "Updates waiting in the dispatcher queue.",
+            collect=lambda: [((), dispatcher.update_queue.qsize())],
+        )
+    )
+    if runner:
+        registry.register(
+            Gauge(
+                "chatbot_async_in_flight",
+                "Coroutine handlers running or waiting in the event loop.",
+                collect=lambda: [((), runner.in_flight)],
+            )
+        )
+
+    if jobs:
+        registry.register(
+            Gauge(
+                "chatbot_jobs",
+                "Background jobs in the queue by status.",
+                labels=("status",),
+                collect=lambda: [
+                    ((status,), count) for status, count in jobs.stats().items()
+                ],
+            )
+        )
+
+    if state:
+        registry.register(
+            Gauge(
+                "chatbot_state_entries",
+                "Users and chats whose data is held in memory.",
+                labels=("kind",),
+                collect=lambda: [
+                    ((kind,), state.report()[f"{kind}s"]) for kind in ("user", "chat")
+                ],
+            )
+        )
+        registry.register(
+            Gauge(
+                "chatbot_state_bytes",
+                "Approximate size of user and chat data held in memory.",
+                collect=lambda: [((), state.report()["bytes"])],
+            )
+        )
+    registry.register(
+        Gauge(
+            "chatbot_menu_cache_entries",
+            "Rendered menus in the menu cache.",
+            collect=menu_cache_stats("size"),
+        )
+    )
+    for name in ("hits", "misses"):
+        registry.register(
+            Counter(
+                f"chatbot_menu_cache_{name}",
+                f"Menu cache {name}.",
+                collect=menu_cache_stats(name),
+            )
+        )
+
+    registry.register(
+        Gauge(
+            "chatbot_cache_entries",
+            "Entries in the place cache.",
+            labels=("cache",),
+            collect=cache_stats("size"),
+        )
+    )
+    for name in ("hits", "misses", "evictions", "stale_hits"):
+        registry.register(
+            Counter(
+                f"chatbot_cache_{name}",
+                f"Place cache {name}.",
+                labels=("cache",),
+                collect=cache_stats(name),
+            )
+        )
+
+    breakers = [gateway_client.breaker, async_gateway_client.breaker]
+    registry.register(
+        Gauge(
+            "gateway_circuit_state",
+            "GraphQL gateway circuit state (0 closed, 1 half-open, 2 open).",
+            labels=("circuit",),
+            collect=lambda: [((breaker.name,), breaker.state) for breaker in breakers],
+        )
+    )
+    registry.register(
+        Counter(
+            "gateway_circuit_opened",
+            "Times the GraphQL gateway circuit was opened.",
+            labels=("circuit",),
+            collect=lambda: [((breaker.name,), breaker.opened) for breaker in breakers],
+        )
+    )
+    registry.register(
+        Counter(
+            "gateway_batches",
+            "Batched place requests sent to the GraphQL gateway.",
+            collect=lambda: [((), getattr(async_gateway_client.loader, "batches", 0))],
+        )
+    )
+    registry.register(
+        Counter(
+            "gateway_batched_places",
+            "Places requested from the GraphQL gateway in batches.",
+            collect=lambda: [((), getattr(async_gateway_client.loader, "loaded", 0))],
+        )
+    )
+    registry.register(
+        Counter(
+            "telegram_skipped_edits",
+            "Message edits skipped because the content did not change.",
+            collect=lambda: [((), outbound_sender.skipped_edits)],
+        )
+    )
+    registry.register(
+        Gauge(
+            "telegram_pending_calls",
+            "Telegram API calls waiting in per-chat queues.",
+            collect=lambda: [((), outbound_sender.pending())],
+        )
+    )
+    registry.register(
+        Counter(
+            "telegram_retries",
+            "Telegram API calls retried after 429 Too Many Requests.",
+            collect=lambda: [((), outbound_sender.retries)],
+        )
+    )
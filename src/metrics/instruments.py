@@ -0,0 +1,202 @@
+"""
+Метрики обработчиков чат-бота и операций GraphQL-шлюза.
+"""
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Iterator, Optional, TypeVar
+
+from telegram import Update
+
+from metrics.registry import Counter, Gauge, Histogram, registry
+from runtime.logs import bind, log_context
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+HANDLER_DURATION = registry.register(
+    Histogram(
+        "chatbot_handler_duration_seconds",
+        "Duration of chatbot update handlers.",
+        buckets=settings.metrics.buckets,
+        labels=("handler",),
+    )
+)
+HANDLER_ERRORS = registry.register(
+    Counter(
+        "chatbot_handler_errors",
+        "Unhandled exceptions raised by chatbot update handlers.",
+        labels=("handler",),
+    )
+)
+HANDLERS_IN_FLIGHT = registry.register(
+    Gauge(
+        "chatbot_updates_in_flight",
+        "Updates being processed by chatbot handlers.",
+        labels=("handler",),
+    )
+)
+OPERATION_DURATION = registry.register(
+    Histogram(
+        "gateway_operation_duration_seconds",
+        "Duration of GraphQL gateway operations.",
+        buckets=settings.metrics.buckets,
+        labels=("operation",),
+    )
+)
+OPERATION_ERRORS = registry.register(
+    Counter(
+        "gateway_operation_errors",
+        "Failed GraphQL gateway operations.",
+        labels=("operation",),
+    )
+)
+OPERATIONS_IN_FLIGHT = registry.register(
+    Gauge(
+        "gateway_operations_in_flight",
+        "GraphQL gateway operations awaiting a response.",
+        labels=("operation",),
+    )
+)
+
+
+@contextmanager
+def track_operation(name: str) -> Iterator[None]:
+    """
+    Учет продолжительности и ошибок операции GraphQL-шлюза.
+
+    Подходит и для синхронного, и для асинхронного кода.
+
+    :param name: Название операции.
+    :return:
+    """
+
+    OPERATIONS_IN_FLIGHT.inc(operation=name)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        OPERATION_ERRORS.inc(operation=name)
+        raise
+    finally:
+        OPERATION_DURATION.observe(time.perf_counter() - started, operation=name)
+        OPERATIONS_IN_FLIGHT.dec(operation=name)
+
+
+class HandlerCall:
+    """
+    Вызов обработчика чат-бота, учитываемый в метриках.
+    """
+
+    def __init__(self, name: str):
+        """
+        Конструктор.
+
+        :param name: Название обработчика.
+        """
+
+        self.name = name
+        self.started = time.perf_counter()
+        #: обработка продолжается в корутине после возврата из обработчика
+        self.deferred = False
+        HANDLERS_IN_FLIGHT.inc(handler=name)
+
+    def finish(self, failed: bool = False) -> None:
+        """
+        Завершение вызова.
+
+        :param failed: Обработчик завершился исключением.
+        :return:
+        """
+
+        duration = time.perf_counter() - self.started
+        if failed:
+            HANDLER_ERRORS.inc(handler=self.name)
+        HANDLER_DURATION.observe(duration, handler=self.name)
+        HANDLERS_IN_FLIGHT.dec(handler=self.name)
+        logger.debug(
+            "Update handled", extra={"duration": round(duration, 6), "failed": failed}
+        )
+
+
+# текущий вызов обработчика (в потоке диспетчера)
+_current_call: ContextVar[Optional[HandlerCall]] = ContextVar(
+    "current_handler_call", default=None
+)
+
+
+def instrumented(method: F) -> F:
+    """
+    Учет продолжительности и ошибок обработчика чат-бота.
+
+    Если обработчик передает корутину в цикл событий через `defer`,
+    вызов завершается вместе с корутиной.
+
+    :param method: Обработчик.
+    :return:
+    """
+
+    @functools.wraps(method)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        fields: dict[str, Any] = {"handler": method.__name__}
+        update = next((arg for arg in args if isinstance(arg, Update)), None)
+        if update is not None:
+            fields["update_id"] = update.update_id
+            if update.effective_chat:
+                fields["chat_id"] = update.effective_chat.id
+
+        call = HandlerCall(method.__name__)
+        token = _current_call.set(call)
+        try:
+            with bind(**fields):
+                result = method(*args, **kwargs)
+        except Exception:
+            with bind(**fields):
+                call.finish(failed=True)
+            raise
+        finally:
+            _current_call.reset(token)
+
+        if not call.deferred:
+            with bind(**fields):
+                call.finish()
+
+        return result
+
+    return wrapper  # type: ignore
+
+
+def defer(coroutine: Coroutine[Any, Any, T]) -> Coroutine[Any, Any, T]:
+    """
+    Продолжение учета текущего вызова обработчика в корутине.
+
+    :param coroutine: Корутина обработчика.
+    :return:
+    """
+
+    call = _current_call.get()
+    if call is None:
+        return coroutine
+
+    call.deferred = True
+    # корутина выполняется в цикле событий в другом потоке, поэтому контекст
+    # журнала передается ей явно
+    fields = log_context.get()
+
+    async def tracked() -> T:
+        with bind(**fields):
+            try:
+                result = await coroutine
+            except BaseException:
+                call.finish(failed=True)  # type: ignore
+                raise
+            call.finish()  # type: ignore
+
+        return result
+
+    return tracked()
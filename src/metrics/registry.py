@@ -0,0 +1,309 @@
+"""
+Метрики в формате Prometheus (счетчики, показатели и гистограммы).
+"""
+import bisect
+import math
+import threading
+from typing import Callable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+# значения меток метрики
+LabelValues = tuple[str, ...]
+
+M = TypeVar("M", bound="Metric")
+
+
+def format_value(value: float) -> str:
+    """
+    Форматирование значения метрики.
+
+    :param value: Значение.
+    :return:
+    """
+
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """
+    Форматирование меток метрики.
+
+    :param names: Названия меток.
+    :param values: Значения меток.
+    :return:
+    """
+
+    if not names:
+        return ""
+
+    labels = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\""),
+        )
+        for name, value in zip(names, values)
+    )
+
+    return f"{{{labels}}}"
+
+
+class Metric:
+    """
+    Базовый класс метрики.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """
+        Конструктор.
+
+        :param name: Название метрики.
+        :param documentation: Описание метрики.
+        :param labels: Названия меток.
+        """
+
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        """
+        Получение значений меток в порядке их объявления.
+
+        :param labels: Значения меток по названиям.
+        :return:
+        """
+
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Metric {self.name} expects labels {self.labels}.")
+
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """
+        Получение значений метрики (суффикс названия, метки, значение).
+
+        :return:
+        """
+
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Представление метрики в текстовом формате Prometheus.
+
+        :return:
+        """
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(
+            f"{self.name}{suffix}{labels} {format_value(value)}"
+            for suffix, labels, value in self.samples()
+        )
+
+        return "\n".join(lines)
+
+
+class ValueMetric(Metric):
+    """
+    Базовый класс метрики с одним значением на набор меток.
+
+    Значения могут вычисляться функцией в момент сбора метрик.
+    """
+
+    # суффикс названия в текстовом формате
+    suffix = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Iterable[tuple[LabelValues, float]]]] = None,
+    ):
+        """
+        Конструктор.
+
+        :param name: Название метрики.
+        :param documentation: Описание метрики.
+        :param labels: Названия меток.
+        :param collect: Функция получения значений (значения меток, значение).
+        """
+
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Увеличение значения.
+
+        :param amount: Величина увеличения.
+        :param labels: Значения меток.
+        :return:
+        """
+
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            values = dict(self._values)
+        if self._collect:
+            values.update(self._collect())
+
+        for key, value in sorted(values.items()):
+            yield self.suffix, format_labels(self.labels, key), value
+
+
+class Counter(ValueMetric):
+    """
+    Счетчик (монотонно возрастающее значение).
+    """
+
+    type = "counter"
+    suffix = "_total"
+
+
+class Gauge(ValueMetric):
+    """
+    Показатель (произвольно изменяющееся значение).
+    """
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Установка значения.
+
+        :param value: Значение.
+        :param labels: Значения меток.
+        :return:
+        """
+
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Уменьшение значения.
+
+        :param amount: Величина уменьшения.
+        :param labels: Значения меток.
+        :return:
+        """
+
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    Гистограмма распределения значений (например, задержек).
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labels: Sequence[str] = (),
+    ):
+        """
+        Конструктор.
+
+        :param name: Название метрики.
+        :param documentation: Описание метрики.
+        :param buckets: Верхние границы интервалов.
+        :param labels: Названия меток.
+        """
+
+        super().__init__(name, documentation, labels)
+        self.buckets = sorted(buckets)
+        # количество значений по интервалам (последний – выше всех границ) и их сумма
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Учет значения.
+
+        :param value: Значение.
+        :param labels: Значения меток.
+        :return:
+        """
+
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            counts = {key: list(values) for key, values in self._counts.items()}
+            sums = dict(self._sums)
+
+        names = self.labels + ("le",)
+        for key, values in sorted(counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + [math.inf], values):
+                cumulative += count
+                bucket = format_labels(names, key + (format_value(bound),))
+                yield "_bucket", bucket, cumulative
+            yield "_sum", format_labels(self.labels, key), sums[key]
+            yield "_count", format_labels(self.labels, key), cumulative
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик приложения.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        """
+        Регистрация метрики (повторная регистрация заменяет прежнюю).
+
+        :param metric: Метрика.
+        :return:
+        """
+
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+        return metric
+
+    def render(self) -> str:
+        """
+        Представление всех метрик в текстовом формате Prometheus.
+
+        :return:
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# реестр метрик приложения (общий для всех модулей)
+registry = MetricsRegistry()
@@ -0,0 +1,80 @@
+"""
+HTTP-сервер для публикации метрик в формате Prometheus.
+"""
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from metrics.registry import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# тип содержимого текстового формата Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов метрик.
+    """
+
+    server: "MetricsServer"
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Отдача метрик.
+
+        :return:
+        """
+
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+            return
+
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер метрик (`GET /metrics`), работающий в отдельном потоке.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, registry: MetricsRegistry, listen: str, port: int):
+        """
+        Конструктор.
+
+        :param registry: Реестр метрик.
+        :param listen: Адрес для входящих соединений.
+        :param port: Порт для входящих соединений.
+        """
+
+        super().__init__((listen, port), MetricsRequestHandler)
+
+        self.registry = registry
+
+    def start(self) -> "MetricsServer":
+        """
+        Запуск сервера в фоновом потоке.
+
+        :return:
+        """
+
+        threading.Thread(
+            target=self.serve_forever, name="metrics-server", daemon=True
+        ).start()
+        logger.info("Metrics are served on %s:%s", *self.server_address[:2])
+
+        return self
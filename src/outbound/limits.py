@@ -0,0 +1,145 @@
+"""
+Ограничение частоты отправки сообщений в API Telegram.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты по алгоритму «корзины токенов».
+
+    Каждый вызов резервирует токен; если токенов нет, вызывающий получает время,
+    которое нужно подождать до своей очереди (вызовы выстраиваются в очередь, а не отклоняются).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Конструктор.
+
+        :param rate: Скорость пополнения (токенов в секунду).
+        :param capacity: Емкость корзины (допустимый всплеск).
+        :param clock: Источник времени.
+        """
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Резервирование токена.
+
+        :return: Время ожидания до использования токена (в секундах).
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    @property
+    def idle(self) -> bool:
+        """
+        Признак полной корзины (ограничитель не используется).
+
+        :return:
+        """
+
+        with self._lock:
+            elapsed = self._clock() - self._updated_at
+
+            return self._tokens + elapsed * self.rate >= self.capacity
+
+
+class ChatRateLimiter:
+    """
+    Ограничение частоты отправки сообщений: общее и для каждого чата.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: float,
+        group_rate: float,
+        max_chats: int = 10000,
+    ):
+        """
+        Конструктор.
+
+        :param global_rate: Общая частота отправки (сообщений в секунду).
+        :param chat_rate: Частота отправки в личный чат (сообщений в секунду).
+        :param chat_burst: Допустимый всплеск сообщений в один чат.
+        :param group_rate: Частота отправки в групповой чат (сообщений в секунду).
+        :param max_chats: Максимальное количество отслеживаемых чатов.
+        """
+
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_chats = max_chats
+        self._chats: OrderedDict[int, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reserve(self, chat_id: int) -> float:
+        """
+        Резервирование отправки сообщения в чат (без ожидания).
+
+        :param chat_id: Идентификатор чата.
+        :return: Время до разрешенной отправки (в секундах).
+        """
+
+        return max(self.global_bucket.reserve(), self._chat_bucket(chat_id).reserve())
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        """
+        Получение ограничителя для чата.
+
+        :param chat_id: Идентификатор чата.
+        :return:
+        """
+
+        with self._lock:
+            bucket = self._chats.get(chat_id)
+            if bucket is None:
+                # идентификаторы групповых чатов отрицательные
+                if chat_id < 0:
+                    bucket = TokenBucket(self.group_rate, self.chat_burst)
+                else:
+                    bucket = TokenBucket(self.chat_rate, self.chat_burst)
+                self._chats[chat_id] = bucket
+                self._evict()
+            else:
+                self._chats.move_to_end(chat_id)
+
+            return bucket
+
+    def _evict(self) -> None:
+        """
+        Удаление неиспользуемых ограничителей сверх допустимого количества чатов.
+
+        :return:
+        """
+
+        while len(self._chats) > self.max_chats:
+            chat_id, bucket = next(iter(self._chats.items()))
+            if not bucket.idle:
+                break
+            del self._chats[chat_id]
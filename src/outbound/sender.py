@@ -0,0 +1,495 @@
+"""
+Отправка исходящих сообщений в API Telegram с ограничением частоты.
+
+Вызовы API ставятся в очередь своего чата и выполняются потоками отправки,
+поэтому ограничение частоты или ответ `429 Too Many Requests` задерживают
+только сообщения того же чата, но не обработку обновлений других чатов.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, TypeVar
+
+from telegram import CallbackQuery, InlineKeyboardMarkup
+from telegram.error import BadRequest, RetryAfter
+
+from outbound.limits import ChatRateLimiter
+from settings import Outbound, settings
+from utils.ttlcache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Delivery:
+    """
+    Вызов метода API Telegram в очереди чата.
+    """
+
+    __slots__ = ("method", "kwargs", "future", "attempt", "reserved")
+
+    def __init__(self, method: Callable[..., Any], kwargs: dict[str, Any]):
+        """
+        Конструктор.
+
+        :param method: Метод API.
+        :param kwargs: Параметры метода.
+        """
+
+        self.method = method
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        #: количество повторов после ответа `429 Too Many Requests`
+        self.attempt = 0
+        #: признак зарезервированной отправки (ограничитель частоты уже учел вызов)
+        self.reserved = False
+
+
+class OutboundSender:
+    """
+    Вызов методов API Telegram с соблюдением общих ограничений и ограничений для чатов.
+
+    Вызовы одного чата выполняются по порядку. Если чат превысил ограничение частоты
+    или получил ответ `429 Too Many Requests`, его очередь откладывается на время ожидания,
+    а потоки отправки тем временем обслуживают другие чаты.
+    """
+
+    def __init__(self, config: Outbound):
+        """
+        Конструктор.
+
+        :param config: Конфигурация исходящих сообщений.
+        """
+
+        self.limiter = ChatRateLimiter(
+            global_rate=config.global_rate,
+            chat_rate=config.chat_rate,
+            chat_burst=config.chat_burst,
+            group_rate=config.group_rate,
+        )
+        self.max_retries = config.max_retries
+        self.workers = config.workers
+        # хеши содержимого сообщений для пропуска неизменяющих редактирований
+        self.hashes: TTLCache[str] = TTLCache(config.max_hashes, config.hash_ttl)
+        #: количество пропущенных неизменяющих редактирований
+        self.skipped_edits = 0
+        #: количество повторов после ответа `429 Too Many Requests`
+        self.retries = 0
+        # очереди вызовов чатов; чат находится либо в списке готовых к отправке,
+        # либо в списке отложенных (время, порядковый номер, чат), либо обслуживается потоком
+        self._queues: dict[int, deque[Delivery]] = {}
+        self._ready: deque[int] = deque()
+        self._delayed: list[tuple[float, int, int]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+
+    def send(
+        self, chat_id: int, method: Callable[..., T], **kwargs: Any
+    ) -> "Future[T]":
+        """
+        Постановка вызова метода API Telegram в очередь чата (без ожидания).
+
+        Ошибки вызова записываются в журнал, поэтому результат можно не проверять.
+
+        :param chat_id: Идентификатор чата.
+        :param method: Метод API (например, `chat.send_message`).
+        :param kwargs: Параметры метода.
+        :return: Результат вызова.
+        """
+
+        future = self.__submit(chat_id, method, kwargs)
+        future.add_done_callback(self.__log_failure)
+
+        return future
+
+    def call(self, chat_id: int, method: Callable[..., T], **kwargs: Any) -> T:
+        """
+        Вызов метода API Telegram для чата с ожиданием результата.
+
+        Используется вне потока диспетчера (в фоновых заданиях и обработчиках `run_async`).
+
+        :param chat_id: Идентификатор чата.
+        :param method: Метод API (например, `chat.send_message`).
+        :param kwargs: Параметры метода.
+        :return:
+        """
+
+        return self.__submit(chat_id, method, kwargs).result()
+
+    def pending(self) -> int:
+        """
+        Количество вызовов, ожидающих отправки.
+
+        :return:
+        """
+
+        with self._condition:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Отправка оставшихся вызовов и остановка потоков отправки.
+
+        :param timeout: Время ожидания каждого потока (в секундах).
+        :return:
+        """
+
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def __submit(
+        self, chat_id: int, method: Callable[..., Any], kwargs: dict[str, Any]
+    ) -> Future:
+        """
+        Постановка вызова в очередь чата.
+
+        :param chat_id: Идентификатор чата.
+        :param method: Метод API.
+        :param kwargs: Параметры метода.
+        :return:
+        """
+
+        delivery = Delivery(method, kwargs)
+        with self._condition:
+            if not self._threads:
+                self.__start()
+            if (queue := self._queues.get(chat_id)) is None:
+                # чат не обслуживается – он сразу готов к отправке
+                queue = self._queues[chat_id] = deque()
+                self._ready.append(chat_id)
+                self._condition.notify()
+            queue.append(delivery)
+
+        return delivery.future
+
+    def __start(self) -> None:
+        """
+        Запуск потоков отправки (вызывается под блокировкой при первом вызове).
+
+        :return:
+        """
+
+        self._stopping = False
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self.__work, name=f"outbound-{number}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def __work(self) -> None:
+        """
+        Цикл потока отправки: выполнение вызовов готовых чатов по одному.
+
+        :return:
+        """
+
+        while (chat_id := self.__next_chat()) is not None:
+            delivery = self._queues[chat_id][0]
+            if not delivery.reserved:
+                delivery.reserved = True
+                if (delay := self.limiter.reserve(chat_id)) > 0:
+                    self.__delay(chat_id, delay)
+                    continue
+
+            if (retry_after := self.__deliver(delivery)) is not None:
+                self.__delay(chat_id, retry_after)
+                continue
+
+            with self._condition:
+                queue = self._queues[chat_id]
+                queue.popleft()
+                if queue:
+                    self._ready.append(chat_id)
+                    self._condition.notify()
+                else:
+                    del self._queues[chat_id]
+
+    def __next_chat(self) -> Optional[int]:
+        """
+        Ожидание чата, готового к отправке.
+
+        :return: Идентификатор чата или `None`, если отправка остановлена и очереди пусты.
+        """
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    self._ready.append(heapq.heappop(self._delayed)[2])
+                if self._ready:
+                    return self._ready.popleft()
+                if self._stopping and not self._queues:
+                    return None
+                self._condition.wait(
+                    self._delayed[0][0] - now if self._delayed else None
+                )
+
+    def __delay(self, chat_id: int, delay: float) -> None:
+        """
+        Откладывание очереди чата.
+
+        :param chat_id: Идентификатор чата.
+        :param delay: Время ожидания (в секундах).
+        :return:
+        """
+
+        with self._condition:
+            heapq.heappush(
+                self._delayed,
+                (time.monotonic() + delay, next(self._sequence), chat_id),
+            )
+            # ожидающие потоки пересчитывают время до ближайшего отложенного чата
+            self._condition.notify()
+
+    def __deliver(self, delivery: Delivery) -> Optional[float]:
+        """
+        Выполнение вызова.
+
+        :param delivery: Вызов.
+        :return: Время до повтора после ответа `429 Too Many Requests` или `None`,
+            если вызов завершен.
+        """
+
+        try:
+            result = delivery.method(**delivery.kwargs)
+        except RetryAfter as exception:
+            delivery.attempt += 1
+            if delivery.attempt <= self.max_retries:
+                self.retries += 1
+                delivery.reserved = False
+                logger.warning(
+                    "Telegram flood control, retry in %s s", exception.retry_after
+                )
+
+                return float(exception.retry_after)
+            delivery.future.set_exception(exception)
+        except Exception as exception:  # pylint: disable=broad-except
+            delivery.future.set_exception(exception)
+        else:
+            delivery.future.set_result(result)
+
+        return None
+
+    @staticmethod
+    def __log_failure(future: Future) -> None:
+        """
+        Запись в журнал ошибки вызова, поставленного в очередь без ожидания.
+
+        :param future: Результат вызова.
+        :return:
+        """
+
+        if (exception := future.exception()) is not None:
+            logger.error("Telegram API call failed", exc_info=exception)
+
+    def edit(
+        self,
+        callback_query: CallbackQuery,
+        text: Optional[str] = None,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Постановка в очередь редактирования сообщения одним вызовом API
+        (текст вместе с inline-меню).
+
+        Редактирование пропускается, если содержимое сообщения не изменилось.
+
+        :param callback_query: Объект запроса обратного вызова с редактируемым сообщением.
+        :param text: Новый текст сообщения (если не передан – меняется только inline-меню).
+        :param reply_markup: Новое inline-меню.
+        :param kwargs: Дополнительные параметры метода (например, `parse_mode`).
+        :return:
+        """
+
+        message = callback_query.message
+        key = (
+            f"{message.chat_id}:{message.message_id}"
+            if message
+            else str(callback_query.inline_message_id)
+        )
+        content_hash = self.__content_hash(text, reply_markup, kwargs)
+        if self.hashes.get(key) == content_hash:
+            self.skipped_edits += 1
+
+            return
+
+        chat_id = message.chat_id if message else callback_query.from_user.id
+        if text is not None:
+            future = self.__submit(
+                chat_id,
+                callback_query.edit_message_text,
+                {"text": text, "reply_markup": reply_markup, **kwargs},
+            )
+        else:
+            future = self.__submit(
+                chat_id,
+                callback_query.edit_message_reply_markup,
+                {"reply_markup": reply_markup},
+            )
+        future.add_done_callback(
+            lambda future: self.__edited(future, key, content_hash)
+        )
+
+    def __edited(self, future: Future, key: str, content_hash: str) -> None:
+        """
+        Сохранение хеша содержимого отредактированного сообщения.
+
+        :param future: Результат редактирования.
+        :param key: Ключ сообщения.
+        :param content_hash: Хеш нового содержимого.
+        :return:
+        """
+
+        if (exception := future.exception()) is not None:
+            # сообщение уже содержит такие же данные
+            if not (
+                isinstance(exception, BadRequest)
+                and "not modified" in exception.message
+            ):
+                logger.error("Telegram API call failed", exc_info=exception)
+                return
+            self.skipped_edits += 1
+
+        self.hashes.set(key, content_hash)
+
+    @staticmethod
+    def __content_hash(
+        text: Optional[str],
+        reply_markup: Optional[InlineKeyboardMarkup],
+        kwargs: dict[str, Any],
+    ) -> str:
+        """
+        Вычисление хеша содержимого сообщения.
+
+        :param text: Текст сообщения.
+        :param reply_markup: Inline-меню.
+        :param kwargs: Дополнительные параметры.
+        :return:
+        """
+
+        content = json.dumps(
+            # JSON-представление меню из кеша вычисляется однократно
+            [text, reply_markup.to_json() if reply_markup else None, kwargs],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class Outbox:
+    """
+    Исходящие операции одного обработчика.
+
+    Редактирования одного сообщения объединяются в один вызов API и ставятся в очередь чата,
+    а ответ на обратный вызов отправляется сразу (он завершает ожидание в клиенте).
+    """
+
+    def __init__(self, sender: "OutboundSender"):
+        """
+        Конструктор.
+
+        :param sender: Отправитель сообщений.
+        """
+
+        self.sender = sender
+        self._edits: dict[str, dict[str, Any]] = {}
+        self._answers: list[tuple[CallbackQuery, dict[str, Any]]] = []
+
+    def edit_message_text(
+        self, callback_query: CallbackQuery, text: str, **kwargs: Any
+    ) -> "Outbox":
+        """
+        Добавление редактирования текста сообщения.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param text: Новый текст.
+        :param kwargs: Дополнительные параметры (например, `parse_mode`).
+        :return:
+        """
+
+        self.__edit(callback_query)["params"].update(text=text, **kwargs)
+
+        return self
+
+    def edit_message_reply_markup(
+        self, callback_query: CallbackQuery, reply_markup: InlineKeyboardMarkup
+    ) -> "Outbox":
+        """
+        Добавление редактирования inline-меню сообщения.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param reply_markup: Новое inline-меню.
+        :return:
+        """
+
+        self.__edit(callback_query)["params"]["reply_markup"] = reply_markup
+
+        return self
+
+    def answer(self, callback_query: CallbackQuery, **kwargs: Any) -> "Outbox":
+        """
+        Добавление ответа на обратный вызов.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :param kwargs: Параметры ответа (например, `text`).
+        :return:
+        """
+
+        self._answers.append((callback_query, kwargs))
+
+        return self
+
+    def flush(self) -> None:
+        """
+        Отправка накопленных операций (редактирования – через очередь чата).
+
+        :return:
+        """
+
+        edits, self._edits = self._edits, {}
+        answers, self._answers = self._answers, []
+        for edit in edits.values():
+            self.sender.edit(edit["callback_query"], **edit["params"])
+        for callback_query, kwargs in answers:
+            # ответ на обратный вызов не является сообщением и не ограничивается по чату
+            callback_query.answer(**kwargs)
+
+    def __edit(self, callback_query: CallbackQuery) -> dict[str, Any]:
+        """
+        Получение накопленного редактирования сообщения.
+
+        :param callback_query: Объект запроса обратного вызова.
+        :return:
+        """
+
+        message = callback_query.message
+        key = (
+            f"{message.chat_id}:{message.message_id}"
+            if message
+            else str(callback_query.inline_message_id)
+        )
+
+        return self._edits.setdefault(
+            key, {"callback_query": callback_query, "params": {}}
+        )
+
+
+# инициализация отправителя исходящих сообщений (общий для всех обработчиков)
+outbound_sender = OutboundSender(settings.outbound)
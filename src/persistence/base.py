@@ -0,0 +1,59 @@
+"""
+Интерфейс хранилища состояния пользователей чат-бота.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+# ключ диалога (идентификаторы чата и/или пользователя)
+ConversationKey = tuple[int, ...]
+# сохраняемые состояния диалогов: (название обработчика, ключ) → состояние (`None` – удалить)
+ConversationStates = dict[tuple[str, ConversationKey], Optional[object]]
+
+
+class StateStore(ABC):
+    """
+    Базовый класс, реализующий интерфейс хранилища состояния.
+
+    Методы могут вызываться из разных потоков.
+    """
+
+    @abstractmethod
+    def load_user_data(self, user_id: int) -> Optional[dict[Any, Any]]:
+        """
+        Загрузка данных пользователя.
+
+        :param user_id: Идентификатор пользователя.
+        :return: Данные пользователя или `None`, если они не сохранялись.
+        """
+
+    @abstractmethod
+    def load_conversation(self, name: str, key: ConversationKey) -> Optional[object]:
+        """
+        Загрузка состояния диалога.
+
+        :param name: Название обработчика диалога.
+        :param key: Ключ диалога.
+        :return: Состояние диалога или `None`, если диалог не ведется.
+        """
+
+    @abstractmethod
+    def save(
+        self,
+        user_data: dict[int, dict[Any, Any]],
+        conversations: ConversationStates,
+    ) -> None:
+        """
+        Сохранение пакета изменений одной транзакцией.
+
+        :param user_data: Данные пользователей по идентификаторам.
+        :param conversations: Состояния диалогов.
+        :return:
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Закрытие хранилища.
+
+        :return:
+        """
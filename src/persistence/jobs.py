@@ -0,0 +1,212 @@
+"""
+Очередь фоновых заданий в файле SQLite.
+
+Задания сохраняются до их выполнения, поэтому не теряются при перезапуске
+чат-бота. Выбранное обработчиком задание арендуется на `lease_timeout` секунд:
+если процесс завершился, не выполнив задание, после истечения аренды
+задание выбирается повторно.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_run_at ON jobs (status, run_at);
+"""
+
+# состояния заданий: ожидает выполнения, выполняется (арендовано), не выполнено
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_FAILED = "failed"
+
+
+class Job(NamedTuple):
+    """
+    Фоновое задание.
+    """
+
+    #: идентификатор задания
+    id: int
+    #: вид задания (определяет обработчик)
+    kind: str
+    #: данные задания
+    payload: dict[str, Any]
+    #: номер текущей попытки выполнения (начиная с 1)
+    attempt: int
+
+
+class SQLiteJobQueue:
+    """
+    Очередь фоновых заданий в файле SQLite.
+
+    Методы могут вызываться из разных потоков и процессов: выбор задания
+    выполняется одним запросом `UPDATE … RETURNING`, поэтому одно задание
+    не может быть выбрано дважды.
+    """
+
+    def __init__(self, path: str, lease_timeout: float):
+        """
+        Конструктор.
+
+        :param path: Путь к файлу базы данных.
+        :param lease_timeout: Время аренды выбранного задания (в секундах).
+        """
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.lease_timeout = lease_timeout
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def put(self, kind: str, payload: dict[str, Any]) -> int:
+        """
+        Добавление задания в очередь.
+
+        :param kind: Вид задания.
+        :param payload: Данные задания (сериализуются в JSON).
+        :return: Идентификатор задания.
+        """
+
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO jobs (kind, payload, run_at) VALUES (?, ?, ?)",
+                (kind, json.dumps(payload), time.time()),
+            )
+
+        return int(cursor.lastrowid)  # type: ignore
+
+    def claim(self) -> Optional[Job]:
+        """
+        Выбор задания, готового к выполнению, с арендой на `lease_timeout` секунд.
+
+        Выбираются ожидающие задания, время повтора которых наступило,
+        и выполняемые задания с истекшей арендой.
+
+        :return: Задание или `None`, если готовых заданий нет.
+        """
+
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                """
+                UPDATE jobs SET status = ?, attempts = attempts + 1, run_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status IN (?, ?) AND run_at <= ?
+                    ORDER BY run_at, id
+                    LIMIT 1
+                )
+                RETURNING id, kind, payload, attempts
+                """,
+                (
+                    STATUS_RUNNING,
+                    now + self.lease_timeout,
+                    STATUS_PENDING,
+                    STATUS_RUNNING,
+                    now,
+                ),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return Job(id=row[0], kind=row[1], payload=json.loads(row[2]), attempt=row[3])
+
+    def complete(self, job_id: int) -> None:
+        """
+        Удаление выполненного задания.
+
+        :param job_id: Идентификатор задания.
+        :return:
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def retry(self, job_id: int, delay: float, error: str) -> None:
+        """
+        Возврат задания в очередь для повторного выполнения.
+
+        :param job_id: Идентификатор задания.
+        :param delay: Задержка перед повтором (в секундах).
+        :param error: Описание ошибки последней попытки.
+        :return:
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, run_at = ?, error = ? WHERE id = ?",
+                (STATUS_PENDING, time.time() + delay, error, job_id),
+            )
+
+    def fail(self, job_id: int, error: str) -> None:
+        """
+        Завершение задания, попытки выполнения которого исчерпаны.
+
+        Задание остается в базе данных для разбора.
+
+        :param job_id: Идентификатор задания.
+        :param error: Описание ошибки последней попытки.
+        :return:
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, error = ? WHERE id = ?",
+                (STATUS_FAILED, error, job_id),
+            )
+
+    def next_run_at(self) -> Optional[float]:
+        """
+        Время, когда будет готово к выполнению следующее задание.
+
+        :return: Время (`time.time`) или `None`, если очередь пуста.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT MIN(run_at) FROM jobs WHERE status IN (?, ?)",
+                (STATUS_PENDING, STATUS_RUNNING),
+            ).fetchone()
+
+        return row[0]
+
+    def counts(self) -> dict[str, int]:
+        """
+        Количество заданий по состояниям.
+
+        :return:
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+
+        return {STATUS_PENDING: 0, STATUS_RUNNING: 0, STATUS_FAILED: 0, **dict(rows)}
+
+    def close(self) -> None:
+        """
+        Закрытие очереди.
+
+        :return:
+        """
+
+        with self._lock:
+            self._connection.close()
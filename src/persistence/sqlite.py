@@ -0,0 +1,109 @@
+"""
+Хранилище состояния пользователей чат-бота в файле SQLite.
+"""
+import json
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from persistence.base import ConversationKey, ConversationStates, StateStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state BLOB NOT NULL,
+    PRIMARY KEY (name, key)
+);
+"""
+
+
+class SQLiteStateStore(StateStore):
+    """
+    Хранилище состояния в файле SQLite.
+
+    Значения сериализуются `pickle`, так как данные пользователя
+    содержат объекты Telegram (например, `Location`).
+    """
+
+    def __init__(self, path: str):
+        """
+        Конструктор.
+
+        :param path: Путь к файлу базы данных.
+        """
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # журнал WAL позволяет читать во время записи пакета изменений,
+        # а синхронизация NORMAL не выполняет fsync на каждую транзакцию
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    @staticmethod
+    def _conversation_key(key: ConversationKey) -> str:
+        """
+        Представление ключа диалога для хранения.
+
+        :param key: Ключ диалога.
+        :return:
+        """
+
+        return json.dumps(list(key))
+
+    def load_user_data(self, user_id: int) -> Optional[dict[Any, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM user_data WHERE user_id = ?", (user_id,)
+            ).fetchone()
+
+        return pickle.loads(row[0]) if row else None
+
+    def load_conversation(self, name: str, key: ConversationKey) -> Optional[object]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state FROM conversations WHERE name = ? AND key = ?",
+                (name, self._conversation_key(key)),
+            ).fetchone()
+
+        return pickle.loads(row[0]) if row else None
+
+    def save(
+        self,
+        user_data: dict[int, dict[Any, Any]],
+        conversations: ConversationStates,
+    ) -> None:
+        users = [(user_id, pickle.dumps(data)) for user_id, data in user_data.items()]
+        updated = []
+        deleted = []
+        for (name, key), state in conversations.items():
+            if state is None:
+                deleted.append((name, self._conversation_key(key)))
+            else:
+                updated.append((name, self._conversation_key(key), pickle.dumps(state)))
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO user_data (user_id, data) VALUES (?, ?)", users
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO conversations (name, key, state) VALUES (?, ?, ?)",
+                updated,
+            )
+            self._connection.executemany(
+                "DELETE FROM conversations WHERE name = ? AND key = ?", deleted
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,306 @@
+"""
+Сохранение состояния диалогов и данных пользователей с отложенной пакетной записью.
+"""
+import hashlib
+import logging
+import pickle
+import threading
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Optional
+
+from telegram.ext import BasePersistence
+from telegram.ext.utils.types import ConversationDict
+
+from persistence.base import ConversationKey, ConversationStates, StateStore
+
+logger = logging.getLogger(__name__)
+
+
+class LazyUserData(defaultdict):
+    """
+    Данные пользователей, загружаемые из хранилища при первом обращении.
+    """
+
+    def __init__(self, load: Callable[[int], dict], *args: Any):
+        """
+        Конструктор.
+
+        :param load: Функция загрузки данных пользователя.
+        :param args: Начальные данные.
+        """
+
+        super().__init__(dict, *args)
+        self._load = load
+
+    def __missing__(self, user_id: int) -> dict:
+        data = self[user_id] = self._load(user_id)
+
+        return data
+
+    def __copy__(self) -> "LazyUserData":
+        return type(self)(self._load, self)
+
+    copy = __copy__
+
+
+class LazyConversations(dict):
+    """
+    Состояния диалогов, загружаемые из хранилища при первом обращении.
+
+    `ConversationHandler` получает состояние методом `get`, поэтому загрузка
+    выполняется в нем; отсутствующие в хранилище ключи запоминаются,
+    чтобы не запрашивать их повторно.
+    """
+
+    def __init__(self, load: Callable[[ConversationKey], Optional[object]]):
+        """
+        Конструктор.
+
+        :param load: Функция загрузки состояния диалога.
+        """
+
+        super().__init__()
+        self._load = load
+        self._loaded: set[ConversationKey] = set()
+
+    def get(self, key: ConversationKey, default: Optional[object] = None) -> Any:
+        if key not in self._loaded:
+            self._loaded.add(key)
+            if not super().__contains__(key):
+                state = self._load(key)
+                if state is not None:
+                    self[key] = state
+
+        return super().get(key, default)
+
+    def __setitem__(self, key: ConversationKey, value: object) -> None:
+        self._loaded.add(key)
+        super().__setitem__(key, value)
+
+    def forget(self, key: ConversationKey) -> None:
+        """
+        Удаление состояния диалога из памяти (при следующем обращении оно загрузится
+        из хранилища).
+
+        :param key: Ключ диалога.
+        :return:
+        """
+
+        self._loaded.discard(key)
+        self.pop(key, None)
+
+
+class WriteBehindPersistence(BasePersistence):
+    """
+    Сохранение состояния диалогов и данных пользователей в хранилище.
+
+    Изменения накапливаются в памяти и записываются фоновым потоком
+    одной транзакцией раз в `flush_interval` секунд или по достижении `batch_size`
+    изменений. Данные загружаются лениво – при первом обращении к пользователю,
+    поэтому время запуска не зависит от количества пользователей.
+    """
+
+    def __init__(self, store: StateStore, flush_interval: float, batch_size: int):
+        """
+        Конструктор.
+
+        :param store: Хранилище состояния.
+        :param flush_interval: Интервал записи изменений (в секундах).
+        :param batch_size: Количество изменений, при котором запись выполняется сразу.
+        """
+
+        super().__init__(
+            store_user_data=True, store_chat_data=False, store_bot_data=False
+        )
+
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending_users: dict[int, dict] = {}
+        self._pending_conversations: ConversationStates = {}
+        # отпечатки последних сохраненных данных пользователей (для пропуска неизменных)
+        self._digests: dict[int, bytes] = {}
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="persistence-writer", daemon=True
+        )
+        self._thread.start()
+
+    @staticmethod
+    def _digest(data: dict) -> bytes:
+        """
+        Получение отпечатка данных пользователя.
+
+        :param data: Данные пользователя.
+        :return:
+        """
+
+        return hashlib.blake2b(pickle.dumps(data), digest_size=16).digest()
+
+    def _load_user_data(self, user_id: int) -> dict:
+        """
+        Загрузка данных пользователя (с учетом еще не записанных изменений).
+
+        :param user_id: Идентификатор пользователя.
+        :return:
+        """
+
+        with self._lock:
+            if user_id in self._pending_users:
+                return dict(self._pending_users[user_id])
+
+        data = self.store.load_user_data(user_id) or {}
+        self._digests[user_id] = self._digest(data)
+
+        return data
+
+    def _load_conversation(self, name: str, key: ConversationKey) -> Optional[object]:
+        """
+        Загрузка состояния диалога (с учетом еще не записанных изменений).
+
+        :param name: Название обработчика диалога.
+        :param key: Ключ диалога.
+        :return:
+        """
+
+        with self._lock:
+            if (name, key) in self._pending_conversations:
+                return self._pending_conversations[(name, key)]
+
+        return self.store.load_conversation(name, key)
+
+    def get_user_data(self) -> DefaultDict[int, dict]:
+        return LazyUserData(self._load_user_data)
+
+    def get_chat_data(self) -> DefaultDict[int, dict]:
+        return defaultdict(dict)
+
+    def get_bot_data(self) -> dict:
+        return {}
+
+    def get_conversations(self, name: str) -> ConversationDict:
+        return LazyConversations(lambda key: self._load_conversation(name, key))
+
+    def update_conversation(
+        self, name: str, key: ConversationKey, new_state: Optional[object]
+    ) -> None:
+        with self._lock:
+            self._pending_conversations[(name, key)] = new_state
+        self._notify()
+
+    def update_user_data(self, user_id: int, data: dict) -> None:
+        # диспетчер передает данные пользователя после каждого обновления
+        digest = self._digest(data)
+        if self._digests.get(user_id) == digest:
+            return
+
+        self._digests[user_id] = digest
+        with self._lock:
+            self._pending_users[user_id] = data
+        self._notify()
+
+    def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    def forget_user(self, user_id: int) -> None:
+        """
+        Удаление отпечатка данных пользователя, вытесненных из памяти.
+
+        Еще не записанные изменения сохраняются при следующей записи.
+
+        :param user_id: Идентификатор пользователя.
+        :return:
+        """
+
+        self._digests.pop(user_id, None)
+
+    def update_bot_data(self, data: dict) -> None:
+        pass
+
+    def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    def _notify(self) -> None:
+        """
+        Запуск записи при накоплении пакета изменений.
+
+        После остановки фоновой записи изменения записываются сразу.
+
+        :return:
+        """
+
+        if self._stopped.is_set():
+            self._write()
+        elif (
+            len(self._pending_users) + len(self._pending_conversations)
+            >= self.batch_size
+        ):
+            self._wakeup.set()
+
+    def _write(self) -> None:
+        """
+        Запись накопленных изменений одной транзакцией.
+
+        :return:
+        """
+
+        with self._lock:
+            users, self._pending_users = self._pending_users, {}
+            conversations, self._pending_conversations = self._pending_conversations, {}
+
+        if not users and not conversations:
+            return
+
+        try:
+            self.store.save(users, conversations)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to persist chatbot state")
+            # изменения возвращаются в очередь (более новые значения не заменяются)
+            with self._lock:
+                self._pending_users = {**users, **self._pending_users}
+                self._pending_conversations = {
+                    **conversations,
+                    **self._pending_conversations,
+                }
+
+    def _run(self) -> None:
+        """
+        Фоновая запись изменений.
+
+        :return:
+        """
+
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._write()
+
+    def flush(self) -> None:
+        """
+        Остановка фоновой записи и запись всех накопленных изменений.
+
+        :return:
+        """
+
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._write()
+
+    def close(self) -> None:
+        """
+        Запись всех изменений и закрытие хранилища (при остановке чат-бота).
+
+        :return:
+        """
+
+        self.flush()
+        self.store.close()
@@ -0,0 +1,131 @@
+"""
+Обработка обновлений чат-бота в цикле событий asyncio.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncioRunner:
+    """
+    Цикл событий asyncio в отдельном потоке для выполнения обработчиков-корутин.
+
+    Диспетчер обновлений передает корутину в цикл событий и сразу переходит
+    к следующему обновлению, поэтому ожидание ответа шлюза не занимает потоки.
+    """
+
+    def __init__(self, max_in_flight: int):
+        """
+        Конструктор.
+
+        :param max_in_flight: Максимальное количество одновременно обрабатываемых обновлений.
+        """
+
+        self.max_in_flight = max_in_flight
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        #: количество обновлений, находящихся в обработке (включая ожидающие)
+        self.in_flight = 0
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Цикл событий (доступен после запуска).
+
+        :return:
+        """
+
+        if self._loop is None:
+            raise RuntimeError("Asyncio runner is not started.")
+
+        return self._loop
+
+    def start(self) -> None:
+        """
+        Запуск цикла событий в отдельном потоке.
+
+        :return:
+        """
+
+        if self._loop is not None:
+            return
+
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(loop)
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        self._loop = loop
+        self._thread = threading.Thread(target=run, name="asyncio-runner", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Остановка цикла событий.
+
+        :param timeout: Время ожидания завершения потока (в секундах).
+        :return:
+        """
+
+        if self._loop is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """
+        Выполнение корутины в цикле событий с ожиданием результата.
+
+        :param coroutine: Корутина.
+        :return:
+        """
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> "Future[T]":
+        """
+        Передача обработчика-корутины в цикл событий без ожидания результата.
+
+        Количество одновременно выполняемых обработчиков ограничено `max_in_flight`,
+        остальные ожидают своей очереди внутри цикла событий.
+
+        :param coroutine: Корутина обработчика.
+        :return:
+        """
+
+        return asyncio.run_coroutine_threadsafe(self._guarded(coroutine), self.loop)
+
+    async def _guarded(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """
+        Выполнение обработчика с ограничением параллелизма и логированием ошибок.
+
+        :param coroutine: Корутина обработчика.
+        :return:
+        """
+
+        self.in_flight += 1
+        try:
+            async with self._semaphore:  # type: ignore
+                return await coroutine
+        except Exception:
+            logger.exception("Unhandled exception in asyncio handler")
+            raise
+        finally:
+            self.in_flight -= 1
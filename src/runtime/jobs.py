@@ -0,0 +1,286 @@
+"""
+Выполнение фоновых заданий пулом потоков.
+"""
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+from clients.resilience import RetryPolicy
+from persistence.jobs import Job, SQLiteJobQueue
+
+logger = logging.getLogger(__name__)
+
+
+class JobHandler(ABC):
+    """
+    Обработчик фоновых заданий одного вида.
+    """
+
+    @abstractmethod
+    def run(self, job: Job) -> None:
+        """
+        Выполнение задания.
+
+        Исключение означает, что задание нужно повторить позже.
+
+        :param job: Задание.
+        :return:
+        """
+
+    def give_up(self, job: Job) -> None:
+        """
+        Обработка задания, попытки выполнения которого исчерпаны.
+
+        :param job: Задание.
+        :return:
+        """
+
+
+class JobWorkerPool:
+    """
+    Пул потоков, выполняющих задания из очереди.
+
+    Количество одновременно выполняемых заданий ограничено количеством потоков.
+    Неудачные задания повторяются с экспоненциальной задержкой,
+    после `max_attempts` попыток задание завершается как невыполненное.
+    """
+
+    def __init__(
+        self,
+        queue: SQLiteJobQueue,
+        workers: int,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        poll_interval: float,
+    ):
+        """
+        Конструктор.
+
+        :param queue: Очередь заданий.
+        :param workers: Количество потоков.
+        :param max_attempts: Максимальное количество попыток выполнения задания.
+        :param backoff_base: Базовая задержка перед повтором (в секундах).
+        :param backoff_max: Максимальная задержка перед повтором (в секундах).
+        :param poll_interval: Максимальный интервал проверки очереди (в секундах).
+        """
+
+        self.queue = queue
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retry_policy = RetryPolicy(
+            retries=max_attempts - 1,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+            deadline=float("inf"),
+        )
+        self._handlers: dict[str, JobHandler] = {}
+        self._wakeup = threading.Condition()
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+        # очередь закрывается последним завершившимся потоком, если `stop` его не дождался
+        self._exit_lock = threading.Lock()
+        self._running = 0
+        self._close_on_exit = False
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """
+        Регистрация обработчика заданий.
+
+        :param kind: Вид заданий.
+        :param handler: Обработчик.
+        :return:
+        """
+
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, payload: dict[str, Any]) -> int:
+        """
+        Добавление задания в очередь и пробуждение свободного потока.
+
+        :param kind: Вид задания.
+        :param payload: Данные задания.
+        :return: Идентификатор задания.
+        """
+
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}.")
+
+        job_id = self.queue.put(kind, payload)
+        with self._wakeup:
+            self._wakeup.notify()
+
+        return job_id
+
+    def start(self) -> None:
+        """
+        Запуск потоков (сохраненные задания выполняются сразу).
+
+        :return:
+        """
+
+        for index in range(self.workers):
+            with self._exit_lock:
+                self._running += 1
+            thread = threading.Thread(
+                target=self._run, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Остановка потоков после выполнения текущих заданий.
+
+        Невыполненные задания остаются в очереди до следующего запуска.
+        Если поток не завершился за время ожидания, очередь закрывает последний
+        завершившийся поток.
+
+        :param timeout: Время ожидания завершения каждого потока (в секундах).
+        :return:
+        """
+
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+        with self._exit_lock:
+            if self._running:
+                logger.warning(
+                    "%s job workers are still running, the queue will be closed "
+                    "when they finish",
+                    self._running,
+                )
+                self._close_on_exit = True
+                return
+        self.queue.close()
+
+    def _run(self) -> None:
+        """
+        Выбор и выполнение заданий.
+
+        :return:
+        """
+
+        try:
+            self._work()
+        finally:
+            self._exit()
+
+    def _work(self) -> None:
+        """
+        Выбор и выполнение заданий до остановки пула.
+
+        :return:
+        """
+
+        while not self._stopped.is_set():
+            try:
+                job = self.queue.claim()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to claim a job")
+                job = None
+
+            if job is None:
+                self._wait()
+                continue
+
+            try:
+                self._execute(job)
+            except Exception:  # pylint: disable=broad-except
+                # задание будет выбрано повторно после истечения аренды
+                logger.exception("Failed to update job %s", job.id)
+
+    def _exit(self) -> None:
+        """
+        Завершение потока: последний поток закрывает очередь, если `stop` его не дождался.
+
+        :return:
+        """
+
+        with self._exit_lock:
+            self._running -= 1
+            close = self._close_on_exit and not self._running
+        if close:
+            self.queue.close()
+
+    def _wait(self) -> None:
+        """
+        Ожидание нового задания или времени повтора отложенного задания.
+
+        :return:
+        """
+
+        timeout = self.poll_interval
+        try:
+            if (run_at := self.queue.next_run_at()) is not None:
+                timeout = min(timeout, max(run_at - time.time(), 0.01))
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to read the job queue")
+
+        with self._wakeup:
+            if not self._stopped.is_set():
+                self._wakeup.wait(timeout)
+
+    def _execute(self, job: Job) -> None:
+        """
+        Выполнение задания с повтором при ошибке.
+
+        :param job: Задание.
+        :return:
+        """
+
+        handler = self._handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job kind {job.kind}.")
+            handler.run(job)
+        except Exception as exception:  # pylint: disable=broad-except
+            error = f"{type(exception).__name__}: {exception}"
+            if handler is None or job.attempt >= self.max_attempts:
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+                self.queue.fail(job.id, error)
+                if handler is not None:
+                    self._give_up(handler, job)
+            else:
+                delay = self.retry_policy.delay(job.attempt - 1)
+                logger.warning(
+                    "Job %s (%s) attempt %s failed (%s), retrying in %.2fs",
+                    job.id,
+                    job.kind,
+                    job.attempt,
+                    error,
+                    delay,
+                )
+                self.queue.retry(job.id, delay, error)
+        else:
+            self.queue.complete(job.id)
+
+    @staticmethod
+    def _give_up(handler: JobHandler, job: Job) -> None:
+        """
+        Обработка невыполненного задания (ошибки обработчика только логируются).
+
+        :param handler: Обработчик.
+        :param job: Задание.
+        :return:
+        """
+
+        try:
+            handler.give_up(job)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to give up job %s (%s)", job.id, job.kind)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Количество заданий по состояниям (для метрик).
+
+        :return:
+        """
+
+        return self.queue.counts()
@@ -0,0 +1,185 @@
+"""
+Журналирование: структурированные записи (JSON), фоновая запись через очередь
+и выборочная запись сообщений многословных библиотек.
+"""
+import contextlib
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterator, Optional
+
+from settings import Logging
+
+# стандартные атрибуты записи, не относящиеся к дополнительным полям
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+# контекст текущего обновления (в потоке диспетчера или в корутине обработчика)
+log_context: ContextVar[dict[str, Any]] = ContextVar("log_context", default={})
+
+
+@contextlib.contextmanager
+def bind(**fields: Any) -> Iterator[None]:
+    """
+    Добавление полей к записям журнала внутри блока.
+
+    :param fields: Поля контекста.
+    :return:
+    """
+
+    token = log_context.set({**log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавление полей контекста обновления к записям журнала.
+
+    Выполняется в потоке, создавшем запись, так как контекст привязан к нему.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, value in log_context.get().items():
+            if not hasattr(record, name):
+                setattr(record, name, value)
+
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Выборочная запись сообщений ниже уровня WARNING для заданных журналов.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        """
+        Конструктор.
+
+        :param rates: Доли записываемых сообщений по названиям журналов
+            (распространяются на вложенные журналы).
+        """
+
+        super().__init__()
+        self.rates = rates
+        self._random = random.Random()
+
+    def rate(self, name: str) -> float:
+        """
+        Доля записываемых сообщений журнала (по ближайшему настроенному родителю).
+
+        :param name: Название журнала.
+        :return:
+        """
+
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self.rate(record.name)
+
+        return rate >= 1.0 or self._random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Представление записи журнала одной строкой JSON.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: dict[str, Any] = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRIBUTES and not name.startswith("_"):
+                data[name] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Передача записей журнала в очередь фоновому потоку записи.
+
+    В потоке обработчика выполняется только подстановка аргументов сообщения,
+    форматирование и вывод – в фоновом потоке.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # очередь находится в том же процессе, поэтому запись не сериализуется
+        record.msg = record.getMessage()
+        record.args = None
+
+        return record
+
+
+# фоновый поток записи журнала (запускается функцией `setup_logging`)
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(config: Logging, debug: bool = False) -> None:
+    """
+    Настройка журналирования приложения.
+
+    :param config: Конфигурация журналирования.
+    :param debug: Режим отладки (записываются сообщения уровня DEBUG).
+    :return:
+    """
+
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(sys.stderr)
+    if config.json_format:
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = BackgroundQueueHandler(records)
+    handler.addFilter(SamplingFilter(config.sampling))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Запись оставшихся сообщений и остановка фонового потока.
+
+    :return:
+    """
+
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,258 @@
+"""
+Запись входящих обновлений в файл JSONL для воспроизведения нагрузки
+(см. `benchmarks.replay`).
+
+Данные пользователей обезличиваются: идентификаторы пользователей и чатов
+заменяются псевдонимами, имена и телефоны удаляются, координаты округляются,
+произвольный текст, названия и адреса мест маскируются (команды и подписи кнопок
+сохраняются), идентификаторы файлов заменяются хешами.
+Обновления передаются фоновому потоку записи, файл ротируется по размеру.
+"""
+import hashlib
+import json
+import logging
+import queue
+import secrets
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Collection, Optional
+
+from telegram import Update
+from telegram.ext import CallbackContext
+
+# объекты с идентификатором пользователя или чата
+IDENTITY_KEYS = frozenset(
+    {
+        "from",
+        "chat",
+        "user",
+        "sender_chat",
+        "forward_from",
+        "forward_from_chat",
+        "via_bot",
+        "new_chat_member",
+        "old_chat_member",
+        "left_chat_member",
+        "contact",
+    }
+)
+# поля пользователя или чата, удаляемые из записи
+PERSONAL_KEYS = frozenset(
+    {
+        "last_name",
+        "username",
+        "title",
+        "bio",
+        "description",
+        "invite_link",
+        "phone_number",
+        "vcard",
+        "photo",
+    }
+)
+# поля с произвольным текстом пользователя
+TEXT_KEYS = frozenset({"text", "caption", "query"})
+# поля места (`venue`) с текстом пользователя (в том числе описанием его любимого места)
+VENUE_TEXT_KEYS = frozenset({"title", "address"})
+# внешние идентификаторы места, удаляемые из записи
+VENUE_ID_KEYS = frozenset(
+    {"foursquare_id", "foursquare_type", "google_place_id", "google_place_type"}
+)
+# поля, заменяемые хешем (одинаковые значения дают одинаковые хеши):
+# идентификатор чата для inline-кнопок и идентификаторы файлов (по ним файл можно скачать)
+HASHED_KEYS = frozenset({"chat_instance", "file_id", "file_unique_id"})
+# точность округления координат (знаков после запятой, около 1 км)
+COORDINATES_PRECISION = 2
+
+
+class UpdateScrubber:
+    """
+    Обезличивание данных обновления.
+    """
+
+    def __init__(self, salt: str, keep_texts: Collection[str] = ()):
+        """
+        Конструктор.
+
+        :param salt: Соль псевдонимов (одинаковая соль дает одинаковые псевдонимы).
+        :param keep_texts: Тексты, сохраняемые без маскирования (подписи кнопок).
+        """
+
+        # ключ хеш-функции ограничен 64 байтами, поэтому соль приводится к 32 байтам
+        self.salt = hashlib.blake2b(salt.encode(), digest_size=32).digest()
+        self.keep_texts = frozenset(keep_texts)
+
+    def pseudonym(self, value: int) -> int:
+        """
+        Псевдоним идентификатора (знак сохраняется: отрицательные у групп и каналов).
+
+        :param value: Идентификатор.
+        :return:
+        """
+
+        digest = hashlib.blake2b(
+            str(abs(value)).encode(), digest_size=6, key=self.salt
+        ).digest()
+        pseudonym = int.from_bytes(digest, "big") % 10**12 + 1
+
+        return -pseudonym if value < 0 else pseudonym
+
+    def mask(self, text: str) -> str:
+        """
+        Маскирование текста с сохранением длины и пробелов (смещения сущностей не меняются).
+
+        :param text: Текст.
+        :return:
+        """
+
+        if text.startswith("/") or text in self.keep_texts:
+            return text
+
+        return "".join(char if char.isspace() else "x" for char in text)
+
+    def scrub(self, data: Any, key: Optional[str] = None) -> Any:
+        """
+        Обезличивание данных обновления (рекурсивно).
+
+        :param data: Данные обновления (JSON) или их часть.
+        :param key: Поле, в котором находятся данные.
+        :return:
+        """
+
+        if isinstance(data, list):
+            return [self.scrub(item, key) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for name, value in data.items():
+            if name in PERSONAL_KEYS and key in IDENTITY_KEYS:
+                continue
+            if name in VENUE_ID_KEYS and key == "venue":
+                continue
+            if isinstance(value, int) and (
+                name == "user_id" or (name == "id" and key in IDENTITY_KEYS)
+            ):
+                value = self.pseudonym(value)
+            elif name == "first_name":
+                value = "User"
+            elif name == "phone_number":
+                value = ""
+            elif name in HASHED_KEYS:
+                value = hashlib.blake2b(
+                    str(value).encode(), digest_size=8, key=self.salt
+                ).hexdigest()
+            elif name == "file_name" and isinstance(value, str):
+                value = "file" + Path(value).suffix
+            elif name in ("latitude", "longitude") and isinstance(value, float):
+                value = round(value, COORDINATES_PRECISION)
+            elif (
+                name in TEXT_KEYS or (name in VENUE_TEXT_KEYS and key == "venue")
+            ) and isinstance(value, str):
+                value = self.mask(value)
+            else:
+                value = self.scrub(value, name)
+                # пустые списки и объекты (значения по умолчанию) не записываются
+                if value == [] or value == {}:
+                    continue
+            result[name] = value
+
+        return result
+
+
+class UpdateFormatter(logging.Formatter):
+    """
+    Представление записанного обновления одной строкой JSON.
+
+    Выполняется в фоновом потоке записи, поэтому не замедляет обработку обновлений.
+    """
+
+    def __init__(self, scrubber: UpdateScrubber):
+        """
+        Конструктор.
+
+        :param scrubber: Объект для обезличивания данных.
+        """
+
+        super().__init__()
+        self.scrubber = scrubber
+
+    def format(self, record: logging.LogRecord) -> str:
+        # сообщением записи является объект обновления (см. `UpdateRecorder.record`)
+        update: Update = record.msg  # type: ignore
+        data = {
+            "time": round(record.created, 3),
+            "update": self.scrubber.scrub(update.to_dict()),
+        }
+
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class UpdateRecorder:
+    """
+    Запись входящих обновлений в ротируемый файл JSONL.
+
+    Каждая строка файла содержит время получения обновления (`time`)
+    и обезличенные данные обновления (`update`).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        backup_count: int,
+        salt: Optional[str] = None,
+        keep_texts: Collection[str] = (),
+    ):
+        """
+        Конструктор (запускает фоновый поток записи).
+
+        :param path: Путь к файлу записи.
+        :param max_bytes: Размер файла, после которого он ротируется (в байтах).
+        :param backup_count: Количество сохраняемых предыдущих файлов.
+        :param salt: Соль псевдонимов (если не передана, выбирается случайно
+            и псевдонимы не совпадают между запусками).
+        :param keep_texts: Тексты, сохраняемые без маскирования (подписи кнопок).
+        """
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        output = RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        output.setFormatter(
+            UpdateFormatter(UpdateScrubber(salt or secrets.token_hex(16), keep_texts))
+        )
+
+        self._records: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener = QueueListener(self._records, output)
+        self._listener.start()
+
+    def record(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Передача обновления фоновому потоку записи (обработчик диспетчера).
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        self._records.put(logging.makeLogRecord({"msg": update}))
+
+    def close(self) -> None:
+        """
+        Запись оставшихся обновлений и остановка фонового потока.
+
+        :return:
+        """
+
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
@@ -0,0 +1,261 @@
+"""
+Распределение обновлений чат-бота по процессам-обработчикам.
+
+Обновления одного чата всегда попадают в один процесс и обрабатываются
+в порядке поступления, поэтому диалоги и порядок ответов сохраняются.
+"""
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+from multiprocessing.process import BaseProcess
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from telegram import Bot, Update
+from telegram.error import TelegramError
+
+from runtime.logs import setup_logging, stop_logging
+from runtime.webhook import BaseWebhookServer
+from settings import Webhook, settings
+
+if TYPE_CHECKING:
+    from chatbot import ChatBotTelegram
+
+logger = logging.getLogger(__name__)
+
+# фабрика чат-бота для процесса-обработчика (принимает номер процесса)
+BotFactory = Callable[[int], "ChatBotTelegram"]
+
+# время ожидания места в очереди перед предупреждением об отставании (в секундах)
+PUT_TIMEOUT = 1.0
+# время ожидания новых обновлений при long polling (в секундах)
+POLL_TIMEOUT = 10
+
+
+def shard_key(data: dict[str, Any]) -> int:
+    """
+    Получение ключа распределения обновления (идентификатора чата).
+
+    Для обновлений без чата (например, inline-запросов) используется
+    идентификатор пользователя, а при его отсутствии – идентификатор обновления.
+
+    :param data: Данные обновления (JSON).
+    :return:
+    """
+
+    for name, value in data.items():
+        if name == "update_id" or not isinstance(value, dict):
+            continue
+
+        message = value.get("message", value)
+        if isinstance(message, dict) and "chat" in message:
+            return int(message["chat"]["id"])
+        if "chat" in value:
+            return int(value["chat"]["id"])
+        if "from" in value:
+            return int(value["from"]["id"])
+
+    return int(data["update_id"])
+
+
+def run_worker(index: int, updates: multiprocessing.Queue, factory: BotFactory) -> None:
+    """
+    Обработка обновлений в процессе-обработчике.
+
+    Обновления обрабатываются по одному, поэтому при отставании обработчика
+    очередь заполняется и передача ему новых обновлений приостанавливается.
+
+    :param index: Номер процесса-обработчика.
+    :param updates: Очередь обновлений процесса (`None` – завершение работы).
+    :param factory: Фабрика чат-бота.
+    :return:
+    """
+
+    # остановкой обработчиков управляет основной процесс
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    setup_logging(settings.logging, debug=settings.debug)
+    bot = factory(index)
+    dispatcher = bot.updater.dispatcher
+    logger.info("Worker %s is ready", index)
+    while (data := updates.get()) is not None:
+        dispatcher.process_update(Update.de_json(data, dispatcher.bot))
+
+    bot.shutdown()
+    stop_logging()
+
+
+class ShardRouter:
+    """
+    Распределение обновлений по процессам-обработчикам по идентификатору чата.
+    """
+
+    def __init__(self, factory: BotFactory, workers: int, queue_size: int):
+        """
+        Конструктор.
+
+        :param factory: Фабрика чат-бота (функция уровня модуля для передачи в процесс).
+        :param workers: Количество процессов-обработчиков.
+        :param queue_size: Размер очереди обновлений каждого процесса.
+        """
+
+        # процессы запускаются методом spawn, так как к моменту запуска
+        # в основном процессе уже работают потоки
+        context = multiprocessing.get_context("spawn")
+        self.queues: list[multiprocessing.Queue] = [
+            context.Queue(queue_size) for _ in range(workers)
+        ]
+        self.processes: list[BaseProcess] = [
+            context.Process(
+                target=run_worker,
+                args=(index, updates, factory),
+                name=f"chatbot-worker-{index}",
+            )
+            for index, updates in enumerate(self.queues)
+        ]
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """
+        Запуск процессов-обработчиков.
+
+        :return:
+        """
+
+        for process in self.processes:
+            process.start()
+
+    def stop(self) -> None:
+        """
+        Завершение процессов-обработчиков после обработки принятых обновлений.
+
+        :return:
+        """
+
+        for updates in self.queues:
+            updates.put(None)
+        for process in self.processes:
+            process.join()
+
+    def route(self, data: dict[str, Any]) -> None:
+        """
+        Передача обновления процессу-обработчику его чата.
+
+        Если очередь процесса заполнена, метод ожидает освобождения места,
+        приостанавливая прием новых обновлений.
+
+        :param data: Данные обновления (JSON).
+        :return:
+        """
+
+        index = shard_key(data) % len(self.queues)
+        while True:
+            try:
+                self.queues[index].put(data, timeout=PUT_TIMEOUT)
+
+                return
+            except queue.Full:
+                if not self.processes[index].is_alive():
+                    raise RuntimeError(f"Worker {index} is not running.") from None
+                logger.warning("Worker %s is lagging behind", index)
+
+    def poll(self, bot: Bot) -> None:
+        """
+        Получение обновлений через long polling до остановки.
+
+        :param bot: Объект чат-бота.
+        :return:
+        """
+
+        bot.delete_webhook()
+        offset = 0
+        while not self._stopped.is_set():
+            try:
+                # обновления передаются обработчикам без разбора в основном процессе
+                updates: list[dict[str, Any]] = bot.request.post(  # type: ignore
+                    f"{bot.base_url}/getUpdates",
+                    {"offset": offset, "timeout": POLL_TIMEOUT},
+                    timeout=POLL_TIMEOUT + 5,
+                )
+            except TelegramError:
+                logger.exception("Failed to get updates")
+                self._stopped.wait(1.0)
+                continue
+
+            for data in updates:
+                self.route(data)
+                offset = data["update_id"] + 1
+
+    def run(self, bot: Bot, webhook: Optional[Webhook] = None) -> None:
+        """
+        Запуск процессов-обработчиков и получение обновлений до сигнала остановки.
+
+        :param bot: Объект чат-бота.
+        :param webhook: Конфигурация вебхука (если не передана, используется long polling).
+        :return:
+        """
+
+        self.start()
+        try:
+            if webhook:
+                server = ShardedWebhookServer(
+                    self,
+                    listen=webhook.listen,
+                    port=webhook.port,
+                    path=webhook.path,
+                    secret_token=webhook.secret_token,
+                )
+                if webhook.url:
+                    bot.set_webhook(url=webhook.url, secret_token=webhook.secret_token)
+                for signum in (signal.SIGINT, signal.SIGTERM):
+                    signal.signal(signum, lambda *args: server.stop())
+
+                logger.info(
+                    "Webhook is listening on %s:%s", webhook.listen, webhook.port
+                )
+                try:
+                    server.serve_forever()
+                finally:
+                    server.server_close()
+            else:
+                for signum in (signal.SIGINT, signal.SIGTERM):
+                    signal.signal(signum, lambda *args: self._stopped.set())
+                self.poll(bot)
+        finally:
+            self.stop()
+
+
+class ShardedWebhookServer(BaseWebhookServer):
+    """
+    HTTP-сервер для приема обновлений от Telegram и распределения их по процессам.
+    """
+
+    def __init__(
+        self,
+        router: ShardRouter,
+        listen: str,
+        port: int,
+        path: str,
+        secret_token: Optional[str] = None,
+    ):
+        """
+        Конструктор.
+
+        :param router: Распределитель обновлений.
+        :param listen: Адрес для входящих соединений.
+        :param port: Порт для входящих соединений.
+        :param path: Путь, по которому принимаются обновления.
+        :param secret_token: Секретный токен для проверки запросов от Telegram.
+        """
+
+        super().__init__(listen, port, path, secret_token)
+
+        self.router = router
+
+    def submit(self, data: Any) -> None:
+        if not isinstance(data, dict):
+            raise TypeError("Update must be a JSON object.")
+
+        self.router.route(data)
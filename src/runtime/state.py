@@ -0,0 +1,210 @@
+"""
+Учет и ограничение данных пользователей и чатов, хранящихся в памяти.
+
+Диспетчер создает данные (`context.user_data`, `context.chat_data`) для каждого
+пользователя и чата, от которого пришло обновление, и не удаляет их.
+`StateBudget` после обработки каждого обновления оценивает объем данных
+пользователя и чата и вытесняет из памяти данные, не использовавшиеся дольше
+`idle_ttl` секунд, а при превышении общего объема – наиболее давно использовавшиеся.
+
+Если включено сохранение состояния, вытесненные данные и состояние диалогов
+загружаются из хранилища при следующем обращении, иначе они удаляются.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from telegram import TelegramObject, Update
+from telegram.ext import CallbackContext, ConversationHandler, Dispatcher
+
+from persistence.writebehind import LazyConversations, WriteBehindPersistence
+
+# виды данных: данные пользователя и данные чата
+KIND_USER = "user"
+KIND_CHAT = "chat"
+
+
+def approximate_size(value: Any, seen: Optional[set[int]] = None) -> int:
+    """
+    Оценка объема памяти, занимаемого значением и вложенными в него значениями (в байтах).
+
+    Объекты Telegram оцениваются по их данным (без ссылки на объект бота).
+
+    :param value: Значение.
+    :param seen: Идентификаторы учтенных объектов (общие объекты учитываются один раз).
+    :return:
+    """
+
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(
+            approximate_size(key, seen) + approximate_size(item, seen)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in value)
+    elif isinstance(value, TelegramObject):
+        size += approximate_size(value.to_dict(), seen)
+    elif hasattr(value, "__dict__"):
+        size += approximate_size(vars(value), seen)
+
+    return size
+
+
+class StateBudget:
+    """
+    Вытеснение данных пользователей и чатов по времени неактивности и общему объему.
+
+    Методы вызываются в потоке диспетчера (кроме `report`).
+    """
+
+    def __init__(self, dispatcher: Dispatcher, max_bytes: int, idle_ttl: float):
+        """
+        Конструктор.
+
+        :param dispatcher: Диспетчер обновлений чат-бота.
+        :param max_bytes: Общий объем данных пользователей и чатов в памяти (в байтах).
+        :param idle_ttl: Время неактивности, после которого данные вытесняются (в секундах).
+        """
+
+        self.dispatcher = dispatcher
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        #: количество вытеснений по времени неактивности и по объему
+        self.evicted_idle = 0
+        self.evicted_budget = 0
+        # (вид данных, идентификатор) → (время последнего использования, объем);
+        # порядок – от давно использовавшихся к недавним
+        self._entries: OrderedDict[tuple[str, int], tuple[float, int]] = OrderedDict()
+        self._bytes = 0
+        self._counts = {KIND_USER: 0, KIND_CHAT: 0}
+        # чаты, в которых писал пользователь (для удаления состояния его диалогов)
+        self._user_chats: dict[int, set[int]] = {}
+        self._lock = threading.Lock()
+
+    def touch(
+        self,
+        update: Update,
+        context: CallbackContext,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Учет данных пользователя и чата после обработки обновления (обработчик диспетчера).
+
+        :param update: Объект с данными, поступившими от чат-бота.
+        :param context: Объект с данными контекста запроса.
+        :return:
+        """
+
+        now = time.monotonic()
+        user, chat = update.effective_user, update.effective_chat
+        with self._lock:
+            if user is not None:
+                self._account(KIND_USER, user.id, self.dispatcher.user_data, now)
+                if chat is not None:
+                    self._user_chats.setdefault(user.id, set()).add(chat.id)
+            if chat is not None:
+                self._account(KIND_CHAT, chat.id, self.dispatcher.chat_data, now)
+            self._evict(now)
+
+    def report(self) -> dict[str, int]:
+        """
+        Количество пользователей и чатов, данные которых находятся в памяти,
+        их объем и количество вытеснений.
+
+        :return:
+        """
+
+        with self._lock:
+            self._evict(time.monotonic())
+
+            return {
+                "users": self._counts[KIND_USER],
+                "chats": self._counts[KIND_CHAT],
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evicted_idle": self.evicted_idle,
+                "evicted_budget": self.evicted_budget,
+            }
+
+    def _account(self, kind: str, key: int, data: dict, now: float) -> None:
+        """
+        Обновление объема и времени использования данных (вызывается под блокировкой).
+
+        :param kind: Вид данных.
+        :param key: Идентификатор пользователя или чата.
+        :param data: Данные всех пользователей или чатов.
+        :param now: Текущее время (`time.monotonic`).
+        :return:
+        """
+
+        # данные читаются без загрузки из хранилища (они загружены при обработке)
+        size = approximate_size(dict.get(data, key, {}))
+        if (entry := self._entries.pop((kind, key), None)) is not None:
+            self._bytes -= entry[1]
+        else:
+            self._counts[kind] += 1
+        self._entries[(kind, key)] = (now, size)
+        self._bytes += size
+
+    def _evict(self, now: float) -> None:
+        """
+        Вытеснение неактивных данных и давно использовавшихся данных сверх общего объема
+        (вызывается под блокировкой; данные текущего обновления не вытесняются).
+
+        :param now: Текущее время (`time.monotonic`).
+        :return:
+        """
+
+        while self._entries:
+            (kind, key), (touched, size) = next(iter(self._entries.items()))
+            if touched >= now:
+                break
+            if now - touched > self.idle_ttl:
+                self.evicted_idle += 1
+            elif self._bytes > self.max_bytes:
+                self.evicted_budget += 1
+            else:
+                break
+
+            del self._entries[(kind, key)]
+            self._bytes -= size
+            self._counts[kind] -= 1
+            self._drop(kind, key)
+
+    def _drop(self, kind: str, key: int) -> None:
+        """
+        Удаление данных пользователя или чата из памяти.
+
+        :param kind: Вид данных.
+        :param key: Идентификатор пользователя или чата.
+        :return:
+        """
+
+        if kind == KIND_CHAT:
+            self.dispatcher.chat_data.pop(key, None)
+            return
+
+        self.dispatcher.user_data.pop(key, None)
+        persistence = self.dispatcher.persistence
+        if isinstance(persistence, WriteBehindPersistence):
+            persistence.forget_user(key)
+
+        # состояние диалогов пользователя (сохраненное состояние загрузится повторно)
+        chats = self._user_chats.pop(key, set())
+        for group in self.dispatcher.handlers.values():
+            for handler in group:
+                if not isinstance(handler, ConversationHandler):
+                    continue
+                conversations = handler.conversations
+                for chat_id in chats:
+                    if isinstance(conversations, LazyConversations):
+                        conversations.forget((chat_id, key))
+                    else:
+                        conversations.pop((chat_id, key), None)
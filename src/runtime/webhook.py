@@ -0,0 +1,162 @@
+"""
+Получение обновлений чат-бота через вебхук (альтернатива long polling).
+"""
+import hmac
+import json
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from telegram import Update
+from telegram.ext import Dispatcher
+
+logger = logging.getLogger(__name__)
+
+# заголовок с секретным токеном, который Telegram передает в каждом запросе вебхука
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# максимальный размер тела запроса (в байтах)
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов вебхука.
+    """
+
+    server: "BaseWebhookServer"
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        Прием обновления и передача его диспетчеру.
+
+        :return:
+        """
+
+        if self.path.split("?", 1)[0] != self.server.path:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+            return
+
+        if not self.server.is_authorized(self.headers.get(SECRET_TOKEN_HEADER)):
+            self.send_error(HTTPStatus.FORBIDDEN)
+
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if not 0 < length <= MAX_BODY_SIZE:
+            self.send_error(HTTPStatus.BAD_REQUEST)
+
+            return
+
+        try:
+            self.server.submit(json.loads(self.rfile.read(length)))
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Invalid update received by webhook", exc_info=True)
+            self.send_error(HTTPStatus.BAD_REQUEST)
+
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class BaseWebhookServer(ThreadingHTTPServer):
+    """
+    Базовый класс HTTP-сервера для приема обновлений от Telegram.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        listen: str,
+        port: int,
+        path: str,
+        secret_token: Optional[str] = None,
+    ):
+        """
+        Конструктор.
+
+        :param listen: Адрес для входящих соединений.
+        :param port: Порт для входящих соединений.
+        :param path: Путь, по которому принимаются обновления.
+        :param secret_token: Секретный токен для проверки запросов от Telegram.
+        """
+
+        super().__init__((listen, port), WebhookRequestHandler)
+
+        self.path = path
+        self.secret_token = secret_token
+
+    def submit(self, data: Any) -> None:
+        """
+        Передача обновления на обработку.
+
+        :param data: Данные обновления (JSON).
+        :return:
+        """
+
+        raise NotImplementedError
+
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """
+        Проверка секретного токена из запроса.
+
+        :param token: Токен из заголовка запроса.
+        :return:
+        """
+
+        if not self.secret_token:
+            return True
+
+        return token is not None and hmac.compare_digest(
+            token.encode("utf-8"), self.secret_token.encode("utf-8")
+        )
+
+    def stop(self) -> None:
+        """
+        Остановка сервера из любого потока.
+
+        :return:
+        """
+
+        threading.Thread(target=self.shutdown, name="webhook-shutdown").start()
+
+
+class WebhookServer(BaseWebhookServer):
+    """
+    HTTP-сервер для приема обновлений от Telegram и передачи их диспетчеру.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        listen: str,
+        port: int,
+        path: str,
+        secret_token: Optional[str] = None,
+    ):
+        """
+        Конструктор.
+
+        :param dispatcher: Диспетчер обновлений чат-бота.
+        :param listen: Адрес для входящих соединений.
+        :param port: Порт для входящих соединений.
+        :param path: Путь, по которому принимаются обновления.
+        :param secret_token: Секретный токен для проверки запросов от Telegram.
+        """
+
+        super().__init__(listen, port, path, secret_token)
+
+        self.dispatcher = dispatcher
+
+    def submit(self, data: Any) -> None:
+        update = Update.de_json(data, self.dispatcher.bot)
+        # обновление обрабатывается потоком диспетчера в порядке поступления
+        self.dispatcher.update_queue.put(update)
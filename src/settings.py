@@ -1,4 +1,7 @@
-from pydantic import BaseModel, BaseSettings, Field
+import json
+from typing import Any, Optional
+
+from pydantic import BaseModel, BaseSettings, Field, validator
 
 
 class Project(BaseModel):
@@ -21,6 +24,299 @@ class ChatBot(BaseModel):
 
     #: токен доступа к чат-боту
     api_token: str
+    #: количество мест на одной странице списка
+    places_page_size: int = Field(default=10, ge=1, le=90)
+    #: максимальное количество сформированных меню в кеше
+    menu_cache_size: int = Field(default=10000, ge=1)
+    #: максимальное количество курсоров страниц списка мест, доступных кнопкам навигации
+    page_cursors_size: int = Field(default=50000, ge=1)
+    #: время хранения курсора страницы для кнопок навигации (в секундах)
+    page_cursors_ttl: float = Field(default=86400.0, gt=0)
+    #: радиус поиска мест рядом с пользователем (в километрах)
+    nearby_radius: float = Field(default=5.0, gt=0)
+    #: максимальное количество мест рядом с пользователем в ответе
+    nearby_limit: int = Field(default=5, ge=1, le=90)
+    #: максимальное количество мест в ответе на inline-запрос (Bot API допускает до 50)
+    inline_limit: int = Field(default=20, ge=1, le=50)
+    #: время хранения ответа на inline-запрос на серверах Telegram (в секундах)
+    inline_cache_time: int = Field(default=30, ge=0)
+    #: идентификаторы пользователей, которым доступны служебные команды (`/state`)
+    admin_ids: list[int] = Field(default_factory=list)
+
+    @validator("admin_ids", pre=True)
+    def split_admin_ids(cls, value: Any) -> Any:  # pylint: disable=no-self-argument
+        """
+        Чтение идентификаторов из строки, разделенной запятыми (переменная окружения).
+
+        :param value: Значение настройки.
+        :return:
+        """
+
+        if isinstance(value, str):
+            return value.strip("[] ").replace(",", " ").split()
+
+        return value
+
+
+class Gateway(BaseModel):
+    """
+    Конфигурация клиента GraphQL-шлюза.
+    """
+
+    #: максимальное количество постоянных соединений в пуле
+    pool_size: int = Field(default=10)
+    #: таймаут установки соединения (в секундах)
+    connect_timeout: float = Field(default=3.05)
+    #: таймаут ожидания ответа (в секундах)
+    read_timeout: float = Field(default=10.0)
+    #: таймауты ожидания ответа для отдельных операций (в секундах, по названию операции)
+    operation_timeouts: dict[str, float] = Field(default_factory=dict)
+    #: количество повторных попыток при ошибках шлюза
+    retries: int = Field(default=3)
+    #: базовая и максимальная задержки перед повтором (в секундах)
+    backoff_base: float = Field(default=0.1, ge=0)
+    backoff_max: float = Field(default=2.0, ge=0)
+    #: общее время на запрос с учетом повторов (в секундах)
+    deadline: float = Field(default=15.0, gt=0)
+    #: количество ошибок подряд, после которого запросы к шлюзу отклоняются
+    breaker_failures: int = Field(default=5, ge=1)
+    #: время до пробного запроса после отключения (в секундах)
+    breaker_reset_timeout: float = Field(default=30.0, gt=0)
+    #: путь к файлу схемы GraphQL (SDL), если не задан – схема запрашивается у шлюза
+    schema_path: Optional[str] = Field(default=None)
+    #: использовать автоматически сохраняемые запросы (APQ) – передача хеша вместо текста
+    persisted_queries: bool = Field(default=False)
+    #: окно объединения запросов мест в один запрос (в секундах, 0 – не объединять)
+    batch_window: float = Field(default=0.005, ge=0)
+    #: максимальное количество мест в объединенном запросе
+    batch_max_size: int = Field(default=20, ge=1)
+    #: проверять ответы шлюза по моделям данных (иначе данные шлюза считаются доверенными)
+    validate_responses: bool = Field(default=False)
+    #: количество мест, запрашиваемых за один раз при загрузке всех мест пользователя для поиска
+    places_page_size: int = Field(default=500, ge=1)
+
+    @validator("operation_timeouts", pre=True)
+    def decode_operation_timeouts(  # pylint: disable=no-self-argument
+        cls, value: Any
+    ) -> Any:
+        """
+        Чтение таймаутов из строки JSON (переменная окружения).
+
+        :param value: Значение настройки.
+        :return:
+        """
+
+        if isinstance(value, str):
+            return json.loads(value)
+
+        return value
+
+
+class Cache(BaseModel):
+    """
+    Конфигурация кеша любимых мест.
+    """
+
+    #: использовать кеш мест
+    enabled: bool = Field(default=True)
+    #: время жизни записи (в секундах)
+    ttl: float = Field(default=300.0)
+    #: время, в течение которого устаревшая запись выдается при недоступности шлюза
+    stale_ttl: float = Field(default=3600.0, ge=0)
+    #: максимальное количество мест в кеше
+    max_places: int = Field(default=10000)
+    #: максимальное количество списков мест в кеше
+    max_lists: int = Field(default=1000)
+    #: размер ячейки сетки пространственного индекса мест (в градусах)
+    index_cell_size: float = Field(default=0.05, gt=0, le=180)
+
+
+class AsyncMode(BaseModel):
+    """
+    Конфигурация обработки обновлений в цикле событий asyncio.
+    """
+
+    #: обрабатывать обновления корутинами в одном цикле событий
+    enabled: bool = Field(default=False)
+    #: максимальное количество одновременно обрабатываемых обновлений
+    max_in_flight: int = Field(default=1000)
+
+
+class Webhook(BaseModel):
+    """
+    Конфигурация получения обновлений через вебхук.
+    """
+
+    #: получать обновления через вебхук вместо long polling
+    enabled: bool = Field(default=False)
+    #: адрес для входящих соединений
+    listen: str = Field(default="0.0.0.0")
+    #: порт для входящих соединений
+    port: int = Field(default=8443)
+    #: путь, по которому принимаются обновления
+    path: str = Field(default="/telegram/webhook")
+    #: публичный URL вебхука для регистрации в Telegram (если не задан – не регистрируется)
+    url: Optional[str] = Field(default=None)
+    #: секретный токен для проверки запросов от Telegram
+    secret_token: Optional[str] = Field(default=None)
+
+
+class Outbound(BaseModel):
+    """
+    Конфигурация отправки исходящих сообщений в API Telegram.
+    """
+
+    #: общая частота отправки (сообщений в секунду)
+    global_rate: float = Field(default=30.0, gt=0)
+    #: частота отправки в личный чат (сообщений в секунду)
+    chat_rate: float = Field(default=1.0, gt=0)
+    #: допустимый всплеск сообщений в один чат
+    chat_burst: int = Field(default=3, ge=1)
+    #: частота отправки в групповой чат (сообщений в секунду)
+    group_rate: float = Field(default=20 / 60, gt=0)
+    #: количество повторов после ответа `429 Too Many Requests`
+    max_retries: int = Field(default=3)
+    #: количество потоков отправки (обслуживают очереди вызовов чатов)
+    workers: int = Field(default=4, ge=1)
+    #: количество сообщений, для которых хранится хеш содержимого
+    max_hashes: int = Field(default=10000)
+    #: время хранения хеша содержимого сообщения (в секундах)
+    hash_ttl: float = Field(default=3600.0)
+
+
+class Sharding(BaseModel):
+    """
+    Конфигурация распределения обновлений по процессам-обработчикам.
+    """
+
+    #: количество процессов-обработчиков (1 – обработка в одном процессе)
+    workers: int = Field(default=1, ge=1)
+    #: размер очереди обновлений каждого процесса-обработчика
+    queue_size: int = Field(default=100, ge=1)
+
+
+class Persistence(BaseModel):
+    """
+    Конфигурация сохранения состояния диалогов и данных пользователей.
+    """
+
+    #: сохранять состояние между перезапусками чат-бота
+    enabled: bool = Field(default=True)
+    #: путь к файлу базы данных SQLite
+    path: str = Field(default="data/chatbot.sqlite3")
+    #: интервал записи накопленных изменений (в секундах)
+    flush_interval: float = Field(default=1.0, gt=0)
+    #: количество изменений, при котором запись выполняется сразу
+    batch_size: int = Field(default=500, ge=1)
+
+
+class Logging(BaseModel):
+    """
+    Конфигурация журналирования.
+    """
+
+    #: записывать сообщения в формате JSON (одна строка на сообщение)
+    json_format: bool = Field(default=True)
+    #: доли записываемых сообщений ниже уровня WARNING по названиям журналов
+    sampling: dict[str, float] = Field(default_factory=dict)
+
+    @validator("sampling", pre=True)
+    def decode_sampling(cls, value: Any) -> Any:  # pylint: disable=no-self-argument
+        """
+        Чтение долей из строки JSON (переменная окружения).
+
+        :param value: Значение настройки.
+        :return:
+        """
+
+        if isinstance(value, str):
+            return json.loads(value)
+
+        return value
+
+
+class Metrics(BaseModel):
+    """
+    Конфигурация публикации метрик в формате Prometheus.
+    """
+
+    #: публиковать метрики
+    enabled: bool = Field(default=False)
+    #: адрес для входящих соединений
+    listen: str = Field(default="127.0.0.1")
+    #: порт для входящих соединений
+    port: int = Field(default=9100)
+    #: границы интервалов гистограмм задержек (в секундах)
+    buckets: list[float] = Field(
+        default=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    )
+
+
+class Transfer(BaseModel):
+    """
+    Конфигурация импорта и экспорта мест.
+    """
+
+    #: количество мест, создаваемых одним запросом к шлюзу при импорте
+    chunk_size: int = Field(default=50, ge=1, le=200)
+    #: минимальный интервал между обновлениями сообщения о ходе импорта (в секундах)
+    progress_interval: float = Field(default=2.0, ge=0)
+    #: максимальный размер импортируемого файла (в байтах, Bot API позволяет скачать до 20 МБ)
+    max_file_size: int = Field(default=20 * 1024 * 1024, ge=1)
+    #: таймаут ожидания данных при скачивании файла (в секундах)
+    download_timeout: float = Field(default=30.0, gt=0)
+    #: количество мест, запрашиваемых у шлюза за один раз при экспорте
+    export_page_size: int = Field(default=100, ge=1)
+
+
+class Jobs(BaseModel):
+    """
+    Конфигурация фонового выполнения заданий (создания мест).
+    """
+
+    #: создавать места в фоне (ответ пользователю отправляется сразу)
+    enabled: bool = Field(default=True)
+    #: путь к файлу базы данных SQLite с очередью заданий
+    path: str = Field(default="data/jobs.sqlite3")
+    #: количество потоков, выполняющих задания
+    workers: int = Field(default=4, ge=1)
+    #: максимальное количество попыток выполнения задания
+    max_attempts: int = Field(default=5, ge=1)
+    #: задержки перед повтором задания (экспоненциальные, со случайным разбросом)
+    backoff_base: float = Field(default=1.0, ge=0)
+    backoff_max: float = Field(default=60.0, ge=0)
+    #: время, после которого задание незавершившегося процесса выполняется повторно (в секундах)
+    lease_timeout: float = Field(default=60.0, gt=0)
+    #: максимальный интервал проверки очереди (в секундах)
+    poll_interval: float = Field(default=1.0, gt=0)
+
+
+class Recording(BaseModel):
+    """
+    Конфигурация записи входящих обновлений (для воспроизведения нагрузки).
+    """
+
+    #: записывать обезличенные обновления в файл JSONL
+    enabled: bool = Field(default=False)
+    #: путь к файлу записи (процессы-обработчики добавляют к имени свой номер)
+    path: str = Field(default="data/updates.jsonl")
+    #: размер файла, после которого он ротируется (в байтах)
+    max_bytes: int = Field(default=100 * 1024 * 1024, ge=1024)
+    #: количество сохраняемых предыдущих файлов
+    backup_count: int = Field(default=5, ge=0)
+    #: соль псевдонимов пользователей (без соли псевдонимы меняются при каждом запуске)
+    salt: Optional[str] = Field(default=None)
+
+
+class State(BaseModel):
+    """
+    Конфигурация хранения данных пользователей и чатов в памяти.
+    """
+
+    #: общий объем данных пользователей и чатов в памяти (в байтах, оценочно)
+    max_bytes: int = Field(default=64 * 1024 * 1024, ge=1024)
+    #: время неактивности, после которого данные вытесняются из памяти (в секундах)
+    idle_ttl: float = Field(default=3600.0, gt=0)
 
 
 class Settings(BaseSettings):
@@ -36,6 +332,32 @@ class Settings(BaseSettings):
     chatbot_telegram: ChatBot
     #: адрес GraphQL-шлюза
     gateway_url: str = Field(default="http://favorite-places-gateway:8000/graphql")
+    #: конфигурация клиента GraphQL-шлюза
+    gateway: Gateway = Field(default_factory=Gateway)
+    #: конфигурация кеша любимых мест
+    cache: Cache = Field(default_factory=Cache)
+    #: конфигурация обработки обновлений в цикле событий asyncio
+    async_mode: AsyncMode = Field(default_factory=AsyncMode)
+    #: конфигурация отправки исходящих сообщений
+    outbound: Outbound = Field(default_factory=Outbound)
+    #: конфигурация получения обновлений через вебхук
+    webhook: Webhook = Field(default_factory=Webhook)
+    #: конфигурация распределения обновлений по процессам
+    sharding: Sharding = Field(default_factory=Sharding)
+    #: конфигурация сохранения состояния
+    persistence: Persistence = Field(default_factory=Persistence)
+    #: конфигурация журналирования
+    logging: Logging = Field(default_factory=Logging)
+    #: конфигурация публикации метрик
+    metrics: Metrics = Field(default_factory=Metrics)
+    #: конфигурация импорта и экспорта мест
+    transfer: Transfer = Field(default_factory=Transfer)
+    #: конфигурация фонового выполнения заданий
+    jobs: Jobs = Field(default_factory=Jobs)
+    #: конфигурация хранения данных пользователей и чатов в памяти
+    state: State = Field(default_factory=State)
+    #: конфигурация записи входящих обновлений
+    recording: Recording = Field(default_factory=Recording)
 
     class Config:
         env_file = ".env"
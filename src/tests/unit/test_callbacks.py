@@ -0,0 +1,165 @@
+"""
+Тесты кодирования данных кнопок inline-меню.
+"""
+import pytest
+
+from menu.callbacks import (
+    ACTIONS,
+    CALLBACK_DATA_LIMIT,
+    RETIRED_ACTIONS,
+    CallbackData,
+    CallbackDataError,
+    decode,
+    encode,
+)
+from menu.cursors import PageCursors
+
+# курсор шлюза, не помещающийся в данные кнопки целиком
+LONG_CURSOR = "Y3Vyc29yOnYyOpK5MjAyNC0wMS0wMVQwMDowMDowMCswMDowMM4AAYag" * 2
+
+
+@pytest.mark.parametrize("place_id", [0, 7, 12345, 2**63 - 1])
+@pytest.mark.parametrize("action", ["place", "place.delete", "place.edit"])
+def test_place_actions_round_trip(action: str, place_id: int) -> None:
+    """
+    Идентификатор места записывается по основанию 36 и читается обратно.
+    """
+
+    data = encode(action, place_id)
+
+    assert decode(data) == CallbackData(action, (place_id,))
+    assert len(data.encode()) <= CALLBACK_DATA_LIMIT
+
+
+def test_action_codes_are_unique() -> None:
+    """
+    У каждого действия свой код (коды выведенных действий не используются повторно).
+    """
+
+    actions = (*ACTIONS, *RETIRED_ACTIONS)
+
+    assert len({action.code for action in actions}) == len(actions)
+
+
+def test_encode_compact_ids() -> None:
+    """
+    Данные кнопки содержат версию, код действия и идентификатор по основанию 36.
+    """
+
+    assert encode("place", 12345) == "1p9ix"
+    assert encode("place.delete", 35) == "1dz"
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ("place:12345", CallbackData("place", (12345,))),
+        ("place.delete:10", CallbackData("place.delete", (10,))),
+        ("place.edit:7", CallbackData("place.edit", (7,))),
+        ("place.page:", CallbackData("place.page", ("",))),
+        (
+            f"place.page:{LONG_CURSOR[:40]}",
+            CallbackData("place.page", (LONG_CURSOR[:40],)),
+        ),
+        # выведенный код страницы с курсором целиком
+        (
+            "1gYXJyYXljb25uZWN0aW9uOjk=",
+            CallbackData("place.page", ("YXJyYXljb25uZWN0aW9uOjk=",)),
+        ),
+    ],
+)
+def test_decode_legacy_data(data: str, expected: CallbackData) -> None:
+    """
+    Кнопки прежнего формата и выведенных действий продолжают работать.
+    """
+
+    assert decode(data) == expected
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "",
+        "place",
+        "unknown:1",
+        "place:abc",
+        "place:-1",
+        "1x1",
+        "1p",
+        "1p-1",
+        "1p１２",
+        "2p1",
+    ],
+)
+def test_decode_invalid_data(data: str) -> None:
+    """
+    Некорректные и неизвестные данные кнопки вызывают `CallbackDataError`.
+    """
+
+    with pytest.raises(CallbackDataError):
+        decode(data)
+
+
+def test_encode_respects_byte_limit() -> None:
+    """
+    Данные длиннее 64 байт не кодируются.
+    """
+
+    # версия и код действия занимают 2 байта, идентификатор – остальные 62
+    assert len(encode("place", 36**62 - 1)) == CALLBACK_DATA_LIMIT
+    with pytest.raises(CallbackDataError):
+        encode("place", 36**62)
+
+
+@pytest.mark.parametrize(
+    "action, args",
+    [("unknown", (1,)), ("place", ()), ("place", (1, 2)), ("place", (-1,))],
+)
+def test_encode_invalid_action(action: str, args: tuple) -> None:
+    """
+    Неизвестное действие, неверное количество аргументов и отрицательный идентификатор
+    вызывают `CallbackDataError`.
+    """
+
+    with pytest.raises(CallbackDataError):
+        encode(action, *args)
+
+
+@pytest.mark.parametrize("cursor", ["", "YXJyYXljb25uZWN0aW9uOjk=", LONG_CURSOR])
+def test_page_cursor_round_trip(cursor: str) -> None:
+    """
+    Курсор любой длины передается через короткий токен.
+    """
+
+    data = encode("place.page", cursor)
+
+    assert len(data.encode()) <= 10
+    assert decode(data) == CallbackData("place.page", (cursor,))
+
+
+def test_expired_page_cursor() -> None:
+    """
+    Неизвестный токен курсора считается устаревшей кнопкой.
+    """
+
+    with pytest.raises(CallbackDataError):
+        decode("1nAAAAAAAA")
+
+
+def test_page_cursors_store() -> None:
+    """
+    Токен зависит только от курсора, вытесненный курсор не находится.
+    """
+
+    cursors = PageCursors(max_size=2, ttl=60)
+    first = cursors.token("first")
+
+    assert cursors.token("first") == first
+    assert len(first) == 8
+    assert cursors.cursor(first) == "first"
+
+    cursors.token("second")
+    cursors.token("third")
+
+    assert cursors.cursor(first) is None
+    assert cursors.cursor("") == ""
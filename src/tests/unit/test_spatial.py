@@ -0,0 +1,220 @@
+"""
+Тесты пространственного индекса мест.
+"""
+import math
+import random
+
+import pytest
+
+from clients.shemas import PlaceDTO
+from clients.spatial import EARTH_RADIUS, PlaceIndex
+
+
+def make_place(place_id: int, latitude: float, longitude: float) -> PlaceDTO:
+    """
+    Формирование объекта места.
+
+    :param place_id: Идентификатор места.
+    :param latitude: Широта.
+    :param longitude: Долгота.
+    :return:
+    """
+
+    return PlaceDTO(
+        id=place_id, latitude=latitude, longitude=longitude, description="Место"
+    )
+
+
+def distance(
+    latitude: float, longitude: float, other_latitude: float, other_longitude: float
+) -> float:
+    """
+    Расстояние между точками по формуле гаверсинусов (в километрах).
+
+    :return:
+    """
+
+    lat, other_lat = math.radians(latitude), math.radians(other_latitude)
+    haversine = (
+        math.sin((other_lat - lat) / 2) ** 2
+        + math.cos(lat)
+        * math.cos(other_lat)
+        * math.sin(math.radians(other_longitude - longitude) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(haversine, 1.0)))
+
+
+def brute_force(
+    places: list[PlaceDTO],
+    latitude: float,
+    longitude: float,
+    limit: int,
+    radius: float,
+) -> list[int]:
+    """
+    Идентификаторы ближайших мест, найденные перебором всех мест.
+
+    :return:
+    """
+
+    found = sorted(
+        (distance(latitude, longitude, place.latitude, place.longitude), -place.id)
+        for place in places
+    )
+
+    return [-place_id for value, place_id in found if value <= radius][:limit]
+
+
+def build_index(places: list[PlaceDTO], cell_size: float = 1.0) -> PlaceIndex:
+    """
+    Формирование индекса с переданными местами.
+
+    :return:
+    """
+
+    index = PlaceIndex(cell_size)
+    index.update(places)
+
+    return index
+
+
+def fill_cells(count: int) -> list[PlaceDTO]:
+    """
+    Места в отдельных ячейках вдали от проверяемых точек.
+
+    Без них ячеек в индексе меньше, чем в окрестности точки,
+    и индекс перебирает все ячейки вместо просмотра колец.
+
+    :param count: Количество мест.
+    :return:
+    """
+
+    return [
+        make_place(1000 + index, -40.5 - index % 40, index // 40)
+        for index in range(count)
+    ]
+
+
+def test_antimeridian_neighbours_are_found() -> None:
+    """
+    Места по разные стороны 180-го меридиана находятся как соседние.
+    """
+
+    places = [
+        make_place(1, 10.0, 179.95),
+        make_place(2, 10.0, -179.95),
+        make_place(3, 10.0, 178.0),
+        *fill_cells(100),
+    ]
+    index = build_index(places)
+
+    east = index.nearest(10.0, -179.99, limit=2, radius=50)
+    west = index.nearest(10.0, 179.99, limit=2, radius=50)
+
+    assert [item.place.id for item in east] == [2, 1]
+    assert [item.place.id for item in west] == [1, 2]
+    assert east[1].distance == pytest.approx(distance(10.0, -179.99, 10.0, 179.95))
+
+
+@pytest.mark.parametrize("pole", [90.0, -90.0])
+def test_places_across_pole_are_found(pole: float) -> None:
+    """
+    У полюса окрестность охватывает все долготы.
+    """
+
+    sign = math.copysign(1.0, pole)
+    places = [
+        make_place(1, sign * 89.8, 0.0),
+        make_place(2, sign * 89.8, 180.0),
+        make_place(3, sign * 89.8, 90.0),
+        make_place(4, sign * 85.0, 0.0),
+        *fill_cells(100),
+    ]
+    index = build_index(places)
+
+    result = index.nearest(sign * 89.9, 0.0, limit=10, radius=100)
+
+    assert [item.place.id for item in result] == brute_force(
+        places, sign * 89.9, 0.0, 10, 100
+    )
+    assert {item.place.id for item in result} == {1, 2, 3}
+
+
+def test_ring_bounds_do_not_exceed_distances() -> None:
+    """
+    Нижняя граница кольца не превышает расстояний до мест в его ячейках.
+    """
+
+    rng = random.Random(1)
+    places = [
+        make_place(index, rng.uniform(-89.0, 89.0), rng.uniform(-180.0, 180.0))
+        for index in range(3000)
+    ]
+    index = build_index(places, cell_size=0.5)
+
+    for _ in range(200):
+        latitude, longitude = rng.uniform(-89.0, 89.0), rng.uniform(-180.0, 180.0)
+        lat = math.radians(latitude)
+        for cells, min_haversine in index._rings(latitude, longitude, 300):
+            for cell in cells:
+                for item in index._cells[cell].values():
+                    haversine = (
+                        math.sin((item.latitude - lat) / 2) ** 2
+                        + math.cos(lat)
+                        * item.cos_latitude
+                        * math.sin((item.longitude - math.radians(longitude)) / 2) ** 2
+                    )
+                    assert haversine >= min_haversine - 1e-12
+
+
+def test_nearest_matches_brute_force() -> None:
+    """
+    Результат поиска совпадает с перебором всех мест (в том числе у полюсов и 180-го меридиана).
+    """
+
+    rng = random.Random(2)
+    places = [
+        make_place(index, rng.uniform(-90.0, 90.0), rng.uniform(-180.0, 180.0))
+        for index in range(2000)
+    ]
+    index = build_index(places, cell_size=0.5)
+
+    points = [
+        (rng.uniform(-90.0, 90.0), rng.uniform(-180.0, 180.0)) for _ in range(100)
+    ]
+    points += [(0.0, 179.9), (0.0, -180.0), (89.99, 45.0), (-89.99, -45.0)]
+    for latitude, longitude in points:
+        for limit, radius in ((5, 500), (1, 3000), (20, 20000)):
+            result = index.nearest(latitude, longitude, limit, radius)
+            assert [item.place.id for item in result] == brute_force(
+                places, latitude, longitude, limit, radius
+            )
+
+
+def test_search_stops_after_enough_places() -> None:
+    """
+    Кольца, заведомо более далекие, чем найденные места, не просматриваются.
+    """
+
+    places = [
+        make_place(1, 50.0, 30.0),
+        # места в дальних кольцах окрестности
+        *(make_place(10 + index, 50.22, 29.9 + index * 0.02) for index in range(10)),
+        *fill_cells(100),
+    ]
+    index = build_index(places, cell_size=0.1)
+    iterate = index._rings
+    all_rings = list(iterate(50.0, 30.0, 30))
+    rings = []
+    index._rings = lambda *args: (  # type: ignore
+        rings.append(ring) or ring for ring in iterate(*args)
+    )
+
+    result = index.nearest(50.0, 30.0, limit=1, radius=30)
+
+    assert [item.place.id for item in result] == [1]
+    # окрестность просматривается кольцами, а не перебором всех ячеек
+    # третье кольцо получено только для проверки границы и не просматривается
+    assert len(rings) == 3 < len(all_rings)
+    assert len(index.nearest(50.0, 30.0, limit=20, radius=30)) == 11
@@ -0,0 +1,171 @@
+"""
+Тесты чтения и записи мест в форматах CSV, GPX и KML.
+"""
+import io
+from typing import Any, Iterator
+from xml.etree import ElementTree
+
+import pytest
+
+from clients.shemas import PlaceDTO
+from transfer.formats import read_places, write_places
+
+
+def read(content: str, file_format: str) -> list[Any]:
+    """
+    Чтение мест из содержимого файла.
+
+    :param content: Содержимое файла.
+    :param file_format: Формат файла.
+    :return: Пары координат (или `None` для некорректных записей).
+    """
+
+    return [
+        place and (place.latitude, place.longitude, place.description)
+        for place in read_places(io.BytesIO(content.encode()), file_format)
+    ]
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        "latitude,longitude,description",
+        "lat,lon,name",
+        "Lat , LNG ,Title",
+        "﻿широта,долгота,название",
+    ],
+)
+def test_csv_header_aliases(header: str) -> None:
+    """
+    Столбцы CSV находятся по любому из принятых названий (без учета регистра и пробелов).
+    """
+
+    assert read(f"{header}\n55.75,37.61,Красная площадь\n", "csv") == [
+        (55.75, 37.61, "Красная площадь")
+    ]
+
+
+def test_csv_column_order_and_invalid_rows() -> None:
+    """
+    Порядок столбцов не важен, некорректные строки отмечаются, пустые – пропускаются.
+    """
+
+    content = "name,extra,lon,lat\nПарк,x,37.5,55.7\n\n,,,\nОшибка,x,200,55.7\n,x,1,2\n"
+
+    assert read(content, "csv") == [
+        (55.7, 37.5, "Парк"),
+        None,
+        (2.0, 1.0, "Импортированное место"),
+    ]
+
+
+def test_csv_without_coordinates_columns() -> None:
+    """
+    Файл без столбцов координат не содержит мест.
+    """
+
+    assert read("name,city\nПарк,Москва\n", "csv") == []
+
+
+def test_kml_coordinates_are_longitude_first() -> None:
+    """
+    Координаты точки в KML записываются как "долгота,широта[,высота]".
+    """
+
+    content = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document>
+<Placemark><name>С высотой</name>
+<Point><coordinates>
+    37.61,55.75,120
+</coordinates></Point></Placemark>
+<Placemark><description>Без названия</description>
+<Point><coordinates>-73.98,40.75</coordinates></Point></Placemark>
+<Placemark><name>Без точки</name></Placemark>
+</Document></kml>"""
+
+    assert read(content, "kml") == [
+        (55.75, 37.61, "С высотой"),
+        (40.75, -73.98, "Без названия"),
+        None,
+    ]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "gpx", "kml"])
+def test_written_places_are_read_back(file_format: str) -> None:
+    """
+    Экспортированный файл импортируется с теми же координатами и описаниями.
+    """
+
+    places = [
+        PlaceDTO(id=1, latitude=55.75, longitude=37.61, description="Кафе <&> «Ц»"),
+        PlaceDTO(id=2, latitude=-33.86, longitude=151.2, description="Opera, House"),
+    ]
+    stream = io.StringIO()
+
+    assert write_places(stream, file_format, [places[:1], places[1:]]) == 2
+    assert read(stream.getvalue(), file_format) == [
+        (place.latitude, place.longitude, place.description) for place in places
+    ]
+
+
+@pytest.mark.parametrize(
+    "file_format, template",
+    [
+        (
+            "gpx",
+            '<gpx xmlns="http://www.topografix.com/GPX/1/1">{}</gpx>',
+        ),
+        (
+            "kml",
+            '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+            "<Folder><name>Места</name>{}</Folder></Document></kml>",
+        ),
+    ],
+)
+def test_read_elements_are_cleared(
+    monkeypatch: pytest.MonkeyPatch, file_format: str, template: str
+) -> None:
+    """
+    Прочитанные элементы удаляются из дерева, поэтому его размер не растет с размером файла
+    (кроме элементов, уже разобранных парсером из прочитанного блока файла).
+    """
+
+    if file_format == "gpx":
+        item = '<wpt lat="1.5" lon="2.5"><name>Точка</name><ele>10</ele></wpt>'
+    else:
+        item = (
+            "<Placemark><name>Точка</name><ExtendedData><Data><value>x</value></Data>"
+            "</ExtendedData><Point><coordinates>2.5,1.5</coordinates></Point></Placemark>"
+        )
+    content = template.format(item * 500)
+
+    roots = []
+    iterparse = ElementTree.iterparse
+
+    def parse(*args: Any, **kwargs: Any) -> Iterator[Any]:
+        for event, element in iterparse(*args, **kwargs):
+            if not roots:
+                roots.append(element)
+            yield event, element
+
+    monkeypatch.setattr(ElementTree, "iterparse", parse)
+
+    places = []
+    previous = None
+    for place in read_places(io.BytesIO(content.encode()), file_format):
+        places.append(place)
+        # предыдущий прочитанный элемент к этому моменту удален из дерева
+        if previous is not None:
+            assert all(element is not previous for element in roots[0].iter())
+        previous = next(
+            element
+            for element in roots[0].iter()
+            if element.tag.endswith("}wpt") or element.tag.endswith("}Placemark")
+        )
+
+    assert len(places) == 500
+    assert all(
+        place and (place.latitude, place.longitude) == (1.5, 2.5) for place in places
+    )
+    # после чтения в дереве не остается элементов (в том числе вне меток)
+    assert len(roots[0]) == 0
@@ -0,0 +1,337 @@
+"""
+Потоковое чтение и запись мест в форматах CSV, GPX и KML.
+
+Файлы читаются и записываются по одному месту, поэтому расход памяти
+не зависит от размера файла.
+"""
+import csv
+import io
+from pathlib import PurePath
+from typing import BinaryIO, Iterable, Iterator, Optional, TextIO
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+from pydantic import ValidationError
+
+from clients.shemas import NewPlaceDTO, PlaceDTO
+
+# поддерживаемые форматы файлов
+FORMATS = ("csv", "gpx", "kml")
+# типы содержимого файлов по форматам
+MIME_TYPES = {
+    "csv": "text/csv",
+    "gpx": "application/gpx+xml",
+    "kml": "application/vnd.google-earth.kml+xml",
+}
+# названия столбцов CSV, принимаемые при импорте
+CSV_COLUMNS = {
+    "latitude": ("latitude", "lat", "широта"),
+    "longitude": ("longitude", "lon", "lng", "долгота"),
+    "description": ("description", "name", "title", "описание", "название"),
+}
+# описание места, если в файле его нет
+DEFAULT_DESCRIPTION = "Импортированное место"
+
+
+class UnsupportedFormatError(Exception):
+    """
+    Формат файла не поддерживается.
+    """
+
+
+def detect_format(file_name: Optional[str], mime_type: Optional[str] = None) -> str:
+    """
+    Определение формата файла по расширению имени или типу содержимого.
+
+    :param file_name: Имя файла.
+    :param mime_type: Тип содержимого файла.
+    :return:
+    """
+
+    if file_name and (suffix := PurePath(file_name).suffix.lower().lstrip(".")):
+        if suffix in FORMATS:
+            return suffix
+
+    for name, known_type in MIME_TYPES.items():
+        if mime_type == known_type:
+            return name
+
+    raise UnsupportedFormatError(f"Unsupported file: {file_name} ({mime_type}).")
+
+
+def build_new_place(
+    latitude: Optional[str], longitude: Optional[str], description: Optional[str]
+) -> Optional[NewPlaceDTO]:
+    """
+    Проверка и формирование создаваемого места по данным из файла.
+
+    :param latitude: Широта.
+    :param longitude: Долгота.
+    :param description: Описание (если пустое – используется описание по умолчанию).
+    :return: Объект места или `None`, если данные некорректны.
+    """
+
+    description = " ".join((description or "").split())[:255]
+    try:
+        return NewPlaceDTO(
+            latitude=(latitude or "").strip(),
+            longitude=(longitude or "").strip(),
+            description=description if len(description) >= 2 else DEFAULT_DESCRIPTION,
+        )
+    except ValidationError:
+        return None
+
+
+def read_places(stream: BinaryIO, file_format: str) -> Iterator[Optional[NewPlaceDTO]]:
+    """
+    Потоковое чтение мест из файла.
+
+    :param stream: Поток с содержимым файла.
+    :param file_format: Формат файла.
+    :return: Места (`None` – для некорректных записей, которые пропускаются).
+    """
+
+    if file_format == "csv":
+        return read_csv(stream)
+    if file_format == "gpx":
+        return read_gpx(stream)
+    if file_format == "kml":
+        return read_kml(stream)
+
+    raise UnsupportedFormatError(f"Unsupported format: {file_format}.")
+
+
+def read_csv(stream: BinaryIO) -> Iterator[Optional[NewPlaceDTO]]:
+    """
+    Потоковое чтение мест из CSV (первая строка – названия столбцов).
+
+    :param stream: Поток с содержимым файла.
+    :return:
+    """
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text)
+    header = [column.strip().lower() for column in next(reader, [])]
+    positions = {
+        field: next((header.index(name) for name in names if name in header), None)
+        for field, names in CSV_COLUMNS.items()
+    }
+    if positions["latitude"] is None or positions["longitude"] is None:
+        return
+
+    for row in reader:
+        if not any(row):
+            continue
+
+        values = {
+            field: row[position]
+            if position is not None and position < len(row)
+            else None
+            for field, position in positions.items()
+        }
+        yield build_new_place(**values)
+
+
+def local_name(tag: str) -> str:
+    """
+    Получение названия элемента XML без пространства имен.
+
+    :param tag: Название элемента (возможно, с пространством имен).
+    :return:
+    """
+
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_elements(stream: BinaryIO, name: str) -> Iterator[ElementTree.Element]:
+    """
+    Потоковое чтение элементов XML с заданным названием.
+
+    Прочитанные элементы удаляются из дерева, поэтому в памяти хранится
+    только текущий элемент и его предки.
+
+    :param stream: Поток с содержимым файла.
+    :param name: Название элемента (без пространства имен).
+    :return:
+    """
+
+    parents: list[ElementTree.Element] = []
+    # количество открытых элементов с заданным названием (их дочерние элементы сохраняются)
+    depth = 0
+    for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            depth += local_name(element.tag) == name
+            continue
+
+        parents.pop()
+        if local_name(element.tag) == name:
+            depth -= 1
+            yield element
+        elif depth:
+            continue
+
+        if parents:
+            parents[-1].remove(element)
+
+
+def child_text(element: ElementTree.Element, name: str) -> Optional[str]:
+    """
+    Получение текста дочернего элемента по названию (без пространства имен).
+
+    :param element: Элемент XML.
+    :param name: Название дочернего элемента.
+    :return:
+    """
+
+    for child in element.iter():
+        if child is not element and local_name(child.tag) == name:
+            return child.text
+
+    return None
+
+
+def read_gpx(stream: BinaryIO) -> Iterator[Optional[NewPlaceDTO]]:
+    """
+    Потоковое чтение путевых точек (`wpt`) из GPX.
+
+    :param stream: Поток с содержимым файла.
+    :return:
+    """
+
+    for element in iter_elements(stream, "wpt"):
+        yield build_new_place(
+            element.get("lat"),
+            element.get("lon"),
+            child_text(element, "name") or child_text(element, "desc"),
+        )
+
+
+def read_kml(stream: BinaryIO) -> Iterator[Optional[NewPlaceDTO]]:
+    """
+    Потоковое чтение меток (`Placemark` с точкой) из KML.
+
+    :param stream: Поток с содержимым файла.
+    :return:
+    """
+
+    for element in iter_elements(stream, "Placemark"):
+        # координаты точки в KML: "долгота,широта[,высота]"
+        coordinates = (child_text(element, "coordinates") or "").split(",")
+        if len(coordinates) < 2:
+            yield None
+            continue
+
+        yield build_new_place(
+            coordinates[1],
+            coordinates[0],
+            child_text(element, "name") or child_text(element, "description"),
+        )
+
+
+class PlacesWriter:
+    """
+    Потоковая запись мест в файл (по одной странице списка мест).
+    """
+
+    def __init__(self, stream: TextIO, file_format: str):
+        """
+        Конструктор (записывает заголовок файла).
+
+        :param stream: Поток для записи.
+        :param file_format: Формат файла.
+        """
+
+        if file_format not in FORMATS:
+            raise UnsupportedFormatError(f"Unsupported format: {file_format}.")
+
+        self.stream = stream
+        self.file_format = file_format
+        #: количество записанных мест
+        self.count = 0
+        self._csv = csv.writer(stream)
+
+        if file_format == "csv":
+            self._csv.writerow(
+                ["latitude", "longitude", "description", "city", "locality"]
+            )
+        elif file_format == "gpx":
+            stream.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<gpx version="1.1" creator="Favorite Places Bot" '
+                'xmlns="http://www.topografix.com/GPX/1/1">\n'
+            )
+        else:
+            stream.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<kml xmlns="http://www.opengis.net/kml/2.2">\n<Document>\n'
+            )
+
+    def write(self, places: Iterable[PlaceDTO]) -> None:
+        """
+        Запись мест.
+
+        :param places: Места.
+        :return:
+        """
+
+        for place in places:
+            self.count += 1
+            locality = ", ".join(filter(None, (place.city, place.locality)))
+            if self.file_format == "csv":
+                self._csv.writerow(
+                    [
+                        place.latitude,
+                        place.longitude,
+                        place.description,
+                        place.city or "",
+                        place.locality or "",
+                    ]
+                )
+            elif self.file_format == "gpx":
+                self.stream.write(
+                    f"<wpt lat={quoteattr(str(place.latitude))} "
+                    f"lon={quoteattr(str(place.longitude))}>"
+                    f"<name>{escape(place.description)}</name>"
+                    f"<desc>{escape(locality)}</desc></wpt>\n"
+                )
+            else:
+                self.stream.write(
+                    f"<Placemark><name>{escape(place.description)}</name>"
+                    f"<description>{escape(locality)}</description>"
+                    f"<Point><coordinates>{place.longitude},{place.latitude}"
+                    "</coordinates></Point></Placemark>\n"
+                )
+
+    def close(self) -> None:
+        """
+        Завершение файла (записывает закрывающие элементы).
+
+        :return:
+        """
+
+        if self.file_format == "gpx":
+            self.stream.write("</gpx>\n")
+        elif self.file_format == "kml":
+            self.stream.write("</Document>\n</kml>\n")
+        self.stream.flush()
+
+
+def write_places(
+    stream: TextIO, file_format: str, pages: Iterable[Iterable[PlaceDTO]]
+) -> int:
+    """
+    Потоковая запись мест в файл.
+
+    :param stream: Поток для записи.
+    :param file_format: Формат файла.
+    :param pages: Места, разбитые на страницы.
+    :return: Количество записанных мест.
+    """
+
+    writer = PlacesWriter(stream, file_format)
+    for page in pages:
+        writer.write(page)
+    writer.close()
+
+    return writer.count
@@ -0,0 +1,160 @@
+"""
+Ограниченный по размеру кеш с временем жизни записей.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Ограниченный по размеру кеш с вытеснением давно не используемых записей (LRU)
+    и ограничением времени жизни записей (TTL).
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        stale_ttl: float = 0.0,
+    ):
+        """
+        Конструктор.
+
+        :param max_size: Максимальное количество записей.
+        :param ttl: Время жизни записи (в секундах).
+        :param clock: Источник времени.
+        :param stale_ttl: Время хранения устаревшей записи для `peek` (в секундах).
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._items: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        #: количество попаданий в кеш
+        self.hits = 0
+        #: количество промахов
+        self.misses = 0
+        #: количество вытесненных и устаревших записей
+        self.evictions = 0
+        #: количество выданных устаревших записей
+        self.stale_hits = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Получение записи.
+
+        :param key: Ключ записи.
+        :return: Значение или `None`, если записи нет или она устарела.
+        """
+
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+
+                return None
+
+            expires_at, value = item
+            now = self._clock()
+            if expires_at <= now:
+                # устаревшая запись сохраняется для выдачи при недоступности шлюза
+                if expires_at + self.stale_ttl <= now:
+                    del self._items[key]
+                    self.evictions += 1
+                self.misses += 1
+
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def peek(self, key: Hashable) -> Optional[V]:
+        """
+        Получение записи, в том числе устаревшей (но не старше `stale_ttl`).
+
+        :param key: Ключ записи.
+        :return:
+        """
+
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] + self.stale_ttl <= self._clock():
+                return None
+
+            self.stale_hits += 1
+
+            return item[1]
+
+    def set(self, key: Hashable, value: V) -> None:
+        """
+        Сохранение записи.
+
+        :param key: Ключ записи.
+        :param value: Значение.
+        :return:
+        """
+
+        with self._lock:
+            self._items[key] = (self._clock() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Удаление записи.
+
+        :param key: Ключ записи.
+        :return:
+        """
+
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Удаление всех записей.
+
+        :return:
+        """
+
+        with self._lock:
+            self._items.clear()
+
+    def values(self) -> list[V]:
+        """
+        Получение значений всех записей, в том числе устаревших (без учета использования).
+
+        :return:
+        """
+
+        with self._lock:
+            return [value for _, value in self._items.values()]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Получение статистики использования кеша.
+
+        :return:
+        """
+
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_hits": self.stale_hits,
+        }